@@ -0,0 +1,7 @@
+try:
+    from .celery import app as celery_app
+except ImportError:
+    # Celery is optional, see REMINDER_DISPATCH_BACKEND
+    celery_app = None
+
+__all__ = ('celery_app',)
@@ -74,6 +74,7 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'tenants.middleware.EdirSlugMiddleware',
     'tenants.middleware.EdirMembershipMiddleware',
+    'tenants.middleware.ReplicaStickinessMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware', 
     'corsheaders.middleware.CorsMiddleware'
     
@@ -110,6 +111,38 @@ DATABASES = {
     }
 }
 
+# Optional read replica for reporting and list views. Locally this can be a
+# second SQLite file refreshed with `python manage.py sync_replica`.
+REPLICA_DATABASE_NAME = os.environ.get('REPLICA_DATABASE_NAME')
+if REPLICA_DATABASE_NAME:
+    DATABASES['replica'] = {
+        'ENGINE': os.environ.get('REPLICA_DATABASE_ENGINE', 'django.db.backends.sqlite3'),
+        'NAME': REPLICA_DATABASE_NAME,
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['tenants.db_routers.PrimaryReplicaRouter']
+
+# Seconds a user's reads stay on the primary after they write
+REPLICA_STICKY_SECONDS = int(os.environ.get('REPLICA_STICKY_SECONDS', 15))
+
+# Cache shared by every worker process (redis). Required with a replica, as the
+# read-your-writes pin above is kept in it; without CACHE_URL each process has
+# its own local-memory cache, which only suits a single-process setup.
+CACHE_URL = os.environ.get('CACHE_URL')
+if CACHE_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_URL,
+        }
+    }
+
+# Closed payments, reminders and resource allocations older than this move to
+# the archive tables when `python manage.py archive_records` runs.
+ARCHIVE_HORIZON_DAYS = int(os.environ.get('ARCHIVE_HORIZON_DAYS', 730))
+ARCHIVE_BATCH_SIZE = 500
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -211,6 +244,8 @@ CORS_ALLOWED_ORIGINS = [
 TWILIO_ACCOUNT_SID = os.environ.get('TWILIO_ACCOUNT_SID')
 TWILIO_AUTH_TOKEN = os.environ.get('TWILIO_AUTH_TOKEN')
 TWILIO_PHONE_NUMBER = os.environ.get('TWILIO_PHONE_NUMBER')
+# Override to point the Twilio client at a stand-in server (tests, benchmarks)
+TWILIO_API_URL = os.environ.get('TWILIO_API_URL')
 SMS_API_KEY = os.environ.get('SMS_API_KEY')
 
 
@@ -231,4 +266,89 @@ PASSWORD_RESET_TIMEOUT = 60 * 60 * 24 * 3
 
 # Frontend URL for password reset links
 FRONTEND_URL = 'http://localhost:5173'  # Your frontend URL
-PASSWORD_RESET_CONFIRM_URL = 'reset-password/{uid}/{token}'  # Frontend route
\ No newline at end of file
+PASSWORD_RESET_CONFIRM_URL = 'reset-password/{uid}/{token}'  # Frontend route
+
+# Generated financial report data is cached per period and edir data version
+FINANCIAL_REPORT_CACHE_SECONDS = 60 * 60
+RESOURCE_REPORT_CACHE_SECONDS = 60 * 60
+
+# Rows fetched per round trip by the streaming export actions
+EXPORT_CHUNK_SIZE = 2000
+
+# Worker threads rendering report PDFs in the background; 0 renders inline
+REPORT_RENDER_WORKERS = int(os.environ.get('REPORT_RENDER_WORKERS', 2))
+# TrueType font covering Latin and Ethiopic (e.g. AbyssinicaSIL-Regular.ttf) drawn first
+# in report PDFs; without it Ethiopic text uses the Noto Serif Ethiopic font bundled with MuPDF
+REPORT_PDF_FONT = os.environ.get('REPORT_PDF_FONT')
+
+# Dashboard endpoint: cache lifetime (bounds how stale time-based counts get) and list lengths
+DASHBOARD_CACHE_SECONDS = 5 * 60
+DASHBOARD_LIST_SIZE = 5
+
+# Reminder dispatch: 'celery' hands reminders to Celery workers over CELERY_BROKER_URL,
+# 'thread' sends them on REMINDER_DISPATCH_WORKERS in-process threads (0 sends inline);
+# recipients are read REMINDER_DISPATCH_CHUNK members at a time and sent and logged
+# REMINDER_SEND_BATCH at a time; a batch must send well within REMINDER_LEASE_SECONDS
+# at the slowest channel's rate (SMS_RATE_PER_SECOND)
+REMINDER_DISPATCH_BACKEND = os.environ.get('REMINDER_DISPATCH_BACKEND', 'thread')
+REMINDER_DISPATCH_WORKERS = int(os.environ.get('REMINDER_DISPATCH_WORKERS', 2))
+REMINDER_DISPATCH_CHUNK = 1000
+REMINDER_SEND_BATCH = 50
+CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL', 'redis://localhost:6379/0')
+CELERY_TASK_ACKS_LATE = True
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+
+# Expo push: API base URL (point it at a stand-in server when testing), optional access
+# token, concurrent requests per send, request timeout, how long to wait before receipts,
+# and how many pushes in a row a device may fail before it is dropped
+EXPO_API_URL = os.environ.get('EXPO_API_URL', 'https://exp.host/--/api/v2')
+EXPO_ACCESS_TOKEN = os.environ.get('EXPO_ACCESS_TOKEN')
+EXPO_PUSH_CONCURRENCY = 6
+EXPO_REQUEST_TIMEOUT = 30
+EXPO_RECEIPT_DELAY = 15 * 60
+DEVICE_MAX_FAILURES = 5
+
+# Outgoing mail: messages per SMTP connection before it is reopened, provider
+# send limit per minute (0 for none), and attempts / back-off for failed recipients
+MAIL_BATCH_SIZE = 100
+MAIL_RATE_PER_MINUTE = int(os.environ.get('MAIL_RATE_PER_MINUTE', 60))
+MAIL_MAX_ATTEMPTS = 3
+MAIL_RETRY_DELAY = 5
+# Email outbox (tenants/outbox.py): where emails are sent after commit ('thread', 'celery'
+# or 'inline' in the request), emails per batch, and attempts before an email is given up
+EMAIL_OUTBOX_BACKEND = os.environ.get('EMAIL_OUTBOX_BACKEND', 'thread')
+EMAIL_OUTBOX_BATCH = 50
+EMAIL_OUTBOX_MAX_ATTEMPTS = 5
+
+# SMS sending: account throughput (messages per second, with bursts of SMS_BURST),
+# sending threads, and attempts / base back-off in seconds for transient failures
+SMS_RATE_PER_SECOND = float(os.environ.get('SMS_RATE_PER_SECOND', 1))
+SMS_BURST = int(os.environ.get('SMS_BURST', 1))
+SMS_CONCURRENCY = 4
+SMS_MAX_ATTEMPTS = 3
+SMS_RETRY_DELAY = 1
+# Segments an SMS may take (see tenants/sms_segments.py); messages still over it after
+# the compact and transliterated fallbacks are sent but flagged ('flag') or skipped ('refuse')
+SMS_SEGMENT_BUDGET = int(os.environ.get('SMS_SEGMENT_BUDGET', 2))
+SMS_OVER_BUDGET = os.environ.get('SMS_OVER_BUDGET', 'flag')
+
+# Reminder scheduler: how long a queued/sending reminder is held before it is presumed
+# lost and requeued, how many due reminders one pass queues, and seconds between passes
+REMINDER_LEASE_SECONDS = 10 * 60
+REMINDER_SCHEDULER_BATCH = 200
+REMINDER_SCHEDULER_INTERVAL = 30
+# Digests: seconds non-urgent reminders are held so each member gets one message per
+# channel for all of them (0 sends every reminder on its own); reminders for events of
+# these types are always urgent
+REMINDER_DIGEST_WINDOW = int(os.environ.get('REMINDER_DIGEST_WINDOW', 0))
+REMINDER_URGENT_EVENT_TYPES = ('bereavement',)
+CELERY_BEAT_SCHEDULE = {
+    'dispatch-due-reminders': {
+        'task': 'tenants.tasks.dispatch_due_reminders_task',
+        'schedule': REMINDER_SCHEDULER_INTERVAL,
+    },
+    'flush-email-outbox': {
+        'task': 'tenants.tasks.flush_outbox_task',
+        'schedule': REMINDER_SCHEDULER_INTERVAL,
+    },
+}
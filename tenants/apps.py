@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class TenantsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'tenants'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .db_routers import require_shared_cache
+
+        require_shared_cache()
@@ -0,0 +1,159 @@
+"""
+Moves closed, aged rows from the live tables into their archive tables.
+
+Rows are copied column-for-column (ids included) and deleted from the live
+table in the same transaction, one batch at a time, so a failure never
+loses or duplicates a row. Stored reports keep their JSON snapshots, and
+ArchiveAwareQuerySet.aggregate_period() reads both tables, so totals for
+archived periods do not change.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, time
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import (
+    ArchiveHorizon,
+    ArchivedPayment,
+    ArchivedReminder,
+    ArchivedReminderDelivery,
+    ArchivedResourceAllocation,
+    ArchivedResourceUsage,
+    Payment,
+    Reminder,
+    ReminderDelivery,
+    ResourceAllocation,
+    ResourceUsage,
+)
+
+_archiving = ContextVar('archiving', default=False)
+
+# Delivery log rows read and written per query when reminders are archived
+DELIVERY_BATCH = 2000
+
+
+def is_archiving():
+    """True while rows are being moved, so delete signals can ignore them"""
+    return _archiving.get()
+
+
+@contextmanager
+def _archiving_block():
+    token = _archiving.set(True)
+    try:
+        yield
+    finally:
+        _archiving.reset(token)
+
+
+def _copy_rows(model, archive_model, ids):
+    columns = [f.attname for f in model._meta.concrete_fields]
+    rows = model.objects.filter(pk__in=ids).values(*columns)
+    archive_model.objects.bulk_create([archive_model(**row) for row in rows])
+
+
+def _copy_deliveries(ids):
+    """Delivery logs of the reminders, streamed as a reminder has one per member and channel"""
+    columns = [f.attname for f in ReminderDelivery._meta.concrete_fields]
+    rows = ReminderDelivery.objects.filter(reminder_id__in=ids).order_by('pk').values(*columns)
+    batch = []
+    for row in rows.iterator(chunk_size=DELIVERY_BATCH):
+        batch.append(ArchivedReminderDelivery(**row))
+        if len(batch) == DELIVERY_BATCH:
+            ArchivedReminderDelivery.objects.bulk_create(batch)
+            batch = []
+    ArchivedReminderDelivery.objects.bulk_create(batch)
+
+
+def _copy_recipients(ids):
+    live = Reminder.recipients.through
+    archived = ArchivedReminder.recipients.through
+    links = live.objects.filter(reminder_id__in=ids).values_list('reminder_id', 'member_id')
+    archived.objects.bulk_create([
+        archived(archivedreminder_id=reminder_id, member_id=member_id)
+        for reminder_id, member_id in links
+    ])
+
+
+def _archivable_reminders(cutoff_at):
+    return Reminder.objects.filter(status__in=Reminder.CLOSED_STATUSES, scheduled_time__lt=cutoff_at)
+
+
+def _archivable_payments(cutoff, cutoff_at):
+    return Payment.objects.filter(
+        Q(payment_date__lt=cutoff) | Q(payment_date__isnull=True, created_at__lt=cutoff_at),
+        status__in=Payment.CLOSED_STATUSES,
+        # Still referenced from live rows; these move once the referrer is gone
+        penalty__isnull=True,
+        reminder__isnull=True,
+    )
+
+
+def _archivable_allocations(cutoff_at):
+    return ResourceAllocation.objects.filter(
+        status__in=ResourceAllocation.CLOSED_STATUSES,
+        end_date__lt=cutoff_at,
+    )
+
+
+def _move_reminders(ids):
+    _copy_rows(Reminder, ArchivedReminder, ids)
+    _copy_recipients(ids)
+    _copy_deliveries(ids)
+    # Deleting the reminders cascades to their delivery logs
+    Reminder.objects.filter(pk__in=ids).delete()
+
+
+def _move_payments(ids):
+    _copy_rows(Payment, ArchivedPayment, ids)
+    Payment.objects.filter(pk__in=ids).delete()
+
+
+def _move_allocations(ids):
+    _copy_rows(ResourceAllocation, ArchivedResourceAllocation, ids)
+    usage_ids = list(ResourceUsage.objects.filter(allocation_id__in=ids).values_list('pk', flat=True))
+    _copy_rows(ResourceUsage, ArchivedResourceUsage, usage_ids)
+    # Deleting the allocations cascades to their usage rows
+    ResourceAllocation.objects.filter(pk__in=ids).delete()
+
+
+def _run_batches(queryset, mover, batch_size, dry_run):
+    if dry_run:
+        return queryset.count()
+
+    moved = 0
+    queryset = queryset.order_by('pk')
+    while True:
+        with transaction.atomic():
+            ids = list(queryset.values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                break
+            mover(ids)
+        moved += len(ids)
+    return moved
+
+
+def archive_before(cutoff, batch_size=500, dry_run=False):
+    """
+    Archive closed records dated before `cutoff` (a date). Returns the number
+    of rows moved (or that would be moved) per live table.
+    """
+    cutoff_at = timezone.make_aware(datetime.combine(cutoff, time.min))
+
+    # Reminders go first so the payments they point at become archivable
+    plan = [
+        (Reminder, _archivable_reminders(cutoff_at), _move_reminders),
+        (Payment, _archivable_payments(cutoff, cutoff_at), _move_payments),
+        (ResourceAllocation, _archivable_allocations(cutoff_at), _move_allocations),
+    ]
+
+    results = {}
+    with _archiving_block():
+        for model, queryset, mover in plan:
+            results[model._meta.label] = _run_batches(queryset, mover, batch_size, dry_run)
+            if not dry_run:
+                ArchiveHorizon.advance(model, cutoff)
+    return results
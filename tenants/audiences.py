@@ -0,0 +1,81 @@
+"""
+Reminder audiences.
+
+A reminder either lists its recipients (Reminder.recipients) or stores an
+audience rule: members unpaid for a month, attendees of its related event,
+members of a task group, or members with a role. Rules are resolved to a
+Member queryset only when the reminder is dispatched, so nothing is written
+per member up front and the members reached are the ones matching at send
+time. Every rule is limited to the reminder's own edir.
+"""
+from dateutil.relativedelta import relativedelta
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Member, Payment
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def unpaid_members(edir_id, period):
+    """Members of the edir without a completed monthly payment in the month starting `period`"""
+    paid = Payment.objects.filter(
+        edir_id=edir_id,
+        payment_type='monthly',
+        status='completed',
+        payment_date__gte=period,
+        payment_date__lt=period + relativedelta(months=1),
+    )
+    return Member.objects.filter(edir_id=edir_id).exclude(pk__in=paid.values('member_id'))
+
+
+def _unpaid(reminder):
+    period = reminder.audience_period or month_start(timezone.localdate(reminder.scheduled_time))
+    return unpaid_members(reminder.edir_id, month_start(period))
+
+
+def _event_attendees(reminder):
+    return Member.objects.filter(
+        edir_id=reminder.edir_id,
+        attendances__event_id=reminder.related_event_id,
+        attendances__status='attending',
+    )
+
+
+def _task_group(reminder):
+    return Member.objects.filter(edir_id=reminder.edir_id, task_groups=reminder.audience_task_group_id)
+
+
+def _role(reminder):
+    return Member.objects.filter(edir_id=reminder.edir_id, role=reminder.audience_role)
+
+
+RESOLVERS = {
+    'unpaid': _unpaid,
+    'event_attendees': _event_attendees,
+    'task_group': _task_group,
+    'role': _role,
+}
+
+
+def audience_members(reminder):
+    """The members `reminder` is for, as an unevaluated queryset"""
+    if not reminder.audience:
+        return reminder.recipients.all()
+    return RESOLVERS[reminder.audience](reminder)
+
+
+def reaching(member):
+    """
+    Q matching the reminders `member` is among the recipients of. 'unpaid'
+    audiences depend on payments made before dispatch, so they are left out.
+    """
+    return (
+        Q(audience='', recipients=member)
+        | Q(audience='role', audience_role=member.role)
+        | Q(audience='event_attendees', related_event__attendances__member=member,
+            related_event__attendances__status='attending')
+        | Q(audience='task_group', audience_task_group__members=member)
+    )
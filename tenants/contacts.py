@@ -0,0 +1,60 @@
+"""
+Member contact directory.
+
+MemberContact holds each member's contact details already normalized: the
+phone number in E.164 form and the email address only if it validates. It
+is rebuilt from the Member row whenever a member is saved, so senders read
+ready-to-use addresses for a whole reminder in one query instead of
+re-normalizing them on every send. Push tokens live in Device, one row per
+app install.
+"""
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+
+from .models import MemberContact
+
+CONTACT_FIELDS = ('edir', 'edir_id', 'phone_number', 'email')
+
+
+def format_phone_number(number):
+    """
+    `number` in E.164 form, or None if it cannot be formatted reliably.
+    Local Ethiopian numbers (09..., 07...) get the +251 country code.
+    """
+    if not number or not isinstance(number, str):
+        return None
+    digits = ''.join(filter(str.isdigit, number))
+
+    if len(digits) == 10 and digits[:2] in ('09', '07'):
+        return '+251' + digits[1:]
+    if len(digits) == 12 and digits[:4] in ('2519', '2517'):
+        return '+' + digits
+    if len(digits) == 13 and digits.startswith('2510'):
+        return '+251' + digits[4:]
+    # Any other number must already carry its country code
+    if number.strip().startswith('+') and 8 <= len(digits) <= 15:
+        return '+' + digits
+    return None
+
+
+def normalize_email(address):
+    """`address` stripped, or None if it is not a valid email address"""
+    address = (address or '').strip()
+    try:
+        validate_email(address)
+    except ValidationError:
+        return None
+    return address
+
+
+def contact_values(member):
+    return {
+        'edir_id': member.edir_id,
+        'phone_number': format_phone_number(member.phone_number),
+        'email': normalize_email(member.email),
+    }
+
+
+def sync_contact(member):
+    """Bring the member's directory entry in line with the Member row"""
+    MemberContact.objects.update_or_create(member=member, defaults=contact_values(member))
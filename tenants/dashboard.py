@@ -0,0 +1,159 @@
+"""
+Single-call dashboard for the web and mobile apps.
+
+build_dashboard() runs a fixed set of aggregate and short list queries (more
+for heads, treasurers and property managers, never more per row), and
+get_dashboard() caches the result per (edir, member, edir data versions)
+together with an ETag for conditional GETs.
+"""
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count, F, Max, Q, Sum
+from django.utils import timezone
+
+from .audiences import reaching
+from .models import Event, FinancialRollup, Member, Payment, Penalty, Reminder, Resource, ResourceAllocation, Task
+
+OPEN_TASK_STATUSES = ('pending', 'in_progress')
+
+
+def _roles(edir, member):
+    is_head = edir.head_id == member.user_id
+    return {
+        'head': is_head,
+        'treasurer': is_head or member.role == 'TREASURER',
+        'property_manager': is_head or member.role == 'PROPERTY_MANAGER',
+        'coordinator': is_head or member.role == 'COORDINATOR',
+    }
+
+
+def _dues_status(edir, member, today):
+    month_start = today.replace(day=1)
+    payments = Payment.objects.filter(edir=edir, member=member).aggregate(
+        paid_this_month=Sum('amount', filter=Q(
+            payment_type='monthly', status='completed', payment_date__gte=month_start, payment_date__lte=today
+        )),
+        pending_count=Count('id', filter=Q(status='pending')),
+        pending_amount=Sum('amount', filter=Q(status='pending')),
+        last_payment_date=Max('payment_date', filter=Q(status='completed')),
+    )
+    penalties = Penalty.objects.filter(edir=edir, member=member, status='pending').aggregate(
+        count=Count('id'), amount=Sum('amount'), overdue=Count('id', filter=Q(due_date__lt=today))
+    )
+    return {
+        'period': month_start.strftime('%Y-%m'),
+        'paid_this_month': payments['paid_this_month'] is not None,
+        'paid_amount': float(payments['paid_this_month'] or 0),
+        'pending_payments': payments['pending_count'],
+        'pending_amount': float(payments['pending_amount'] or 0),
+        'last_payment_date': payments['last_payment_date'],
+        'outstanding_penalties': penalties['count'],
+        'outstanding_penalty_amount': float(penalties['amount'] or 0),
+        'overdue_penalties': penalties['overdue'],
+    }
+
+
+def build_dashboard(edir, member):
+    now = timezone.now()
+    today = now.date()
+    roles = _roles(edir, member)
+    limit = settings.DASHBOARD_LIST_SIZE
+
+    members = Member.objects.filter(edir=edir).aggregate(
+        total=Count('id'),
+        approved=Count('id', filter=Q(status='approved')),
+        pending=Count('id', filter=Q(status='pending')),
+    )
+    events = Event.objects.filter(edir=edir, is_active=True).aggregate(
+        active=Count('id'), upcoming=Count('id', filter=Q(start_date__gte=now))
+    )
+    tasks = Task.objects.filter(task_group__edir=edir, status__in=OPEN_TASK_STATUSES).aggregate(
+        open=Count('id', distinct=True),
+        mine=Count('id', filter=Q(assigned_to=member), distinct=True),
+        mine_overdue=Count('id', filter=Q(assigned_to=member, due_date__lt=now), distinct=True),
+    )
+    upcoming_reminders = Reminder.objects.filter(
+        reaching(member), edir=edir, status='pending', scheduled_time__gte=now
+    ).distinct().count()
+
+    counts = {
+        'members': members['approved'],
+        'active_events': events['active'],
+        'upcoming_events': events['upcoming'],
+        'my_open_tasks': tasks['mine'],
+        'my_overdue_tasks': tasks['mine_overdue'],
+        'upcoming_reminders': upcoming_reminders,
+    }
+    if roles['head']:
+        counts['pending_member_approvals'] = members['pending']
+    if roles['coordinator']:
+        counts['open_tasks'] = tasks['open']
+    if roles['treasurer']:
+        pending = Payment.objects.filter(edir=edir, status='pending').aggregate(count=Count('id'), amount=Sum('amount'))
+        collected = FinancialRollup.objects.filter(
+            edir=edir, kind='income', month=today.replace(day=1)
+        ).aggregate(total=Sum('total'))
+        counts['pending_payments'] = pending['count']
+        counts['pending_payment_amount'] = float(pending['amount'] or 0)
+        counts['collected_this_month'] = float(collected['total'] or 0)
+    if roles['property_manager']:
+        resources = Resource.objects.filter(edir=edir).aggregate(
+            total=Count('id'), available=Count('id', filter=Q(available=True))
+        )
+        counts['resources'] = resources['total']
+        counts['available_resources'] = resources['available']
+        counts['pending_allocations'] = ResourceAllocation.objects.filter(
+            resource__edir=edir, status='pending'
+        ).count()
+
+    upcoming_events = list(
+        Event.objects.filter(edir=edir, is_active=True, start_date__gte=now)
+        .order_by('start_date')
+        .values('id', 'title', 'event_type', 'start_date', 'location')[:limit]
+    )
+    open_tasks = list(
+        Task.objects.filter(assigned_to=member, status__in=OPEN_TASK_STATUSES)
+        .order_by('due_date')
+        .values('id', 'title', 'status', 'priority', 'due_date', 'task_group_id',
+                task_group_name=F('task_group__name'), event_id=F('task_group__event_id'))[:limit]
+    )
+
+    return {
+        'edir': {'name': edir.name, 'slug': edir.slug},
+        'member': {'id': member.id, 'full_name': member.full_name, 'role': member.role, 'status': member.status},
+        'roles': [role for role, granted in roles.items() if granted],
+        'counts': counts,
+        'dues': _dues_status(edir, member, today),
+        'upcoming_events': upcoming_events,
+        'open_tasks': open_tasks,
+        'generated_at': now,
+    }
+
+
+def dashboard_cache_key(edir, member):
+    return (
+        f"dashboard:{edir.pk}:{member.pk}:"
+        f"v{edir.data_version}.{edir.resource_version}.{edir.activity_version}"
+    )
+
+
+def get_dashboard(edir, member):
+    """
+    (data, etag) for the member's dashboard. `edir` must be freshly loaded:
+    its version counters are part of the cache key.
+    """
+    cache_key = dashboard_cache_key(edir, member)
+    cached = cache.get(cache_key)
+    if cached is None:
+        data = build_dashboard(edir, member)
+        # Leave the timestamp out so a rebuild with the same content keeps its ETag
+        content = {key: value for key, value in data.items() if key != 'generated_at'}
+        payload = json.dumps(content, sort_keys=True, cls=DjangoJSONEncoder)
+        cached = (data, f'"{hashlib.md5(payload.encode()).hexdigest()}"')
+        # A short TTL lets time-based parts (upcoming, overdue) move on
+        cache.set(cache_key, cached, settings.DASHBOARD_CACHE_SECONDS)
+    return cached
@@ -0,0 +1,99 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ImproperlyConfigured
+
+REPLICA_DB = 'replica'
+PRIMARY_DB = 'default'
+
+# Set while a reporting/list view is running so its reads go to the replica
+_replica_reads = ContextVar('replica_reads', default=False)
+# Set by the router whenever the current request writes to the primary
+_wrote_primary = ContextVar('wrote_primary', default=False)
+
+
+def replica_configured():
+    return REPLICA_DB in settings.DATABASES
+
+
+def require_shared_cache():
+    """
+    The primary pin must be seen by every worker, or a user's next request
+    may land on a process that never saw their write and read the replica.
+    """
+    if not replica_configured():
+        return
+    backend = caches['default']
+    if isinstance(backend, (LocMemCache, DummyCache)):
+        raise ImproperlyConfigured(
+            f"A read replica is configured but the default cache is {type(backend).__name__}, which "
+            "is not shared between worker processes; set CACHE_URL to a shared cache such as redis"
+        )
+
+
+def _pin_key(user_id):
+    return f"replica-pin:{user_id}"
+
+
+def pin_to_primary(user_id):
+    """Keep this user's reads on the primary for a short while after they write"""
+    cache.set(_pin_key(user_id), True, getattr(settings, 'REPLICA_STICKY_SECONDS', 15))
+
+
+def is_pinned_to_primary(user_id):
+    return bool(user_id) and bool(cache.get(_pin_key(user_id)))
+
+
+def reset_write_marker():
+    _wrote_primary.set(False)
+
+
+def wrote_to_primary():
+    return _wrote_primary.get()
+
+
+@contextmanager
+def replica_reads(user=None):
+    """
+    Route reads inside the block to the replica, unless the user has
+    written recently (read-your-writes) or no replica is configured.
+    """
+    user_id = getattr(user, 'pk', None)
+    enabled = replica_configured() and not is_pinned_to_primary(user_id)
+    token = _replica_reads.set(enabled)
+    try:
+        yield enabled
+    finally:
+        _replica_reads.reset(token)
+
+
+class PrimaryReplicaRouter:
+    """
+    Sends reads to the replica only when a view opted in via replica_reads().
+    All writes and migrations go to the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db:
+            return instance._state.db
+        if _replica_reads.get():
+            return REPLICA_DB
+        return PRIMARY_DB
+
+    def db_for_write(self, model, **hints):
+        _wrote_primary.set(True)
+        return PRIMARY_DB
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if {obj1._state.db, obj2._state.db} <= {PRIMARY_DB, REPLICA_DB}:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica is a copy of the primary (see the sync_replica command)
+        return db == PRIMARY_DB
@@ -0,0 +1,74 @@
+"""
+Event summary service used by EventReportViewSet.
+
+The attendance breakdown is one GROUP BY over the event's attendances plus
+one member count, and the financial summary is one aggregate per table, so
+building a report costs four queries regardless of how many members,
+contributions or expenses the event has.
+"""
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from .models import Attendance, Contribution, Expense, Member
+
+RSVP_STATUSES = ('attending', 'not_attending', 'maybe')
+
+
+def attendance_summary(event):
+    total_members = Member.objects.filter(edir_id=event.edir_id).count()
+
+    rsvp = dict.fromkeys(RSVP_STATUSES, 0)
+    recorded = {'present': 0, 'absent': 0}
+    rows = (
+        Attendance.objects.filter(event=event)
+        .values('status', 'actual_attendance')
+        .order_by()
+        .annotate(count=Count('id'))
+    )
+    for row in rows:
+        if row['status'] in rsvp:
+            rsvp[row['status']] += row['count']
+        if row['actual_attendance'] in recorded:
+            recorded[row['actual_attendance']] += row['count']
+
+    return {
+        'total_members': total_members,
+        **rsvp,
+        # Members with no RSVP row, or an explicit 'no_response' one
+        'no_response': total_members - sum(rsvp.values()),
+        **recorded,
+    }
+
+
+def financial_summary(event):
+    contributions = Contribution.objects.filter(event=event).aggregate(total=Sum('amount'), count=Count('id'))
+    expenses = Expense.objects.filter(event=event).aggregate(total=Sum('amount'), count=Count('id'))
+    total_contributions = contributions['total'] or 0
+    total_expenses = expenses['total'] or 0
+
+    return {
+        'total_contributions': float(total_contributions),
+        'total_expenses': float(total_expenses),
+        'balance': float(total_contributions - total_expenses),
+        'contribution_count': contributions['count'],
+        'expense_count': expenses['count'],
+    }
+
+
+def build_event_summary(event):
+    """(attendance_summary, financial_summary) for an EventReport"""
+    return attendance_summary(event), financial_summary(event)
+
+
+def is_event_closed(event):
+    if not event.is_active:
+        return True
+    end = event.end_date or event.start_date
+    return end < timezone.now()
+
+
+def regenerate_report(report):
+    """Refresh a stored report from current data"""
+    report.attendance_summary, report.financial_summary = build_event_summary(report.event)
+    report.save(update_fields=['attendance_summary', 'financial_summary', 'updated_at'])
+    return report
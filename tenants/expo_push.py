@@ -0,0 +1,187 @@
+"""
+Expo push notification client.
+
+Messages are posted in chunks of EXPO_CHUNK_SIZE (Expo's per-request limit),
+with the chunks sent concurrently over one aiohttp session and at most
+EXPO_PUSH_CONCURRENCY requests in flight. Each message gets a ticket back:
+ok tickets are kept as PushTicket rows until check_receipts() fetches their
+delivery receipts. Devices whose token Expo reports as DeviceNotRegistered,
+on a ticket or a receipt, are deleted, and so are devices that fail
+DEVICE_MAX_FAILURES pushes in a row, so no requests are wasted on them.
+"""
+import asyncio
+import logging
+from datetime import timedelta
+
+import aiohttp
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Device, PushTicket
+
+logger = logging.getLogger(__name__)
+
+EXPO_CHUNK_SIZE = 100
+EXPO_RECEIPT_CHUNK_SIZE = 1000
+
+# Expo keeps receipts for a day; tickets older than this are dropped unchecked
+RECEIPT_TTL = timedelta(hours=24)
+
+
+def _chunks(items, size):
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def _headers():
+    headers = {
+        'Accept': 'application/json',
+        'Accept-Encoding': 'gzip, deflate',
+        'Content-Type': 'application/json',
+    }
+    if settings.EXPO_ACCESS_TOKEN:
+        headers['Authorization'] = f'Bearer {settings.EXPO_ACCESS_TOKEN}'
+    return headers
+
+
+async def _post(session, semaphore, path, payload):
+    async with semaphore:
+        async with session.post(f"{settings.EXPO_API_URL}{path}", json=payload) as response:
+            body = await response.json(content_type=None)
+            if response.status != 200 or 'data' not in body:
+                raise RuntimeError(f"Expo returned {response.status}: {body.get('errors', body)}")
+            return body['data']
+
+
+async def _send_chunk(session, semaphore, chunk):
+    try:
+        tickets = await _post(session, semaphore, '/push/send', chunk)
+    except (aiohttp.ClientError, asyncio.TimeoutError, RuntimeError, ValueError) as e:
+        logger.error("Expo push request failed for %s messages: %s", len(chunk), e)
+        error = {'status': 'error', 'message': str(e), 'details': {'error': 'RequestFailed'}}
+        return [error] * len(chunk)
+    if len(tickets) != len(chunk):
+        error = {'status': 'error', 'message': 'Ticket count mismatch', 'details': {'error': 'RequestFailed'}}
+        return [error] * len(chunk)
+    return tickets
+
+
+async def _gather(chunks, send):
+    semaphore = asyncio.Semaphore(settings.EXPO_PUSH_CONCURRENCY)
+    timeout = aiohttp.ClientTimeout(total=settings.EXPO_REQUEST_TIMEOUT)
+    async with aiohttp.ClientSession(headers=_headers(), timeout=timeout) as session:
+        return await asyncio.gather(*(send(session, semaphore, chunk) for chunk in chunks))
+
+
+def send_messages(messages):
+    """
+    Post Expo push messages ({'to': token, 'title': ..., 'body': ...}) and
+    return one ticket per message, in order. A chunk whose request fails
+    gets error tickets with details.error == 'RequestFailed'.
+    """
+    if not messages:
+        return []
+    results = asyncio.run(_gather(_chunks(messages, EXPO_CHUNK_SIZE), _send_chunk))
+    return [ticket for tickets in results for ticket in tickets]
+
+
+def mark_tokens_dead(tokens):
+    """Drop the devices of tokens Expo no longer delivers to; returns how many were dropped"""
+    if not tokens:
+        return 0
+    deleted, _ = Device.objects.filter(token__in=set(tokens)).delete()
+    return deleted
+
+
+def record_failures(failed_tokens, delivered_tokens=()):
+    """
+    Count a failed push against each device in `failed_tokens`, pruning the
+    ones that reached DEVICE_MAX_FAILURES, and reset the count of devices
+    that were delivered to again.
+    """
+    with transaction.atomic():
+        if delivered_tokens:
+            Device.objects.filter(token__in=set(delivered_tokens), failure_count__gt=0).update(failure_count=0)
+        if failed_tokens:
+            Device.objects.filter(token__in=set(failed_tokens)).update(failure_count=F('failure_count') + 1)
+            Device.objects.filter(
+                token__in=set(failed_tokens), failure_count__gte=settings.DEVICE_MAX_FAILURES
+            ).delete()
+
+
+def _error_code(ticket):
+    return (ticket.get('details') or {}).get('error')
+
+
+def send_push(messages, reminder=None):
+    """
+    Send `messages` and process their tickets: ok ones are stored for the
+    receipt check, devices of DeviceNotRegistered tokens are dropped and other
+    failures counted against their device. Returns one
+    {'status': 'sent'|'failed'|'dead', 'ticket_id', 'error'} per message.
+    """
+    tickets = send_messages(messages)
+    results, pending, dead, failed = [], [], [], []
+    for message, ticket in zip(messages, tickets):
+        if ticket.get('status') == 'ok':
+            pending.append(PushTicket(ticket_id=ticket['id'], token=message['to'], reminder=reminder))
+            results.append({'status': 'sent', 'ticket_id': ticket['id'], 'error': ''})
+        elif _error_code(ticket) == 'DeviceNotRegistered':
+            dead.append(message['to'])
+            results.append({'status': 'dead', 'ticket_id': '', 'error': 'DeviceNotRegistered'})
+        else:
+            logger.warning("Expo push to %s failed: %s", message['to'], ticket.get('message'))
+            failed.append(message['to'])
+            results.append({'status': 'failed', 'ticket_id': '', 'error': ticket.get('message') or 'Push failed'})
+
+    PushTicket.objects.bulk_create(pending, batch_size=500, ignore_conflicts=True)
+    mark_tokens_dead(dead)
+    record_failures(failed, [ticket.token for ticket in pending])
+    return results
+
+
+async def _fetch_receipts(session, semaphore, ids):
+    try:
+        return await _post(session, semaphore, '/push/getReceipts', {'ids': ids})
+    except (aiohttp.ClientError, asyncio.TimeoutError, RuntimeError, ValueError) as e:
+        logger.error("Expo receipt request failed for %s tickets: %s", len(ids), e)
+        return None
+
+
+def check_receipts(min_age=None):
+    """
+    Fetch receipts for tickets at least `min_age` old (EXPO_RECEIPT_DELAY by
+    default), drop the devices of DeviceNotRegistered tokens and the tickets that
+    got a receipt or are too old to get one. Returns summary counts.
+    """
+    now = timezone.now()
+    min_age = min_age if min_age is not None else timedelta(seconds=settings.EXPO_RECEIPT_DELAY)
+    expired, _ = PushTicket.objects.filter(created_at__lt=now - RECEIPT_TTL).delete()
+    tickets = dict(PushTicket.objects.filter(created_at__lte=now - min_age).values_list('ticket_id', 'token'))
+    summary = {'checked': 0, 'ok': 0, 'dead_tokens': 0, 'errors': 0, 'expired': expired}
+    if not tickets:
+        return summary
+
+    results = asyncio.run(_gather(_chunks(list(tickets), EXPO_RECEIPT_CHUNK_SIZE), _fetch_receipts))
+    done, dead, failed = [], [], []
+    for receipts in results:
+        for ticket_id, receipt in (receipts or {}).items():
+            if ticket_id not in tickets:
+                continue
+            done.append(ticket_id)
+            if receipt.get('status') == 'ok':
+                summary['ok'] += 1
+            elif _error_code(receipt) == 'DeviceNotRegistered':
+                dead.append(tickets[ticket_id])
+            else:
+                summary['errors'] += 1
+                failed.append(tickets[ticket_id])
+                logger.warning("Expo delivery to %s failed: %s", tickets[ticket_id], receipt.get('message'))
+
+    summary['dead_tokens'] = len(dead)
+    summary['checked'] = len(done)
+    mark_tokens_dead(dead)
+    record_failures(failed)
+    PushTicket.objects.filter(ticket_id__in=done).delete()
+    return summary
@@ -0,0 +1,258 @@
+"""
+Financial report engine.
+
+Whole months inside a period are read from the FinancialRollup table; only
+partial months at either end (and event-scoped reports) fall back to raw
+rows, with one conditional-aggregate query per source table grouped by
+month. A multi-year report therefore costs O(months), not O(transactions).
+Finished report data is cached per period and per edir data version, which
+every financial write bumps.
+"""
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncMonth
+
+from .models import ArchivedPayment, Edir, Expense, FinancialRollup, Payment
+
+INCOME_TYPES = [choice for choice, _ in Payment.PAYMENT_TYPE_CHOICES]
+
+PAYMENT_AGGREGATES = {
+    'income': Sum('amount'),
+    'payment_count': Count('id'),
+    **{f"{payment_type}_income": Sum('amount', filter=Q(payment_type=payment_type)) for payment_type in INCOME_TYPES},
+}
+
+EXPENSE_AGGREGATES = {
+    'expenses': Sum('amount'),
+    'expense_count': Count('id'),
+    'event_expenses': Sum('amount', filter=Q(event__isnull=False)),
+    'operational_expenses': Sum('amount', filter=Q(event__isnull=True)),
+}
+
+
+def _monthly_rows(querysets, date_field, aggregates):
+    """Run one grouped aggregate per queryset and add the rows up by month"""
+    months = defaultdict(lambda: defaultdict(Decimal))
+    for queryset in querysets:
+        rows = (
+            queryset.annotate(month=TruncMonth(date_field))
+            .values('month')
+            .order_by('month')
+            .annotate(**aggregates)
+        )
+        for row in rows:
+            month = row.pop('month')
+            for key, value in row.items():
+                months[month][key] += value or 0
+    return months
+
+
+def _payment_months(edir, start_date, end_date, event_id=None):
+    filters = {'edir': edir, 'status': 'completed'}
+    if event_id:
+        filters['event_id'] = event_id
+    querysets = Payment.objects.period_querysets(start_date, end_date, **filters)
+    return _monthly_rows(querysets, 'payment_date', PAYMENT_AGGREGATES)
+
+
+def _expense_months(edir, start_date, end_date, event_id=None):
+    queryset = Expense.objects.filter(edir=edir, spent_date__gte=start_date, spent_date__lte=end_date)
+    if event_id:
+        queryset = queryset.filter(event_id=event_id)
+    return _monthly_rows([queryset], 'spent_date', EXPENSE_AGGREGATES)
+
+
+def _next_month(day):
+    return (day.replace(day=1) + timedelta(days=32)).replace(day=1)
+
+
+def split_period(start_date, end_date):
+    """
+    (full_months, raw_ranges): the first days of the whole calendar months
+    covered by [start_date, end_date] as a (first, last) pair or None, and
+    the leftover partial date ranges that need raw queries.
+    """
+    first_full = start_date if start_date.day == 1 else _next_month(start_date)
+    after_end = end_date + timedelta(days=1)
+    last_full = (after_end.replace(day=1) if after_end.day == 1 else end_date.replace(day=1)) - timedelta(days=1)
+    if first_full > last_full:
+        return None, [(start_date, end_date)]
+
+    raw_ranges = []
+    if start_date < first_full:
+        raw_ranges.append((start_date, first_full - timedelta(days=1)))
+    if last_full < end_date:
+        raw_ranges.append((last_full + timedelta(days=1), end_date))
+    return (first_full, last_full.replace(day=1)), raw_ranges
+
+
+def _rollup_months(edir, first_month, last_month):
+    payments = defaultdict(lambda: defaultdict(Decimal))
+    expenses = defaultdict(lambda: defaultdict(Decimal))
+    rollups = FinancialRollup.objects.filter(
+        edir=edir, month__gte=first_month, month__lte=last_month
+    ).exclude(count=0).values_list('month', 'kind', 'category', 'total', 'count')
+    for month, kind, category, total, count in rollups:
+        if kind == 'income':
+            row = payments[month]
+            row['income'] += total
+            row['payment_count'] += count
+            row[f"{category}_income"] += total
+        else:
+            row = expenses[month]
+            row['expenses'] += total
+            row['expense_count'] += count
+            row[f"{category}_expenses"] += total
+    return payments, expenses
+
+
+def _merge(target, source):
+    for month, values in source.items():
+        for key, value in values.items():
+            target[month][key] += value
+
+
+def _period_months(edir, start_date, end_date, event_id=None):
+    # Rollups are per edir only, so event-scoped reports always read raw rows
+    if event_id:
+        return (
+            _payment_months(edir, start_date, end_date, event_id),
+            _expense_months(edir, start_date, end_date, event_id),
+        )
+
+    full_months, raw_ranges = split_period(start_date, end_date)
+    payments = defaultdict(lambda: defaultdict(Decimal))
+    expenses = defaultdict(lambda: defaultdict(Decimal))
+    if full_months:
+        rolled_payments, rolled_expenses = _rollup_months(edir, *full_months)
+        _merge(payments, rolled_payments)
+        _merge(expenses, rolled_expenses)
+    for range_start, range_end in raw_ranges:
+        _merge(payments, _payment_months(edir, range_start, range_end))
+        _merge(expenses, _expense_months(edir, range_start, range_end))
+    return payments, expenses
+
+
+def compute_report_data(edir, start_date, end_date, event_id=None):
+    payments, expenses = _period_months(edir, start_date, end_date, event_id)
+
+    totals = defaultdict(Decimal)
+    months = []
+    for month in sorted(set(payments) | set(expenses)):
+        income = payments[month]['income']
+        spent = expenses[month]['expenses']
+        months.append({
+            'month': month.strftime('%Y-%m'),
+            'income': float(income),
+            'expenses': float(spent),
+            'net': float(income - spent),
+        })
+        for key, value in {**payments[month], **expenses[month]}.items():
+            totals[key] += value
+
+    return {
+        'period': {'start': start_date.isoformat(), 'end': end_date.isoformat()},
+        'income': float(totals['income']),
+        'expenses': float(totals['expenses']),
+        'net': float(totals['income'] - totals['expenses']),
+        'details': {
+            'contributions': float(totals['contribution_income']),
+            'penalties': float(totals['penalty_income']),
+            'event_expenses': float(totals['event_expenses']),
+            'operational_expenses': float(totals['operational_expenses']),
+        },
+        'income_by_type': {t: float(totals[f"{t}_income"]) for t in INCOME_TYPES},
+        'counts': {
+            'payments': int(totals['payment_count']),
+            'expenses': int(totals['expense_count']),
+        },
+        'months': months,
+    }
+
+
+def report_cache_key(edir_id, data_version, start_date, end_date, event_id=None):
+    return f"financial-report:{edir_id}:v{data_version}:{start_date}:{end_date}:{event_id or '-'}"
+
+
+def get_report_data(edir, start_date, end_date, event_id=None):
+    """Cached compute_report_data(); the key changes whenever the edir's financial data does"""
+    # Read the version fresh so a write from another process is never missed
+    data_version = Edir.objects.filter(pk=edir.pk).values_list('data_version', flat=True).first()
+    key = report_cache_key(edir.pk, data_version, start_date, end_date, event_id)
+    data = cache.get(key)
+    if data is None:
+        data = compute_report_data(edir, start_date, end_date, event_id)
+        cache.set(key, data, settings.FINANCIAL_REPORT_CACHE_SECONDS)
+    return data
+
+
+def compute_payment_summary(edir):
+    """
+    Status counts from one conditional aggregate over the live payments,
+    plus completed totals by type and by month from the rollups (which also
+    cover archived payments). Completed payments without a payment_date have
+    no month and so no rollup; they are added to the totals and by type.
+    """
+    statuses = Payment.objects.filter(edir=edir).aggregate(
+        pending_payments=Count('id', filter=Q(status='pending')),
+        pending_amount=Sum('amount', filter=Q(status='pending')),
+        failed_payments=Count('id', filter=Q(status='failed')),
+        refunded_payments=Count('id', filter=Q(status='refunded')),
+    )
+
+    by_type = defaultdict(lambda: {'count': 0, 'amount': Decimal('0')})
+    by_month = defaultdict(lambda: {'count': 0, 'amount': Decimal('0')})
+    rollups = FinancialRollup.objects.filter(edir=edir, kind='income').exclude(count=0).values_list(
+        'month', 'category', 'total', 'count'
+    )
+    for month, payment_type, total, count in rollups:
+        for bucket in (by_type[payment_type], by_month[month]):
+            bucket['count'] += count
+            bucket['amount'] += total
+    for model in (Payment, ArchivedPayment):
+        undated = (
+            model.objects.filter(edir=edir, status='completed', payment_date__isnull=True)
+            .values('payment_type').order_by().annotate(total=Sum('amount'), count=Count('id'))
+        )
+        for row in undated:
+            by_type[row['payment_type']]['count'] += row['count']
+            by_type[row['payment_type']]['amount'] += row['total']
+
+    def _plain(bucket):
+        return {'count': bucket['count'], 'amount': float(bucket['amount'])}
+
+    return {
+        'total_payments': sum(b['count'] for b in by_type.values()),
+        'total_amount': float(sum(b['amount'] for b in by_type.values())),
+        'pending_payments': statuses['pending_payments'],
+        'pending_amount': float(statuses['pending_amount'] or 0),
+        'failed_payments': statuses['failed_payments'],
+        'refunded_payments': statuses['refunded_payments'],
+        'by_type': {payment_type: _plain(b) for payment_type, b in sorted(by_type.items())},
+        'by_month': [{'month': month.strftime('%Y-%m'), **_plain(b)} for month, b in sorted(by_month.items())],
+    }
+
+
+def get_payment_summary(edir):
+    """
+    Cached compute_payment_summary(). `edir` must be freshly loaded: its
+    data_version is part of the key, and payment writes bump it.
+    """
+    key = f"payment-summary:{edir.pk}:v{edir.data_version}"
+    data = cache.get(key)
+    if data is None:
+        data = compute_payment_summary(edir)
+        cache.set(key, data, settings.FINANCIAL_REPORT_CACHE_SECONDS)
+    return data
+
+
+def default_period(report_type, today):
+    """(start, end) used when a report request does not give explicit dates"""
+    if report_type == 'annual':
+        return date(today.year, 1, 1), today
+    return today.replace(day=1), today
@@ -0,0 +1,148 @@
+"""
+Bulk email.
+
+Every recipient gets their own message, with the {{ full_name }} and
+{{ edir_name }} placeholders in the subject and body filled from the
+recipient's details, so addresses are never shared in a To: list.
+Messages go out over one reused backend connection (get_connection()),
+reopened every MAIL_BATCH_SIZE messages and after a disconnect, and paced
+to MAIL_RATE_PER_MINUTE across the whole process. Recipients whose message
+failed are retried on their own, up to MAIL_MAX_ATTEMPTS times.
+Transactional email goes through the outbox (outbox.py), which sends with
+send_bulk() too.
+"""
+import logging
+import re
+import smtplib
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+
+logger = logging.getLogger(__name__)
+
+
+class _RateLimiter:
+    """At most `per_minute` acquisitions in any 60 second window, shared by all threads"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sent = deque()
+
+    def acquire(self, per_minute):
+        if not per_minute:
+            return
+        with self._lock:
+            while True:
+                now = time.monotonic()
+                while self._sent and now - self._sent[0] >= 60:
+                    self._sent.popleft()
+                if len(self._sent) < per_minute:
+                    self._sent.append(now)
+                    return
+                time.sleep(60 - (now - self._sent[0]))
+
+
+_limiter = _RateLimiter()
+
+# The recipient details reminder text may refer to, as {{ full_name }}
+PLACEHOLDERS = ('full_name', 'edir_name')
+_PLACEHOLDER = re.compile(r'\{\{\s*(\w+)\s*\}\}')
+
+
+def render(text, context):
+    """
+    `text` with each {{ name }} placeholder for a key in PLACEHOLDERS filled
+    from `context`. The text is written by edir admins, so it is never run
+    as a template: tags, filters, attribute lookups and unknown names are
+    left as written.
+    """
+    def fill(match):
+        key = match.group(1)
+        if key not in PLACEHOLDERS or key not in context:
+            return match.group(0)
+        value = context[key]
+        return '' if value is None else str(value)
+
+    return _PLACEHOLDER.sub(fill, text)
+
+
+def build_messages(subject, body, recipients, from_email=None):
+    """
+    One EmailMessage per (address, context) in `recipients`, with `subject`
+    and `body` rendered against that recipient's context.
+    """
+    from_email = from_email or settings.DEFAULT_FROM_EMAIL
+    return [
+        EmailMessage(render(subject, context), render(body, context), from_email, [address])
+        for address, context in recipients
+    ]
+
+
+def _send_one(connection, message):
+    try:
+        return connection.send_messages([message]) == 1
+    except smtplib.SMTPServerDisconnected:
+        # The server dropped an idle or overused connection: reopen and try once more
+        connection.close()
+        connection.open()
+        return connection.send_messages([message]) == 1
+
+
+def _send_pass(messages, batch_size, rate_per_minute):
+    """Send `messages` over one connection; returns {index: error} for the ones that failed"""
+    failed = {}
+    connection = get_connection(fail_silently=False)
+    try:
+        for count, (index, message) in enumerate(messages):
+            if count and count % batch_size == 0:
+                # Stay under providers' per-connection message caps
+                connection.close()
+            _limiter.acquire(rate_per_minute)
+            try:
+                # A no-op while open; an open connection is kept across send_messages() calls
+                connection.open()
+                if not _send_one(connection, message):
+                    failed[index] = 'Not accepted by the mail backend'
+            except Exception as e:
+                logger.warning("Email to %s failed: %s", ', '.join(message.to), e)
+                failed[index] = str(e)
+    finally:
+        connection.close()
+    return failed
+
+
+def send_bulk(messages, batch_size=None, rate_per_minute=None, max_attempts=None):
+    """
+    Send `messages` (one recipient each), retrying only the failed ones.
+    Returns {'sent': count, 'failed': [addresses], 'attempts': passes made,
+    'results': [{'status': 'sent'|'failed', 'attempts', 'error'}, one per message]}.
+    """
+    batch_size = batch_size or settings.MAIL_BATCH_SIZE
+    rate_per_minute = settings.MAIL_RATE_PER_MINUTE if rate_per_minute is None else rate_per_minute
+    max_attempts = max_attempts or settings.MAIL_MAX_ATTEMPTS
+
+    results = [{'status': 'sent', 'attempts': 0, 'error': ''} for _ in messages]
+    pending = list(enumerate(messages))
+    attempts = 0
+    while pending and attempts < max_attempts:
+        if attempts:
+            time.sleep(settings.MAIL_RETRY_DELAY * attempts)
+        attempts += 1
+        for index, _ in pending:
+            results[index]['attempts'] += 1
+        failed = _send_pass(pending, batch_size, rate_per_minute)
+        for index, error in failed.items():
+            results[index].update(status='failed', error=error)
+        for index, _ in pending:
+            if index not in failed:
+                results[index].update(status='sent', error='')
+        pending = [(index, message) for index, message in pending if index in failed]
+
+    failed = [address for _, message in pending for address in message.to]
+    if failed:
+        logger.error("Email failed for %s recipients after %s attempts", len(failed), attempts)
+    return {'sent': len(messages) - len(pending), 'failed': failed, 'attempts': attempts, 'results': results}
+
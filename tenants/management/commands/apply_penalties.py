@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from tenants.models import Edir, PenaltyRule
+from tenants.penalties import apply_penalties
+
+
+class Command(BaseCommand):
+    help = "Raise late-payment and absence penalties from each edir's penalty rules"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--edir', help="Slug of a single edir (default: every edir with active rules)")
+        parser.add_argument('--dry-run', action='store_true', help="List the penalties without creating them")
+
+    def handle(self, *args, **options):
+        edirs = Edir.objects.filter(pk__in=PenaltyRule.objects.filter(is_active=True).values('edir_id'))
+        if options['edir']:
+            edirs = Edir.objects.filter(slug=options['edir'])
+            if not edirs.exists():
+                raise CommandError(f"No edir with slug '{options['edir']}'")
+
+        total = 0
+        for edir in edirs:
+            result = apply_penalties(edir, dry_run=options['dry_run'])
+            for penalty in result['penalties'] if options['dry_run'] else []:
+                self.stdout.write(
+                    f"{edir.slug} member={penalty['member_id']} {penalty['penalty_type']} "
+                    f"{penalty['amount']:.2f}: {penalty['reason']}"
+                )
+            count = len(result['penalties']) if options['dry_run'] else result['created']
+            total += count
+            self.stdout.write(f"{edir.slug}: {count} penalties, {result['capped']} skipped by caps")
+
+        verb = "would be created" if options['dry_run'] else "created"
+        self.stdout.write(self.style.SUCCESS(f"{total} penalties {verb}"))
@@ -0,0 +1,28 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from tenants.archive import archive_before
+
+
+class Command(BaseCommand):
+    help = "Move closed payments, reminders and resource allocations past the horizon into archive tables"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=settings.ARCHIVE_HORIZON_DAYS,
+            help="Archive closed records older than this many days",
+        )
+        parser.add_argument('--batch-size', type=int, default=settings.ARCHIVE_BATCH_SIZE)
+        parser.add_argument('--dry-run', action='store_true', help="Only report how many rows would move")
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now().date() - timedelta(days=options['days'])
+        results = archive_before(cutoff, batch_size=options['batch_size'], dry_run=options['dry_run'])
+
+        verb = "Would archive" if options['dry_run'] else "Archived"
+        for table, count in results.items():
+            self.stdout.write(f"{verb} {count} {table} rows dated before {cutoff}")
+        self.stdout.write(self.style.SUCCESS("Done"))
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from tenants.models import Edir
+from tenants.rollups import rebuild_rollups, rollup_differences
+
+
+class Command(BaseCommand):
+    help = "Compare monthly financial rollups against a full recompute from payments and expenses"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--edir', help="Slug of a single edir to check (default: all)")
+        parser.add_argument('--fix', action='store_true', help="Rebuild rollups for edirs that disagree")
+
+    def handle(self, *args, **options):
+        edirs = Edir.objects.all()
+        if options['edir']:
+            edirs = edirs.filter(slug=options['edir'])
+            if not edirs.exists():
+                raise CommandError(f"No edir with slug '{options['edir']}'")
+
+        mismatched = 0
+        for edir in edirs:
+            differences = rollup_differences(edir)
+            if not differences:
+                continue
+            mismatched += 1
+            for (month, kind, category), stored, expected in differences:
+                self.stdout.write(
+                    f"{edir.slug} {month:%Y-%m} {kind}/{category}: "
+                    f"rollup={stored or '-'} recomputed={expected or '-'}"
+                )
+            if options['fix']:
+                rebuild_rollups(edir)
+                self.stdout.write(f"Rebuilt rollups for {edir.slug}")
+
+        if mismatched and not options['fix']:
+            raise CommandError(f"{mismatched} edir(s) have rollups that disagree with a recompute")
+        self.stdout.write(self.style.SUCCESS("Rollups are consistent" if not mismatched else "Rollups rebuilt"))
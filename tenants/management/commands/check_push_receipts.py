@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from tenants.expo_push import check_receipts
+
+
+class Command(BaseCommand):
+    help = 'Fetch Expo delivery receipts for sent push notifications and clear unregistered tokens'
+
+    def handle(self, *args, **options):
+        summary = check_receipts()
+        self.stdout.write(self.style.SUCCESS(
+            f"Checked {summary['checked']} receipts: {summary['ok']} delivered, "
+            f"{summary['errors']} failed, {summary['dead_tokens']} tokens cleared, "
+            f"{summary['expired']} expired tickets dropped"
+        ))
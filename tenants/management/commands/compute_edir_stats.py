@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from tenants.platform_stats import compute_edir_stats
+
+
+class Command(BaseCommand):
+    help = "Recompute the per-edir and platform statistics served to superusers (run nightly)"
+
+    def handle(self, *args, **options):
+        count = compute_edir_stats()
+        self.stdout.write(self.style.SUCCESS(f"Computed stats for {count} edir(s)"))
@@ -0,0 +1,89 @@
+import asyncio
+import uuid
+
+from aiohttp import web
+from django.core.management.base import BaseCommand
+
+# Expo's limits per request
+MAX_MESSAGES = 100
+MAX_RECEIPT_IDS = 1000
+
+
+class FakeExpo:
+    """
+    Stand-in for Expo's push API. The push token decides the outcome:
+    tokens containing 'unregistered' get a DeviceNotRegistered ticket,
+    'ratelimited' a MessageRateExceeded ticket, and 'uninstalled' an ok
+    ticket whose receipt is DeviceNotRegistered. Every other token is
+    delivered. Requests are logged as (path, item count).
+    """
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.requests = []
+        # ticket id -> token it was issued for, and its receipt
+        self.tickets = {}
+        self.receipts = {}
+
+    def app(self):
+        app = web.Application()
+        app.router.add_post('/push/send', self.send)
+        app.router.add_post('/push/getReceipts', self.get_receipts)
+        return app
+
+    def _ticket(self, token):
+        if 'unregistered' in token:
+            return {'status': 'error', 'message': f'"{token}" is not a registered push notification recipient',
+                    'details': {'error': 'DeviceNotRegistered'}}
+        if 'ratelimited' in token:
+            return {'status': 'error', 'message': 'Too many messages to this device',
+                    'details': {'error': 'MessageRateExceeded'}}
+        ticket_id = str(uuid.uuid4())
+        self.tickets[ticket_id] = token
+        self.receipts[ticket_id] = (
+            {'status': 'error', 'message': 'The app was uninstalled', 'details': {'error': 'DeviceNotRegistered'}}
+            if 'uninstalled' in token else {'status': 'ok'}
+        )
+        return {'status': 'ok', 'id': ticket_id}
+
+    async def send(self, request):
+        messages = await request.json()
+        messages = messages if isinstance(messages, list) else [messages]
+        self.requests.append(('/push/send', len(messages)))
+        await asyncio.sleep(self.latency)
+        if len(messages) > MAX_MESSAGES:
+            return web.json_response({'errors': [{
+                'code': 'PUSH_TOO_MANY_NOTIFICATIONS',
+                'message': f'You are trying to send more than {MAX_MESSAGES} push notifications in one request',
+            }]}, status=400)
+        return web.json_response({'data': [self._ticket(message.get('to', '')) for message in messages]})
+
+    async def get_receipts(self, request):
+        ids = (await request.json()).get('ids', [])
+        self.requests.append(('/push/getReceipts', len(ids)))
+        await asyncio.sleep(self.latency)
+        if len(ids) > MAX_RECEIPT_IDS:
+            return web.json_response({'errors': [{'code': 'VALIDATION_ERROR', 'message': 'Too many ids'}]}, status=400)
+        # Expo leaves out ids it has no receipt for
+        return web.json_response({'data': {
+            ticket_id: self.receipts[ticket_id] for ticket_id in ids if ticket_id in self.receipts
+        }})
+
+
+class Command(BaseCommand):
+    help = (
+        "Run a stand-in for Expo's push API for local testing and push throughput runs; "
+        "point EXPO_API_URL at it"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--port', type=int, default=8027)
+        parser.add_argument('--latency', type=float, default=0.05, help="Seconds per request")
+
+    def handle(self, *args, **options):
+        fake = FakeExpo(latency=options['latency'])
+        self.stdout.write(
+            f"Fake Expo listening on http://127.0.0.1:{options['port']}; tokens containing 'unregistered', "
+            "'ratelimited' or 'uninstalled' fail"
+        )
+        web.run_app(fake.app(), host='127.0.0.1', port=options['port'], print=None)
@@ -0,0 +1,87 @@
+import asyncio
+import random
+import time
+import uuid
+
+from aiohttp import web
+from django.core.management.base import BaseCommand
+
+ERRORS = {
+    429: {'code': 20429, 'message': 'Too Many Requests', 'status': 429},
+    503: {'code': 20503, 'message': 'Service unavailable', 'status': 503},
+}
+
+
+class FakeTwilio:
+    """
+    Stand-in for Twilio's Messages API. A share of requests (`fail_rate`) is
+    answered with a 503, and `failures` maps a 'To' number to the statuses
+    (429 or 503) its first requests get before it is accepted. Numbers not in
+    E.164 form get Twilio's 21211 error. Requests are logged as
+    (account, to, monotonic time received, status answered).
+    """
+
+    def __init__(self, latency=0.0, fail_rate=0.0, failures=None, on_accept=None):
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.failures = {to: list(statuses) for to, statuses in (failures or {}).items()}
+        self.on_accept = on_accept
+        self.requests = []
+        self.sent = 0
+
+    def app(self):
+        app = web.Application()
+        app.router.add_post('/2010-04-01/Accounts/{account}/Messages.json', self.create_message)
+        return app
+
+    def _status(self, to):
+        if self.failures.get(to):
+            return self.failures[to].pop(0)
+        if random.random() < self.fail_rate:
+            return 503
+        return 201 if to.startswith('+') else 400
+
+    async def create_message(self, request):
+        form = await request.post()
+        to = form.get('To', '')
+        status = self._status(to)
+        self.requests.append((request.match_info['account'], to, time.monotonic(), status))
+        await asyncio.sleep(self.latency)
+        if status in ERRORS:
+            return web.json_response(ERRORS[status], status=status)
+        if status == 400:
+            return web.json_response({'code': 21211, 'message': "Invalid 'To' Phone Number", 'status': 400},
+                                     status=400)
+        self.sent += 1
+        if self.on_accept:
+            self.on_accept(self.sent)
+        return web.json_response({
+            'sid': f"SM{uuid.uuid4().hex}",
+            'account_sid': request.match_info['account'],
+            'to': to,
+            'from': form.get('From'),
+            'body': form.get('Body'),
+            'status': 'queued',
+        }, status=201)
+
+
+class Command(BaseCommand):
+    help = (
+        "Run a stand-in for Twilio's Messages API for local testing and SMS throughput runs; "
+        "point TWILIO_API_URL at it"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--port', type=int, default=8026)
+        parser.add_argument('--latency', type=float, default=0.05, help="Seconds per request")
+        parser.add_argument('--fail-rate', type=float, default=0.0,
+                            help="Share of requests answered with a 503, to exercise retries")
+
+    def handle(self, *args, **options):
+        def progress(sent):
+            if sent % 100 == 0:
+                self.stdout.write(f"{sent} messages accepted")
+
+        fake = FakeTwilio(latency=options['latency'], fail_rate=options['fail_rate'], on_accept=progress)
+        self.stdout.write(f"Fake Twilio listening on http://127.0.0.1:{options['port']}")
+        web.run_app(fake.app(), host='127.0.0.1', port=options['port'], print=None)
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from tenants.models import RenderedReport
+from tenants.report_rendering import render_now
+
+
+class Command(BaseCommand):
+    help = "Render queued report PDFs in this process, e.g. ones left pending by a restart"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--failed', action='store_true', help="Also retry renders that failed")
+
+    def handle(self, *args, **options):
+        statuses = ['pending', 'failed'] if options['failed'] else ['pending']
+        queued = RenderedReport.objects.filter(status__in=statuses).order_by('created_at')
+        if options['failed']:
+            queued.filter(status='failed').update(status='pending')
+
+        counts = {'ready': 0, 'failed': 0, 'stale': 0}
+        for rendered_id in list(queued.values_list('pk', flat=True)):
+            rendered = render_now(rendered_id)
+            counts[rendered.status if rendered else 'stale'] += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Rendered {counts['ready']}, failed {counts['failed']}, dropped {counts['stale']} stale"
+        ))
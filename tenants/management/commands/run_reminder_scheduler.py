@@ -0,0 +1,36 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from tenants.outbox import flush_outbox
+from tenants.reminder_dispatch import dispatch_due, flush_digests, requeue_expired
+
+
+class Command(BaseCommand):
+    help = "Queue reminders as their scheduled time comes and send due digests; several schedulers can run side by side"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Run a single pass and exit")
+        parser.add_argument('--interval', type=float, default=settings.REMINDER_SCHEDULER_INTERVAL,
+                            help="Seconds between passes")
+
+    def handle(self, *args, **options):
+        while True:
+            close_old_connections()
+            requeued = requeue_expired()
+            queued = dispatch_due()
+            digests = flush_digests()
+            # Retries and emails left behind by a sender that died
+            emails = flush_outbox()
+            if queued or requeued or digests or emails or options['once']:
+                self.stdout.write(
+                    f"Queued {queued} due reminders, requeued {requeued} with expired leases, "
+                    f"sent digests to {digests} members and {emails} outbox emails"
+                )
+            if options['once']:
+                return
+            # Keep going straight away while a backlog is being worked through
+            if queued < settings.REMINDER_SCHEDULER_BATCH:
+                time.sleep(options['interval'])
@@ -0,0 +1,32 @@
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from tenants.db_routers import PRIMARY_DB, REPLICA_DB
+
+
+class Command(BaseCommand):
+    help = "Copy the primary SQLite database onto the replica file (local replica setup)"
+
+    def handle(self, *args, **options):
+        if REPLICA_DB not in settings.DATABASES:
+            raise CommandError("No replica configured. Set REPLICA_DATABASE_NAME first.")
+
+        primary = settings.DATABASES[PRIMARY_DB]
+        replica = settings.DATABASES[REPLICA_DB]
+        for alias, conf in ((PRIMARY_DB, primary), (REPLICA_DB, replica)):
+            if conf['ENGINE'] != 'django.db.backends.sqlite3':
+                raise CommandError(f"'{alias}' is not SQLite; use the database's own replication instead.")
+
+        # The online backup API gives a consistent snapshot even while the
+        # primary is taking writes.
+        source = sqlite3.connect(str(primary['NAME']))
+        target = sqlite3.connect(str(replica['NAME']))
+        try:
+            source.backup(target)
+        finally:
+            target.close()
+            source.close()
+
+        self.stdout.write(self.style.SUCCESS(f"Replica {replica['NAME']} synced from {primary['NAME']}"))
@@ -1,5 +1,6 @@
 from tenants.models import Edir, Member
 from django.http import HttpResponseForbidden
+from tenants.db_routers import pin_to_primary, reset_write_marker, wrote_to_primary
 
 
 class EdirSlugMiddleware:
@@ -43,4 +44,22 @@ class EdirMembershipMiddleware:
                 request.member = member
             except Member.DoesNotExist:
                 return HttpResponseForbidden("You are not an approved member of this Edir")
-        return None
\ No newline at end of file
+        return None
+
+class ReplicaStickinessMiddleware:
+    """
+    Pins a user's reads to the primary database for a few seconds after any
+    request of theirs wrote to it, so reporting views served from the replica
+    never hide their own changes.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        reset_write_marker()
+        response = self.get_response(request)
+        # DRF copies the JWT-authenticated user back onto the Django request
+        user = getattr(request, 'user', None)
+        if wrote_to_primary() and user is not None and user.is_authenticated:
+            pin_to_primary(user.pk)
+        return response
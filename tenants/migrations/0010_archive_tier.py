@@ -0,0 +1,119 @@
+# Generated by Django 5.2 on 2026-10-19 13:26
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenants', '0009_member_avatar'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchiveHorizon',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('table', models.CharField(max_length=100, unique=True)),
+                ('archived_before', models.DateField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchivedResourceAllocation',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('quantity', models.PositiveIntegerField()),
+                ('requested_at', models.DateTimeField()),
+                ('start_date', models.DateTimeField()),
+                ('end_date', models.DateTimeField()),
+                ('status', models.CharField(max_length=20)),
+                ('status_changed_at', models.DateTimeField()),
+                ('calculated_cost', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('actual_cost', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('deposit_paid', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('purpose', models.TextField()),
+                ('special_requirements', models.TextField(blank=True)),
+                ('approval_notes', models.TextField(blank=True)),
+                ('rejection_reason', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField()),
+                ('approved_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='tenants.member')),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='tenants.event')),
+                ('member', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='tenants.member')),
+                ('resource', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='tenants.resource')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchivedResourceUsage',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('actual_start', models.DateTimeField(blank=True, null=True)),
+                ('actual_end', models.DateTimeField(blank=True, null=True)),
+                ('pre_use_condition', models.CharField(max_length=20)),
+                ('post_use_condition', models.CharField(max_length=20)),
+                ('condition_notes', models.TextField(blank=True)),
+                ('requested_quantity', models.PositiveIntegerField()),
+                ('returned_quantity', models.PositiveIntegerField(default=0)),
+                ('damaged_quantity', models.PositiveIntegerField(default=0)),
+                ('additional_charges', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('damage_charges', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('deposit_returned', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('usage_notes', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('allocation', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='usage', to='tenants.archivedresourceallocation')),
+                ('checked_in_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='tenants.member')),
+                ('checked_out_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='tenants.member')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchivedPayment',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('payment_type', models.CharField(max_length=20)),
+                ('payment_date', models.DateField(blank=True, null=True)),
+                ('transaction_reference', models.CharField(blank=True, max_length=100, null=True)),
+                ('status', models.CharField(max_length=20)),
+                ('verified_at', models.DateTimeField(blank=True, null=True)),
+                ('notes', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField()),
+                ('contribution', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='tenants.contribution')),
+                ('edir', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='tenants.edir')),
+                ('event', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='tenants.event')),
+                ('member', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='tenants.member')),
+                ('verified_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='tenants.member')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['edir', 'payment_date'], name='tenants_arc_edir_id_f8ee17_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedReminder',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('reminder_type', models.CharField(max_length=20)),
+                ('subject', models.CharField(max_length=200)),
+                ('message', models.TextField()),
+                ('scheduled_time', models.DateTimeField()),
+                ('status', models.CharField(max_length=10)),
+                ('channel', models.CharField(max_length=10)),
+                ('created_at', models.DateTimeField()),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('edir', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='tenants.edir')),
+                ('recipients', models.ManyToManyField(related_name='+', to='tenants.member')),
+                ('related_event', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='tenants.event')),
+                ('related_payment', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='tenants.payment')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['edir', 'scheduled_time'], name='tenants_arc_edir_id_1b2543_idx')],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='archivedresourceallocation',
+            index=models.Index(fields=['resource', 'end_date'], name='tenants_arc_resourc_25fa39_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-19 13:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenants', '0010_archive_tier'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='edir',
+            name='data_version',
+            field=models.PositiveIntegerField(default=0, help_text='Bumped on every financial write; part of report cache keys'),
+        ),
+    ]
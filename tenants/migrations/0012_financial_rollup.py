@@ -0,0 +1,69 @@
+# Generated by Django 5.2 on 2026-10-19 13:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncMonth
+
+
+def backfill_rollups(apps, schema_editor):
+    FinancialRollup = apps.get_model('tenants', 'FinancialRollup')
+    totals = {}
+
+    for model_name in ('Payment', 'ArchivedPayment'):
+        rows = (
+            apps.get_model('tenants', model_name).objects
+            .filter(status='completed', payment_date__isnull=False)
+            .annotate(month=TruncMonth('payment_date'))
+            .values('edir_id', 'month', 'payment_type')
+            .order_by()
+            .annotate(total=Sum('amount'), count=Count('id'))
+        )
+        for row in rows:
+            key = (row['edir_id'], row['month'], 'income', row['payment_type'])
+            total, count = totals.get(key, (0, 0))
+            totals[key] = (total + row['total'], count + row['count'])
+
+    rows = (
+        apps.get_model('tenants', 'Expense').objects
+        .annotate(month=TruncMonth('spent_date'))
+        .values('edir_id', 'month', 'event_id')
+        .order_by()
+        .annotate(total=Sum('amount'), count=Count('id'))
+    )
+    for row in rows:
+        key = (row['edir_id'], row['month'], 'expense', 'event' if row['event_id'] else 'operational')
+        total, count = totals.get(key, (0, 0))
+        totals[key] = (total + row['total'], count + row['count'])
+
+    FinancialRollup.objects.bulk_create([
+        FinancialRollup(edir_id=edir_id, month=month, kind=kind, category=category, total=total, count=count)
+        for (edir_id, month, kind, category), (total, count) in totals.items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenants', '0011_edir_data_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FinancialRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='First day of the month')),
+                ('kind', models.CharField(choices=[('income', 'Income'), ('expense', 'Expense')], max_length=10)),
+                ('category', models.CharField(max_length=20)),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('count', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('edir', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='financial_rollups', to='tenants.edir')),
+            ],
+            options={
+                'unique_together': {('edir', 'month', 'kind', 'category')},
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-19 13:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenants', '0012_financial_rollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='edir',
+            name='resource_version',
+            field=models.PositiveIntegerField(default=0, help_text='Bumped on resource, allocation and usage writes; part of resource report cache keys'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2 on 2026-10-19 13:34
+
+from datetime import timedelta
+
+from django.db import migrations, models
+
+
+def backfill_next_maintenance_due(apps, schema_editor):
+    Resource = apps.get_model('tenants', 'Resource')
+    resources = list(Resource.objects.filter(maintenance_frequency__isnull=False).only(
+        'last_maintenance_date', 'purchase_date', 'maintenance_frequency'
+    ))
+    for resource in resources:
+        baseline = resource.last_maintenance_date or resource.purchase_date
+        if baseline and resource.maintenance_frequency:
+            resource.next_maintenance_due = baseline + timedelta(days=resource.maintenance_frequency)
+    Resource.objects.bulk_update(resources, ['next_maintenance_due'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenants', '0013_edir_resource_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='resource',
+            name='next_maintenance_due',
+            field=models.DateField(blank=True, editable=False, help_text='Last maintenance (or purchase) date plus the maintenance frequency; kept up to date on save', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='resource',
+            index=models.Index(fields=['edir', 'next_maintenance_due'], name='tenants_res_edir_id_28f3c8_idx'),
+        ),
+        migrations.RunPython(backfill_next_maintenance_due, migrations.RunPython.noop),
+    ]
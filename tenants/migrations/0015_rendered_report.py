@@ -0,0 +1,30 @@
+# Generated by Django 5.2 on 2026-10-19 13:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenants', '0014_resource_next_maintenance_due'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RenderedReport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('event', 'Event Report'), ('financial', 'Financial Report')], max_length=20)),
+                ('report_id', models.PositiveIntegerField()),
+                ('content_hash', models.CharField(max_length=64)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('ready', 'Ready'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('pdf', models.BinaryField(blank=True, null=True)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('rendered_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'unique_together': {('kind', 'report_id', 'content_hash')},
+            },
+        ),
+    ]
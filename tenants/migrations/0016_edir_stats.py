@@ -0,0 +1,37 @@
+# Generated by Django 5.2 on 2026-10-19 13:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenants', '0015_rendered_report'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EdirStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('member_count', models.PositiveIntegerField(default=0)),
+                ('members_by_status', models.JSONField(default=dict)),
+                ('collections_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('collections_current_month', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('monthly_collections', models.JSONField(default=list, help_text='[{month, amount, count}] for the last 12 months')),
+                ('event_count', models.PositiveIntegerField(default=0)),
+                ('active_event_count', models.PositiveIntegerField(default=0)),
+                ('payments_verified', models.PositiveIntegerField(default=0)),
+                ('payments_verification_failed', models.PositiveIntegerField(default=0)),
+                ('verification_success_rate', models.FloatField(blank=True, null=True)),
+                ('active_resources', models.PositiveIntegerField(default=0)),
+                ('edir_count', models.PositiveIntegerField(default=0, help_text='Only set on the platform row')),
+                ('computed_at', models.DateTimeField()),
+                ('edir', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='stats', to='tenants.edir')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-member_count'], name='tenants_edi_member__5b498a_idx'), models.Index(fields=['-collections_total'], name='tenants_edi_collect_374fda_idx'), models.Index(fields=['-collections_current_month'], name='tenants_edi_collect_c5e093_idx'), models.Index(fields=['-event_count'], name='tenants_edi_event_c_5a0842_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-19 13:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenants', '0016_edir_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='edir',
+            name='activity_version',
+            field=models.PositiveIntegerField(default=0, help_text='Bumped on member, event, task and reminder writes; part of dashboard cache keys'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2 on 2026-10-19 13:43
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenants', '0017_edir_activity_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='penalty',
+            name='source_key',
+            field=models.CharField(blank=True, help_text="What an engine-created penalty was raised for, e.g. 'payment:12' or 'attendance:34'", max_length=64, null=True),
+        ),
+        migrations.CreateModel(
+            name='PenaltyRule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('penalty_type', models.CharField(choices=[('late_payment', 'Late Payment'), ('absence', 'Event Absence')], max_length=20)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=10, validators=[django.core.validators.MinValueValidator(0)])),
+                ('grace_days', models.PositiveIntegerField(default=0, help_text="Days after a payment's date or an event's start before a penalty is raised")),
+                ('max_outstanding', models.DecimalField(blank=True, decimal_places=2, help_text="Cap on a member's unpaid penalties of this type; leave empty for no cap", max_digits=10, null=True)),
+                ('payment_due_days', models.PositiveIntegerField(default=14, help_text='Days the member has to pay the penalty')),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('edir', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='penalty_rules', to='tenants.edir')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='penalty',
+            name='rule',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='penalties', to='tenants.penaltyrule'),
+        ),
+        migrations.AddConstraint(
+            model_name='penalty',
+            constraint=models.UniqueConstraint(fields=('edir', 'source_key'), name='unique_penalty_source'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='penaltyrule',
+            unique_together={('edir', 'penalty_type')},
+        ),
+    ]
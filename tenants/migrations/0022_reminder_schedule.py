@@ -0,0 +1,47 @@
+# Generated by Django 5.2 on 2026-10-19 13:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenants', '0021_sms_messages'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedreminder',
+            name='lease_expires_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='archivedreminder',
+            name='recurrence',
+            field=models.CharField(blank=True, default='', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='archivedreminder',
+            name='recurs_until',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='reminder',
+            name='lease_expires_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='reminder',
+            name='recurrence',
+            field=models.CharField(blank=True, choices=[('', 'Does Not Repeat'), ('daily', 'Daily'), ('weekly', 'Weekly'), ('monthly', 'Monthly')], default='', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='reminder',
+            name='recurs_until',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='reminder',
+            index=models.Index(fields=['status', 'scheduled_time'], name='tenants_rem_status_289efc_idx'),
+        ),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 5.2 on 2026-10-19 13:57
+
+import django.db.models.deletion
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import migrations, models
+
+# Frozen copies of tenants.contacts.format_phone_number and normalize_email as
+# they were when this migration was written, so later changes to those helpers
+# do not change what it does
+
+def format_phone_number(number):
+    if not number or not isinstance(number, str):
+        return None
+    digits = ''.join(filter(str.isdigit, number))
+
+    if len(digits) == 10 and digits[:2] in ('09', '07'):
+        return '+251' + digits[1:]
+    if len(digits) == 12 and digits[:4] in ('2519', '2517'):
+        return '+' + digits
+    if len(digits) == 13 and digits.startswith('2510'):
+        return '+251' + digits[4:]
+    if number.strip().startswith('+') and 8 <= len(digits) <= 15:
+        return '+' + digits
+    return None
+
+
+def normalize_email(address):
+    address = (address or '').strip()
+    try:
+        validate_email(address)
+    except ValidationError:
+        return None
+    return address
+
+
+def backfill_member_contacts(apps, schema_editor):
+    Member = apps.get_model('tenants', 'Member')
+    MemberContact = apps.get_model('tenants', 'MemberContact')
+    members = Member.objects.values_list('id', 'edir_id', 'phone_number', 'email')
+    MemberContact.objects.bulk_create([
+        MemberContact(
+            member_id=member_id,
+            edir_id=edir_id,
+            phone_number=format_phone_number(phone_number),
+            email=normalize_email(email),
+        )
+        for member_id, edir_id, phone_number, email in members.iterator(chunk_size=2000)
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenants', '0023_reminder_deliveries'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MemberContact',
+            fields=[
+                ('member', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='contact', serialize=False, to='tenants.member')),
+                ('phone_number', models.CharField(blank=True, max_length=16, null=True)),
+                ('email', models.EmailField(blank=True, max_length=254, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('edir', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='tenants.edir')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['edir', 'phone_number'], name='tenants_mem_edir_id_2bf6c5_idx'), models.Index(fields=['edir', 'email'], name='tenants_mem_edir_id_5ddd1f_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_member_contacts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.2 on 2026-10-19 14:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenants', '0025_devices'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedreminder',
+            name='audience',
+            field=models.CharField(blank=True, default='', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='archivedreminder',
+            name='audience_period',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='archivedreminder',
+            name='audience_role',
+            field=models.CharField(blank=True, default='', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='archivedreminder',
+            name='audience_task_group',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='tenants.taskgroup'),
+        ),
+        migrations.AddField(
+            model_name='reminder',
+            name='audience',
+            field=models.CharField(blank=True, choices=[('', 'Selected Members'), ('unpaid', 'Members Unpaid For A Month'), ('event_attendees', 'Event Attendees'), ('task_group', 'Task Group Members'), ('role', 'Members With A Role')], default='', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='reminder',
+            name='audience_period',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='reminder',
+            name='audience_role',
+            field=models.CharField(blank=True, choices=[('TREASURER', 'Treasurer'), ('PROPERTY_MANAGER', 'Property Manager'), ('COORDINATOR', 'Event Coordinator'), ('MEMBER', 'Regular Member')], default='', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='reminder',
+            name='audience_task_group',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='tenants.taskgroup'),
+        ),
+        migrations.AlterField(
+            model_name='reminder',
+            name='recipients',
+            field=models.ManyToManyField(blank=True, to='tenants.member'),
+        ),
+    ]
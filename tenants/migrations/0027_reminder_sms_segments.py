@@ -0,0 +1,33 @@
+# Generated by Django 5.2 on 2026-10-19 14:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenants', '0026_reminder_audiences'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedreminder',
+            name='sms_message',
+            field=models.CharField(blank=True, default='', max_length=320),
+        ),
+        migrations.AddField(
+            model_name='archivedreminder',
+            name='sms_segments',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='reminder',
+            name='sms_message',
+            field=models.CharField(blank=True, default='', max_length=320),
+        ),
+        migrations.AddField(
+            model_name='reminder',
+            name='sms_segments',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2 on 2026-10-19 14:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenants', '0027_reminder_sms_segments'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedreminder',
+            name='urgent',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='reminder',
+            name='urgent',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AlterField(
+            model_name='reminder',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('queued', 'Queued'), ('sending', 'Sending'), ('held', 'Held For Digest'), ('sent', 'Sent'), ('failed', 'Failed'), ('cancelled', 'Cancelled')], default='pending', max_length=10),
+        ),
+        migrations.AlterField(
+            model_name='reminderdelivery',
+            name='status',
+            field=models.CharField(choices=[('sent', 'Sent'), ('failed', 'Failed'), ('skipped', 'Skipped'), ('held', 'Held For Digest'), ('digesting', 'Sending In Digest')], max_length=10),
+        ),
+        migrations.AddIndex(
+            model_name='reminderdelivery',
+            index=models.Index(condition=models.Q(('status', 'held')), fields=['member', 'channel', 'updated_at'], name='reminder_delivery_held'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2 on 2026-10-19 14:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenants', '0029_email_outbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedReminderDelivery',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('channel', models.CharField(max_length=10)),
+                ('status', models.CharField(max_length=10)),
+                ('provider_id', models.CharField(blank=True, max_length=64)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('last_error', models.CharField(blank=True, max_length=500)),
+                ('updated_at', models.DateTimeField()),
+                ('member', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='tenants.member')),
+                ('reminder', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='deliveries', to='tenants.archivedreminder')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['reminder', 'channel', 'status'], name='tenants_arc_reminde_d322a5_idx')],
+            },
+        ),
+    ]
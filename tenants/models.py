@@ -1,13 +1,14 @@
 from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
 from django.utils.text import slugify
 from django.core.exceptions import ValidationError
 from django.conf import settings
 import re
+from datetime import timedelta
 from django.utils import timezone
 from django.core.validators import MinValueValidator, RegexValidator
-from tenants.utility.sms_utils import send_sms
-from twilio.rest import Client
+from dateutil.relativedelta import relativedelta
 
 class User(AbstractUser):
     pass
@@ -53,6 +54,18 @@ class Edir(models.Model):
         default=0.00,
         help_text="Current balance in ETB"
     )
+    data_version = models.PositiveIntegerField(
+        default=0,
+        help_text="Bumped on every financial write; part of report cache keys"
+    )
+    resource_version = models.PositiveIntegerField(
+        default=0,
+        help_text="Bumped on resource, allocation and usage writes; part of resource report cache keys"
+    )
+    activity_version = models.PositiveIntegerField(
+        default=0,
+        help_text="Bumped on member, event, task and reminder writes; part of dashboard cache keys"
+    )
 
     def clean(self):
         if not re.match(r'^[a-zA-Z0-9\s\-\.]+$', self.name):
@@ -89,6 +102,21 @@ class Edir(models.Model):
 
         super().save(*args, **kwargs)
 
+    @classmethod
+    def bump_data_version(cls, edir_id):
+        """Invalidate cached reports for this edir without a read-modify-write"""
+        cls.objects.filter(pk=edir_id).update(data_version=F('data_version') + 1)
+
+    @classmethod
+    def bump_resource_version(cls, **lookup):
+        """Invalidate cached resource reports for the edir matching `lookup`"""
+        cls.objects.filter(**lookup).update(resource_version=F('resource_version') + 1)
+
+    @classmethod
+    def bump_activity_version(cls, **lookup):
+        """Invalidate cached dashboards for the edir matching `lookup`"""
+        cls.objects.filter(**lookup).update(activity_version=F('activity_version') + 1)
+
     def update_balance(self, amount):
         """Helper method to safely update the balance"""
         self.current_balance = F('current_balance') + amount
@@ -243,6 +271,48 @@ class Member(models.Model):
     def is_head_or_admin(self):
         return self.is_head() or self.is_admin()
     
+class MemberContact(models.Model):
+    """A member's normalized contact details, rebuilt whenever the member is saved (see contacts.py)"""
+    member = models.OneToOneField(Member, on_delete=models.CASCADE, primary_key=True, related_name='contact')
+    edir = models.ForeignKey(Edir, on_delete=models.CASCADE, related_name='+')
+    # E.164; null when the member's number cannot be normalized
+    phone_number = models.CharField(max_length=16, null=True, blank=True)
+    # Null when the member's address does not validate
+    email = models.EmailField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['edir', 'phone_number']),
+            models.Index(fields=['edir', 'email']),
+        ]
+
+    def __str__(self):
+        return f"Contact for member {self.member_id}"
+
+
+class Device(models.Model):
+    """A phone or browser a member receives Expo push notifications on"""
+    PLATFORM_CHOICES = (
+        ('ios', 'iOS'),
+        ('android', 'Android'),
+        ('web', 'Web'),
+        ('unknown', 'Unknown'),
+    )
+
+    member = models.ForeignKey(Member, on_delete=models.CASCADE, related_name='devices')
+    platform = models.CharField(max_length=10, choices=PLATFORM_CHOICES, default='unknown')
+    # A token identifies one app install, so registering it again moves it to the new member
+    token = models.CharField(max_length=255, unique=True)
+    last_seen = models.DateTimeField(default=timezone.now)
+    # Consecutive failed pushes; the device is pruned at DEVICE_MAX_FAILURES
+    failure_count = models.PositiveSmallIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.get_platform_display()} device of member {self.member_id}"
+
+
 class Spouse(models.Model):
     member = models.OneToOneField(Member, on_delete=models.CASCADE, related_name='spouse')
     full_name = models.CharField(max_length=100)
@@ -357,6 +427,52 @@ class Contribution(models.Model):
         event_str = f" for {self.event.title}" if self.event else f" to {self.edir.name}"
         return f"{self.member.full_name} - {self.amount}{event_str}"
 
+class RollupQuerySet(models.QuerySet):
+    """
+    QuerySet for the rows FinancialRollup totals (payments and expenses).
+    Saves and deletes keep the rollups current through signals; update(),
+    bulk_update() (which runs update()) and bulk_create() send none, so they
+    adjust the rollups and invalidate cached reports themselves.
+    """
+
+    def _rollups_changed(self, before, after):
+        from .rollups import BUCKETS, apply_changes
+        bucket = BUCKETS[self.model]
+        apply_changes(
+            (bucket(before[pk]) if pk in before else None, bucket(after[pk]) if pk in after else None)
+            for pk in set(before) | set(after)
+        )
+        for edir_id in {row.edir_id for rows in (before, after) for row in rows.values()}:
+            Edir.bump_data_version(edir_id)
+
+    def update(self, **kwargs):
+        from .rollups import rows_by_pk
+        with transaction.atomic(using=self.db, savepoint=False):
+            pks = list(self.values_list('pk', flat=True))
+            before = rows_by_pk(self.model, pks)
+            updated = super().update(**kwargs)
+            self._rollups_changed(before, rows_by_pk(self.model, pks))
+        return updated
+
+    update.alters_data = True
+
+    def bulk_create(self, objs, *args, **kwargs):
+        from .rollups import rebuild_rollups
+        with transaction.atomic(using=self.db, savepoint=False):
+            objs = super().bulk_create(objs, *args, **kwargs)
+            if kwargs.get('ignore_conflicts') or kwargs.get('update_conflicts'):
+                # Which rows were written is not known, so recompute the edirs involved
+                for edir in Edir.objects.filter(pk__in={obj.edir_id for obj in objs}):
+                    rebuild_rollups(edir)
+                    Edir.bump_data_version(edir.pk)
+            else:
+                # Keyed by position, as some backends do not return the new primary keys
+                self._rollups_changed({}, dict(enumerate(objs)))
+        return objs
+
+    bulk_create.alters_data = True
+
+
 class Expense(models.Model):
     edir = models.ForeignKey(Edir, on_delete=models.CASCADE, related_name='expenses')
     event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='expenses')
@@ -369,6 +485,8 @@ class Expense(models.Model):
                                   related_name='approved_expenses')
     approved_at = models.DateTimeField(null=True, blank=True)
     
+    objects = RollupQuerySet.as_manager()
+
     def __str__(self):
         return f"{self.description} - {self.amount}"
     
@@ -442,6 +560,69 @@ class EventReport(models.Model):
         return f"Report for {self.event.title}"
     
 
+class ArchiveAwareQuerySet(models.QuerySet):
+    """
+    QuerySet for tables whose closed, aged rows are moved to an archive table
+    by the archive_records command. Period queries only touch the archive
+    when the requested range starts before the archive horizon.
+    """
+
+    def _archive_model(self):
+        return self.model._meta.apps.get_model(self.model._meta.app_label, self.model.archive_model_name)
+
+    def _period_filter(self, start=None, end=None):
+        field = self.model._meta.get_field(self.model.archive_date_field)
+        lookup = field.name
+        if isinstance(field, models.DateTimeField):
+            lookup = f"{field.name}__date"
+        bounds = {}
+        if start:
+            bounds[f"{lookup}__gte"] = start
+        if end:
+            bounds[f"{lookup}__lte"] = end
+        return bounds
+
+    def reaches_archive(self, start=None):
+        horizon = ArchiveHorizon.horizon_for(self.model)
+        return horizon is not None and (start is None or start < horizon)
+
+    def for_period(self, start=None, end=None, *args, **filters):
+        """
+        Rows in [start, end] matching the given filters, including archived
+        rows when needed. The combined result supports ordering, slicing and
+        values() but not further filtering.
+        """
+        live, *archived = self.period_querysets(start, end, *args, **filters)
+        if not archived:
+            return live
+        return live.union(*archived, all=True)
+
+    def period_querysets(self, start=None, end=None, *args, **filters):
+        """
+        The live queryset for [start, end], followed by the archived one when
+        the range reaches behind the horizon. Callers aggregate each and add
+        the results.
+        """
+        bounds = self._period_filter(start, end)
+        querysets = [self.filter(*args, **filters, **bounds)]
+        if self.reaches_archive(start):
+            querysets.append(self._archive_model().objects.filter(*args, **filters, **bounds))
+        return querysets
+
+    def aggregate_period(self, start=None, end=None, *args, aggregates=None, **filters):
+        """
+        Additive aggregates (Sum/Count) over live and, when needed, archived
+        rows in [start, end].
+        """
+        result = dict.fromkeys(aggregates)
+        for queryset in self.period_querysets(start, end, *args, **filters):
+            for key, value in queryset.aggregate(**aggregates).items():
+                if value is not None:
+                    result[key] = (result[key] or 0) + value
+        return result
+
+
+
 
 
 
@@ -491,13 +672,47 @@ class Resource(models.Model):
         blank=True, 
         help_text="Recommended maintenance frequency in days"
     )
+    next_maintenance_due = models.DateField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="Last maintenance (or purchase) date plus the maintenance frequency; kept up to date on save"
+    )
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    MAINTENANCE_FIELDS = ('last_maintenance_date', 'purchase_date', 'maintenance_frequency')
+
+    class Meta:
+        indexes = [models.Index(fields=['edir', 'next_maintenance_due'])]
+
     def __str__(self):
         return f"{self.name} ({self.edir.name})"
 
+    def compute_next_maintenance_due(self):
+        baseline = self.last_maintenance_date or self.purchase_date
+        if not (baseline and self.maintenance_frequency):
+            return None
+        return baseline + timedelta(days=self.maintenance_frequency)
+
+    def save(self, *args, **kwargs):
+        """Keep next_maintenance_due in step with the maintenance fields"""
+        self.next_maintenance_due = self.compute_next_maintenance_due()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and set(update_fields) & set(self.MAINTENANCE_FIELDS):
+            kwargs['update_fields'] = {*update_fields, 'next_maintenance_due'}
+        super().save(*args, **kwargs)
+
+    def log_maintenance(self, performed_on=None, condition=None):
+        """Record maintenance done on `performed_on` (default today), which moves the next due date"""
+        self.last_maintenance_date = performed_on or timezone.now().date()
+        fields = ['last_maintenance_date', 'updated_at']
+        if condition:
+            self.condition = condition
+            fields.append('condition')
+        self.save(update_fields=fields)
+
     @property
     def current_value(self):
         """Calculate depreciated value based on purchase date and lifespan"""
@@ -515,6 +730,10 @@ class Resource(models.Model):
 
 
 class ResourceAllocation(models.Model):
+    archive_model_name = 'ArchivedResourceAllocation'
+    archive_date_field = 'end_date'
+    CLOSED_STATUSES = ('returned', 'rejected', 'cancelled')
+
     STATUS_CHOICES = [
         ('pending', 'Pending'),
         ('approved', 'Approved'),
@@ -558,13 +777,14 @@ class ResourceAllocation(models.Model):
     
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = ArchiveAwareQuerySet.as_manager()
+
     def __str__(self):
         return f"{self.resource.name} for {self.event.title}"
 
     def save(self, *args, **kwargs):
         """Calculate cost when saving"""
         if self.resource.rental_price_per_day and self.start_date and self.end_date:
-            from datetime import timedelta
             rental_days = (self.end_date - self.start_date).days + 1
             self.calculated_cost = self.resource.rental_price_per_day * rental_days * self.quantity
         super().save(*args, **kwargs)
@@ -650,7 +870,15 @@ class ResourceUsage(models.Model):
     
 
 
+class PaymentQuerySet(RollupQuerySet, ArchiveAwareQuerySet):
+    pass
+
+
 class Payment(models.Model):
+    archive_model_name = 'ArchivedPayment'
+    archive_date_field = 'payment_date'
+    CLOSED_STATUSES = ('completed', 'failed', 'refunded')
+
     PAYMENT_TYPE_CHOICES = [
         ('contribution', 'Event Contribution'),
         ('monthly', 'Monthly Fee'),
@@ -682,6 +910,8 @@ class Payment(models.Model):
     # Link to related objects
     contribution = models.OneToOneField(Contribution, on_delete=models.SET_NULL, null=True, blank=True)
     event = models.ForeignKey(Event, on_delete=models.SET_NULL, null=True, blank=True)
+
+    objects = PaymentQuerySet.as_manager()
     
     def __str__(self):
         return f"{self.member.full_name} - {self.amount} ({self.get_payment_type_display()})"
@@ -709,18 +939,68 @@ class Penalty(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     payment = models.OneToOneField(Payment, on_delete=models.SET_NULL, null=True, blank=True)
     created_by = models.ForeignKey(Member, on_delete=models.SET_NULL, null=True, related_name='created_penalties')
+    rule = models.ForeignKey('PenaltyRule', on_delete=models.SET_NULL, null=True, blank=True, related_name='penalties')
+    source_key = models.CharField(
+        max_length=64,
+        null=True,
+        blank=True,
+        help_text="What an engine-created penalty was raised for, e.g. 'payment:12' or 'attendance:34'"
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            # One engine penalty per source; hand-made penalties have no key
+            models.UniqueConstraint(fields=['edir', 'source_key'], name='unique_penalty_source'),
+        ]
     
     def __str__(self):
         return f"{self.member.full_name} - {self.amount} ({self.get_penalty_type_display()})"
 
+
+class PenaltyRule(models.Model):
+    """Per-edir settings the penalty engine applies to late payments and event absences"""
+    PENALTY_TYPE_CHOICES = [
+        ('late_payment', 'Late Payment'),
+        ('absence', 'Event Absence'),
+    ]
+
+    edir = models.ForeignKey(Edir, on_delete=models.CASCADE, related_name='penalty_rules')
+    penalty_type = models.CharField(max_length=20, choices=PENALTY_TYPE_CHOICES)
+    amount = models.DecimalField(max_digits=10, decimal_places=2, validators=[MinValueValidator(0)])
+    grace_days = models.PositiveIntegerField(
+        default=0,
+        help_text="Days after a payment's date or an event's start before a penalty is raised"
+    )
+    max_outstanding = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        null=True,
+        blank=True,
+        help_text="Cap on a member's unpaid penalties of this type; leave empty for no cap"
+    )
+    payment_due_days = models.PositiveIntegerField(default=14, help_text="Days the member has to pay the penalty")
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('edir', 'penalty_type')
+
+    def __str__(self):
+        return f"{self.get_penalty_type_display()} rule for {self.edir.name}"
+
 from django.db import models
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
 
 class Reminder(models.Model):
+    archive_model_name = 'ArchivedReminder'
+    archive_date_field = 'scheduled_time'
+    CLOSED_STATUSES = ('sent', 'failed', 'cancelled')
+
     REMINDER_TYPES = (
         ('payment_due', 'Payment Due'),
         ('event_reminder', 'Event Reminder'),
@@ -730,6 +1010,10 @@ class Reminder(models.Model):
     
     STATUS_CHOICES = (
         ('pending', 'Pending'),
+        ('queued', 'Queued'),
+        ('sending', 'Sending'),
+        # Dispatched, with deliveries waiting for their members' digests
+        ('held', 'Held For Digest'),
         ('sent', 'Sent'),
         ('failed', 'Failed'),
         ('cancelled', 'Cancelled'),
@@ -742,6 +1026,21 @@ class Reminder(models.Model):
         ('all', 'All Channels'),
     )
 
+    RECURRENCE_CHOICES = (
+        ('', 'Does Not Repeat'),
+        ('daily', 'Daily'),
+        ('weekly', 'Weekly'),
+        ('monthly', 'Monthly'),
+    )
+
+    AUDIENCE_CHOICES = (
+        ('', 'Selected Members'),
+        ('unpaid', 'Members Unpaid For A Month'),
+        ('event_attendees', 'Event Attendees'),
+        ('task_group', 'Task Group Members'),
+        ('role', 'Members With A Role'),
+    )
+
     edir = models.ForeignKey('Edir', on_delete=models.CASCADE)
     reminder_type = models.CharField(max_length=20, choices=REMINDER_TYPES)
     subject = models.CharField(max_length=200)
@@ -754,125 +1053,63 @@ class Reminder(models.Model):
     related_event = models.ForeignKey('Event', on_delete=models.SET_NULL, null=True, blank=True)
     related_payment = models.ForeignKey('Payment', on_delete=models.SET_NULL, null=True, blank=True)
     created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
-    recipients = models.ManyToManyField('Member')
+    # Used when no audience is set; an audience is resolved to members only at dispatch
+    recipients = models.ManyToManyField('Member', blank=True)
+    audience = models.CharField(max_length=20, choices=AUDIENCE_CHOICES, blank=True, default='')
+    # 'unpaid': first day of the month; empty for the month of the scheduled time
+    audience_period = models.DateField(null=True, blank=True)
+    audience_role = models.CharField(max_length=20, choices=Member.ROLE_CHOICES, blank=True, default='')
+    audience_task_group = models.ForeignKey('TaskGroup', on_delete=models.SET_NULL, null=True, blank=True,
+                                            related_name='+')
+    # Urgent reminders are never held for a digest
+    urgent = models.BooleanField(default=False)
+    # Shorter text for SMS, used when the message would take more than SMS_SEGMENT_BUDGET segments
+    sms_message = models.CharField(max_length=320, blank=True, default='')
+    # SMS segments billed for this reminder so far, counted as messages are sent
+    sms_segments = models.PositiveIntegerField(default=0, editable=False)
+    # {channel: {'status': 'pending'|'sent'|'failed', 'error', 'sent', 'failed', 'skipped'}}: per-channel state
+    # and delivery counts kept up to date by the dispatcher, so totals never scan ReminderDelivery
+    channel_progress = models.JSONField(default=dict, blank=True, editable=False)
+    dispatch_started_at = models.DateTimeField(null=True, blank=True, editable=False)
+    # Recurring reminders get their next occurrence queued when this one is dispatched
+    recurrence = models.CharField(max_length=10, choices=RECURRENCE_CHOICES, blank=True, default='')
+    recurs_until = models.DateTimeField(null=True, blank=True)
+    # Held while queued or sending; a dispatch still unfinished after it is presumed dead
+    lease_expires_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    objects = ArchiveAwareQuerySet.as_manager()
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'scheduled_time'])]
 
     def __str__(self):
         return f"{self.get_reminder_type_display()} - {self.subject}"
 
-
-    def format_phone_number(self, number):
+    def next_scheduled_time(self, after=None):
         """
-        Format phone number to E.164 format for Twilio.
-        Basic formatter, consider using a library like 'phonenumbers' for robustness.
+        When the next occurrence is due: the first step of the recurrence
+        after `after` (default: this one), or None if it does not repeat or
+        the series has ended. Monthly dates past the 28th clamp to the end of
+        shorter months.
         """
-        if not number or not isinstance(number, str):
-            return None # Or raise ValueError
-
-        cleaned_number = ''.join(filter(str.isdigit, number))
-        
-        # Ethiopian specific formats (example)
-        if cleaned_number.startswith('09') and len(cleaned_number) == 10: # e.g. 0911123456
-            return '+251' + cleaned_number[1:]
-        elif cleaned_number.startswith('25109') and len(cleaned_number) == 13: # e.g. 2510911123456 (less common)
-             return '+251' + cleaned_number[3:]
-        elif cleaned_number.startswith('2519') and len(cleaned_number) == 12: # e.g. 251911123456
-            return '+' + cleaned_number
-        elif cleaned_number.startswith('+2519') and len(cleaned_number) == 13: # e.g. +251911123456
-            return cleaned_number
-        
-        # Generic international number already in E.164
-        if number.startswith('+') and len(cleaned_number) > 1: # Check if original number (not cleaned) starts with +
-             # This check could be more robust, e.g. using a regex or phonenumbers lib
-            # If the original `number` (not `cleaned_number`) starts with `+`, it might already be E.164
-            temp_cleaned_original = ''.join(filter(lambda char: char.isdigit() or char == '+', number))
-            if temp_cleaned_original.startswith('+') and len(temp_cleaned_original) > 7: # basic E.164 check
-                return temp_cleaned_original
-        
-        # Fallback or other country logic (can be risky without more context)
-        # The original global function had: `return '+' + cleaned_number` as a default.
-        # This is dangerous if cleaned_number doesn't include a country code.
-        # For safety, return None or raise error if format is unknown and not prefixed.
-        print(f"Warning: Phone number '{number}' could not be reliably formatted to E.164. Skipping.")
-        return None
-
+        if not self.recurrence:
+            return None
+        step = {
+            'daily': relativedelta(days=1),
+            'weekly': relativedelta(weeks=1),
+            'monthly': relativedelta(months=1),
+        }[self.recurrence]
+        after = after or self.scheduled_time
+        occurrences = 1
+        next_time = self.scheduled_time + step
+        # Skip occurrences missed while nothing was running
+        while next_time <= after:
+            occurrences += 1
+            next_time = self.scheduled_time + step * occurrences
+        if self.recurs_until and next_time > self.recurs_until:
+            return None
+        return next_time
 
-    def send_sms(self):
-        # This method now contains the Twilio sending logic.
-        
-        # Ensure recipients are queried once
-        recipient_phone_numbers = [m.phone_number for m in self.recipients.all() if m.phone_number and m.phone_number.strip()]
-        
-        if not recipient_phone_numbers:
-            self.status = 'failed'
-            # Optionally log: "No valid phone numbers for recipients."
-            self.save(update_fields=['status'])
-            return False
-        
-        # Check for Twilio settings
-        if not all([
-            getattr(settings, 'TWILIO_ACCOUNT_SID', None), 
-            getattr(settings, 'TWILIO_AUTH_TOKEN', None), 
-            getattr(settings, 'TWILIO_PHONE_NUMBER', None)
-        ]):
-            print("Error: Twilio settings (TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN, TWILIO_PHONE_NUMBER) are not configured.")
-            self.status = 'failed'
-            # Optionally log: "Twilio settings missing."
-            self.save(update_fields=['status'])
-            return False
-
-        try:
-            client = Client(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN)
-        except Exception as e:
-            print(f"Failed to initialize Twilio client: {str(e)}")
-            self.status = 'failed'
-            self.save(update_fields=['status'])
-            return False
-            
-        all_messages_sent_successfully = True
-        any_message_attempted = False
-        message_body = f"{self.subject}: {self.message}"
-
-        for raw_number in recipient_phone_numbers:
-            formatted_number = None # ensure it's defined for logging in except block
-            try:
-                formatted_number = self.format_phone_number(raw_number)
-                if not formatted_number:
-                    print(f"Skipping SMS to {raw_number} due to invalid/unformattable number.")
-                    all_messages_sent_successfully = False
-                    continue
-
-                any_message_attempted = True
-                twilio_message_instance = client.messages.create(
-                    body=message_body,
-                    from_=settings.TWILIO_PHONE_NUMBER,
-                    to=formatted_number
-                )
-                print(f"Sent SMS to {formatted_number}, SID: {twilio_message_instance.sid}")
-            
-            except Exception as e: 
-                print(f"Failed to send SMS to {raw_number} (formatted: {formatted_number}): {str(e)}")
-                all_messages_sent_successfully = False
-        
-        if not any_message_attempted and recipient_phone_numbers:
-            # All numbers failed formatting or were invalid
-            self.status = 'failed'
-            # Optionally log: "All recipient phone numbers were invalid/unformattable."
-            self.save(update_fields=['status'])
-            return False
-
-        if all_messages_sent_successfully:
-            self.status = 'sent'
-            self.sent_at = timezone.now()
-            self.save(update_fields=['status', 'sent_at'])
-            return True
-        else:
-          
-            self.status = 'failed' 
-            
-            self.sent_at = timezone.now() # Record time of attempt even if partial/failed
-            self.save(update_fields=['status', 'sent_at'])
-            return False # Indicates not all were successful
-            
 
 class FinancialReport(models.Model):
     REPORT_TYPE_CHOICES = [
@@ -894,6 +1131,38 @@ class FinancialReport(models.Model):
     
     def __str__(self):
         return f"{self.title} - {self.edir.name}"
+
+
+class RenderedReport(models.Model):
+    """
+    PDF output of an EventReport or FinancialReport, keyed by the report and
+    a hash of the content it was drawn from. A changed report gets a new
+    hash, and so a new row; the old one is dropped once the new one is ready.
+    """
+    KIND_CHOICES = [
+        ('event', 'Event Report'),
+        ('financial', 'Financial Report'),
+    ]
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('ready', 'Ready'),
+        ('failed', 'Failed'),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    report_id = models.PositiveIntegerField()
+    content_hash = models.CharField(max_length=64)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    pdf = models.BinaryField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    rendered_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        unique_together = ('kind', 'report_id', 'content_hash')
+
+    def __str__(self):
+        return f"{self.kind} report {self.report_id} ({self.status})"
     
     
     
@@ -982,4 +1251,307 @@ class Memorial(models.Model):
     photo = models.ImageField(upload_to='memorial_photos/', null=True, blank=True)
     
     def __str__(self):
-        return f"In Memory of {self.member.full_name}"
\ No newline at end of file
+        return f"In Memory of {self.member.full_name}"
+
+class ArchiveHorizon(models.Model):
+    """
+    Records, per live table, the date before which closed rows have been
+    moved to its archive table. Queries over earlier periods consult both.
+    """
+    table = models.CharField(max_length=100, unique=True)
+    archived_before = models.DateField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.table} archived before {self.archived_before}"
+
+    @classmethod
+    def horizon_for(cls, model):
+        return cls.objects.filter(table=model._meta.label).values_list('archived_before', flat=True).first()
+
+    @classmethod
+    def advance(cls, model, cutoff):
+        horizon, created = cls.objects.get_or_create(table=model._meta.label, defaults={'archived_before': cutoff})
+        if not created and cutoff > horizon.archived_before:
+            horizon.archived_before = cutoff
+            horizon.save(update_fields=['archived_before', 'updated_at'])
+        return horizon
+
+
+# Archive tables mirror the live tables' columns (same names, same order, same
+# ids) so live and archived rows can be combined with union().
+
+class ArchivedPayment(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    member = models.ForeignKey(Member, on_delete=models.CASCADE, related_name='+')
+    edir = models.ForeignKey(Edir, on_delete=models.CASCADE, related_name='+')
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    payment_type = models.CharField(max_length=20)
+    payment_date = models.DateField(blank=True, null=True)
+    transaction_reference = models.CharField(max_length=100, blank=True, null=True)
+    status = models.CharField(max_length=20)
+    verified_by = models.ForeignKey(Member, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    verified_at = models.DateTimeField(null=True, blank=True)
+    notes = models.TextField(blank=True)
+    created_at = models.DateTimeField()
+    contribution = models.ForeignKey(Contribution, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    event = models.ForeignKey(Event, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+
+    class Meta:
+        indexes = [models.Index(fields=['edir', 'payment_date'])]
+
+    def __str__(self):
+        return f"Archived payment {self.id} - {self.amount}"
+
+
+class PushTicket(models.Model):
+    """An Expo push ticket whose delivery receipt has not been checked yet"""
+    ticket_id = models.CharField(max_length=64, unique=True)
+    token = models.CharField(max_length=255)
+    reminder = models.ForeignKey(Reminder, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"Push ticket {self.ticket_id}"
+
+
+class ReminderDelivery(models.Model):
+    """Outcome of one reminder for one member on one channel"""
+    CHANNEL_CHOICES = (
+        ('email', 'Email'),
+        ('sms', 'SMS'),
+        ('push', 'Push Notification'),
+    )
+
+    STATUS_CHOICES = (
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+        # No usable address on this channel (no email, invalid number, no push token)
+        ('skipped', 'Skipped'),
+        # Waiting to go out in the member's digest for this channel, and being sent in one
+        ('held', 'Held For Digest'),
+        ('digesting', 'Sending In Digest'),
+    )
+
+    reminder = models.ForeignKey(Reminder, on_delete=models.CASCADE, related_name='deliveries')
+    member = models.ForeignKey(Member, on_delete=models.CASCADE, related_name='+')
+    channel = models.CharField(max_length=10, choices=CHANNEL_CHOICES)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES)
+    # Twilio message SID or Expo ticket id
+    provider_id = models.CharField(max_length=64, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.CharField(max_length=500, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['reminder', 'member', 'channel'], name='unique_reminder_delivery'),
+        ]
+        indexes = [
+            models.Index(fields=['reminder', 'channel', 'status']),
+            # Held deliveries are few, and the digest flush only ever looks for those
+            models.Index(fields=['member', 'channel', 'updated_at'], condition=models.Q(status='held'),
+                         name='reminder_delivery_held'),
+        ]
+
+    def __str__(self):
+        return f"{self.reminder_id} to member {self.member_id} by {self.channel}: {self.status}"
+
+
+class OutboxEmail(models.Model):
+    """An email written in the same transaction as the change it is about, sent after commit"""
+    STATUS_CHOICES = (
+        ('pending', 'Pending'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        # Gave up after EMAIL_OUTBOX_MAX_ATTEMPTS
+        ('failed', 'Failed'),
+    )
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=254)
+    to = models.JSONField(default=list)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.CharField(max_length=500, blank=True)
+    # When a pending email may next be tried, or when a sending one's claim runs out
+    available_at = models.DateTimeField(default=timezone.now)
+    # Set by the dispatcher that claimed the email for sending
+    claim_id = models.CharField(max_length=32, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'available_at'])]
+
+    def __str__(self):
+        return f"{self.subject} to {', '.join(self.to)}: {self.status}"
+
+
+class ArchivedReminder(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    edir = models.ForeignKey(Edir, on_delete=models.CASCADE, related_name='+')
+    reminder_type = models.CharField(max_length=20)
+    subject = models.CharField(max_length=200)
+    message = models.TextField()
+    scheduled_time = models.DateTimeField()
+    status = models.CharField(max_length=10)
+    channel = models.CharField(max_length=10)
+    created_at = models.DateTimeField()
+    sent_at = models.DateTimeField(null=True, blank=True)
+    related_event = models.ForeignKey(Event, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    # The payment may itself be archived later, so keep the id without a constraint
+    related_payment = models.ForeignKey(Payment, on_delete=models.DO_NOTHING, db_constraint=False,
+                                        null=True, blank=True, related_name='+')
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    recipients = models.ManyToManyField(Member, related_name='+')
+    audience = models.CharField(max_length=20, blank=True, default='')
+    audience_period = models.DateField(null=True, blank=True)
+    audience_role = models.CharField(max_length=20, blank=True, default='')
+    audience_task_group = models.ForeignKey(TaskGroup, on_delete=models.SET_NULL, null=True, blank=True,
+                                            related_name='+')
+    urgent = models.BooleanField(default=False)
+    sms_message = models.CharField(max_length=320, blank=True, default='')
+    sms_segments = models.PositiveIntegerField(default=0)
+    channel_progress = models.JSONField(default=dict, blank=True)
+    dispatch_started_at = models.DateTimeField(null=True, blank=True)
+    recurrence = models.CharField(max_length=10, blank=True, default='')
+    recurs_until = models.DateTimeField(null=True, blank=True)
+    lease_expires_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['edir', 'scheduled_time'])]
+
+    def __str__(self):
+        return f"Archived reminder {self.id} - {self.subject}"
+
+
+class ArchivedReminderDelivery(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    reminder = models.ForeignKey(ArchivedReminder, on_delete=models.CASCADE, related_name='deliveries')
+    member = models.ForeignKey(Member, on_delete=models.CASCADE, related_name='+')
+    channel = models.CharField(max_length=10)
+    status = models.CharField(max_length=10)
+    provider_id = models.CharField(max_length=64, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.CharField(max_length=500, blank=True)
+    updated_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [models.Index(fields=['reminder', 'channel', 'status'])]
+
+    def __str__(self):
+        return f"Archived delivery of reminder {self.reminder_id} to member {self.member_id} by {self.channel}"
+
+
+class ArchivedResourceAllocation(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    resource = models.ForeignKey(Resource, on_delete=models.CASCADE, related_name='+')
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='+')
+    member = models.ForeignKey(Member, on_delete=models.CASCADE, related_name='+')
+    quantity = models.PositiveIntegerField()
+    requested_at = models.DateTimeField()
+    start_date = models.DateTimeField()
+    end_date = models.DateTimeField()
+    status = models.CharField(max_length=20)
+    status_changed_at = models.DateTimeField()
+    calculated_cost = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    actual_cost = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    deposit_paid = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    purpose = models.TextField()
+    special_requirements = models.TextField(blank=True)
+    approved_by = models.ForeignKey(Member, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    approval_notes = models.TextField(blank=True)
+    rejection_reason = models.TextField(blank=True)
+    created_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [models.Index(fields=['resource', 'end_date'])]
+
+    def __str__(self):
+        return f"Archived allocation {self.id}"
+
+
+class ArchivedResourceUsage(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    allocation = models.OneToOneField(ArchivedResourceAllocation, on_delete=models.CASCADE, related_name='usage')
+    actual_start = models.DateTimeField(null=True, blank=True)
+    actual_end = models.DateTimeField(null=True, blank=True)
+    pre_use_condition = models.CharField(max_length=20)
+    post_use_condition = models.CharField(max_length=20)
+    condition_notes = models.TextField(blank=True)
+    requested_quantity = models.PositiveIntegerField()
+    returned_quantity = models.PositiveIntegerField(default=0)
+    damaged_quantity = models.PositiveIntegerField(default=0)
+    additional_charges = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    damage_charges = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    deposit_returned = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    checked_out_by = models.ForeignKey(Member, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    checked_in_by = models.ForeignKey(Member, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    usage_notes = models.TextField(blank=True)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"Archived usage record {self.id}"
+
+
+class FinancialRollup(models.Model):
+    """
+    Running totals per edir, month and category, kept current on Payment and
+    Expense writes by signals and RollupQuerySet (see tenants/rollups.py). Income rows count
+    completed payments by payment_type; expense rows split event and
+    operational spending.
+    """
+    KIND_CHOICES = [
+        ('income', 'Income'),
+        ('expense', 'Expense'),
+    ]
+
+    edir = models.ForeignKey(Edir, on_delete=models.CASCADE, related_name='financial_rollups')
+    month = models.DateField(help_text="First day of the month")
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    category = models.CharField(max_length=20)
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    count = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('edir', 'month', 'kind', 'category')
+
+    def __str__(self):
+        return f"{self.edir.name} {self.month:%Y-%m} {self.kind}/{self.category}: {self.total}"
+
+
+class EdirStats(models.Model):
+    """
+    Per-edir statistics written by the compute_edir_stats job, so the
+    platform overview never has to scan the live tables. The row with no
+    edir holds the platform-wide totals.
+    """
+    edir = models.OneToOneField(Edir, on_delete=models.CASCADE, null=True, blank=True, related_name='stats')
+    member_count = models.PositiveIntegerField(default=0)
+    members_by_status = models.JSONField(default=dict)
+    collections_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    collections_current_month = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    monthly_collections = models.JSONField(default=list, help_text="[{month, amount, count}] for the last 12 months")
+    event_count = models.PositiveIntegerField(default=0)
+    active_event_count = models.PositiveIntegerField(default=0)
+    payments_verified = models.PositiveIntegerField(default=0)
+    payments_verification_failed = models.PositiveIntegerField(default=0)
+    verification_success_rate = models.FloatField(null=True, blank=True)
+    active_resources = models.PositiveIntegerField(default=0)
+    edir_count = models.PositiveIntegerField(default=0, help_text="Only set on the platform row")
+    computed_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-member_count']),
+            models.Index(fields=['-collections_total']),
+            models.Index(fields=['-collections_current_month']),
+            models.Index(fields=['-event_count']),
+        ]
+
+    def __str__(self):
+        return f"Stats for {self.edir.name if self.edir_id else 'the platform'}"
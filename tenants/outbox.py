@@ -0,0 +1,131 @@
+"""
+Transactional email outbox.
+
+enqueue_email() writes the email as an OutboxEmail row inside the caller's
+transaction, so it is kept only if the change it is about commits, and no
+mail server is contacted while the transaction holds its locks. Once the
+transaction commits, flush_outbox() is run on a background thread
+(EMAIL_OUTBOX_BACKEND = 'thread'), by a Celery worker ('celery') or straight
+away ('inline'). It claims due emails EMAIL_OUTBOX_BATCH at a time with a
+conditional update and sends each batch over one connection
+(mailer.send_bulk). Failed emails are tried again with back-off, up to
+EMAIL_OUTBOX_MAX_ATTEMPTS times. The reminder scheduler also flushes on
+every pass, picking up retries and emails whose sender died.
+"""
+import logging
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from . import mailer
+from .models import OutboxEmail
+
+logger = logging.getLogger(__name__)
+
+# Sent emails are kept this long for reference before they are deleted
+SENT_RETENTION = timedelta(days=7)
+
+_executor = None
+
+
+def enqueue_email(subject, body, to, from_email=None):
+    """Queue an email to send once the current transaction commits"""
+    email = OutboxEmail.objects.create(
+        subject=subject,
+        body=body,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        to=list(to),
+    )
+    transaction.on_commit(_submit)
+    return email
+
+
+def _claim(now):
+    """Mark up to EMAIL_OUTBOX_BATCH due emails as being sent by this call; returns them"""
+    ids = list(
+        OutboxEmail.objects.filter(status='pending', available_at__lte=now)
+        .order_by('pk').values_list('pk', flat=True)[:settings.EMAIL_OUTBOX_BATCH]
+    )
+    if not ids:
+        return []
+    claim_id = uuid.uuid4().hex
+    # Only pending rows are claimed, so concurrent flushes never send an email twice
+    OutboxEmail.objects.filter(pk__in=ids, status='pending').update(
+        status='sending',
+        claim_id=claim_id,
+        available_at=now + timedelta(seconds=settings.REMINDER_LEASE_SECONDS),
+    )
+    return list(OutboxEmail.objects.filter(status='sending', claim_id=claim_id).order_by('pk'))
+
+
+def _send_batch(emails, now):
+    result = mailer.send_bulk(
+        [EmailMessage(email.subject, email.body, email.from_email, email.to) for email in emails],
+        max_attempts=1,
+    )
+    for email, outcome in zip(emails, result['results']):
+        email.attempts += 1
+        email.claim_id = ''
+        if outcome['status'] == 'sent':
+            email.status, email.sent_at, email.last_error = 'sent', now, ''
+        else:
+            email.last_error = outcome['error'][:500]
+            if email.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+                email.status = 'failed'
+                logger.error("Giving up on email %s to %s: %s", email.pk, ', '.join(email.to), email.last_error)
+            else:
+                email.status = 'pending'
+                email.available_at = now + timedelta(seconds=settings.MAIL_RETRY_DELAY * 2 ** (email.attempts - 1))
+    OutboxEmail.objects.bulk_update(
+        emails, ['status', 'attempts', 'last_error', 'available_at', 'claim_id', 'sent_at'], batch_size=500
+    )
+    return result['sent']
+
+
+def flush_outbox(now=None):
+    """Send every due email, a batch at a time; returns how many were sent"""
+    now = now or timezone.now()
+    # Emails claimed by a sender that died go back to pending
+    OutboxEmail.objects.filter(status='sending', available_at__lt=now).update(status='pending', claim_id='')
+    OutboxEmail.objects.filter(status='sent', sent_at__lt=now - SENT_RETENTION).delete()
+
+    sent = 0
+    while True:
+        emails = _claim(now)
+        if not emails:
+            return sent
+        sent += _send_batch(emails, now)
+
+
+def _run_in_worker():
+    close_old_connections()
+    try:
+        flush_outbox()
+    except Exception:
+        logger.exception("Flushing the email outbox")
+    finally:
+        close_old_connections()
+
+
+def _submit():
+    global _executor
+    backend = settings.EMAIL_OUTBOX_BACKEND
+    if backend == 'celery':
+        from .tasks import flush_outbox_task
+        if flush_outbox_task is not None:
+            flush_outbox_task.delay()
+            return
+        logger.warning("Celery is not installed, flushing the email outbox in-process")
+
+    if backend == 'inline':
+        flush_outbox()
+        return
+    if _executor is None:
+        # One thread: a flush sends everything due, so more would only contend for the same rows
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='email-outbox')
+    _executor.submit(_run_in_worker)
@@ -0,0 +1,198 @@
+"""
+Printable PDF versions of reports, drawn with PyMuPDF (fitz).
+
+Names, titles and notes are often written in Ethiopic script, which the
+built-in PDF fonts have no glyphs for. Each character is drawn with the
+first font that has it: REPORT_PDF_FONT when set (a TrueType font covering
+Latin and Ethiopic, such as Abyssinica SIL), Helvetica (Courier for
+tables), then the Noto Serif Ethiopic font bundled with MuPDF. The fonts
+are embedded, subset to the characters used.
+"""
+import textwrap
+
+import fitz
+from django.conf import settings
+
+PAGE_MARGIN = 50
+LINE_HEIGHT = 18
+
+
+def _font_chains():
+    unicode_fonts = [fitz.Font(fontfile=settings.REPORT_PDF_FONT)] if settings.REPORT_PDF_FONT else []
+    ethiopic = fitz.Font(script=fitz.UCDN_SCRIPT_ETHIOPIC)
+    return {
+        'text': [*unicode_fonts, fitz.Font('helv'), ethiopic],
+        # Courier first so table columns stay aligned
+        'mono': [fitz.Font('cour'), *unicode_fonts, ethiopic],
+    }
+
+
+def _runs(text, fonts):
+    """`text` split into (font, run) pieces, each character going to the first font that has a glyph for it"""
+    runs = []
+    for char in text:
+        font = next((font for font in fonts if font.has_glyph(ord(char))), fonts[0])
+        if runs and runs[-1][0] is font:
+            runs[-1][1] += char
+        else:
+            runs.append([font, char])
+    return runs
+
+
+class _PdfWriter:
+    """Minimal top-to-bottom text layout that starts new pages as needed"""
+
+    def __init__(self):
+        self.doc = fitz.open()
+        self.fonts = _font_chains()
+        self._new_page()
+
+    def _new_page(self):
+        self.page = self.doc.new_page()
+        self.y = PAGE_MARGIN
+
+    def _ensure_room(self, height):
+        if self.y + height > self.page.rect.height - PAGE_MARGIN:
+            self._new_page()
+
+    def _draw(self, text, size, chain='text'):
+        writer = fitz.TextWriter(self.page.rect)
+        position = fitz.Point(PAGE_MARGIN, self.y)
+        for font, run in _runs(text, self.fonts[chain]):
+            _, position = writer.append(position, run, font=font, fontsize=size)
+        writer.write_text(self.page)
+
+    def heading(self, text, size=16):
+        self._ensure_room(size + LINE_HEIGHT)
+        self.y += size
+        self._draw(text, size)
+        self.y += LINE_HEIGHT // 2
+
+    def line(self, text, size=11, mono=False):
+        self._ensure_room(LINE_HEIGHT)
+        self.y += LINE_HEIGHT
+        self._draw(text, size, 'mono' if mono else 'text')
+
+    def rows(self, pairs):
+        for label, value in pairs:
+            self.line(f"{label}: {value}")
+
+    def paragraph(self, text, size=11):
+        # Helvetica averages about half an em per character
+        chars_per_line = int((self.page.rect.width - 2 * PAGE_MARGIN) / (size * 0.5))
+        for source_line in text.splitlines() or ['']:
+            for wrapped in textwrap.wrap(source_line, chars_per_line) or ['']:
+                self.line(wrapped, size=size)
+
+    def spacer(self):
+        self.y += LINE_HEIGHT
+
+    def tobytes(self):
+        self.doc.subset_fonts()
+        data = self.doc.tobytes(deflate=True, garbage=3)
+        self.doc.close()
+        return data
+
+
+def _label(key):
+    return key.replace('_', ' ').capitalize()
+
+
+def _amount(value):
+    return f"{value:,.2f}" if isinstance(value, float) else value
+
+
+def _section(pdf, title, values):
+    """Heading plus one line per entry; nested dicts and lists of dicts are flattened"""
+    pdf.spacer()
+    pdf.heading(title, size=14)
+    for key, value in values.items():
+        if isinstance(value, dict):
+            pdf.line(f"{_label(key)}:")
+            pdf.rows((f"    {_label(k)}", _amount(v)) for k, v in value.items())
+        elif isinstance(value, list):
+            pdf.line(f"{_label(key)}:")
+            for item in value:
+                text = ', '.join(f"{k}: {_amount(v)}" for k, v in item.items()) if isinstance(item, dict) else str(item)
+                pdf.line(f"    {text}")
+        else:
+            pdf.line(f"{_label(key)}: {_amount(value)}")
+
+
+def event_report_content(report):
+    """Everything the event report PDF shows; also what its content hash is taken over"""
+    event = report.event
+    return {
+        'title': event.title,
+        'edir': event.edir.name,
+        'event_type': event.get_event_type_display(),
+        'date': event.start_date.strftime('%Y-%m-%d %H:%M'),
+        'location': event.location,
+        'prepared_by': report.prepared_by.full_name,
+        'attendance': report.attendance_summary or {},
+        'financial': report.financial_summary or {},
+        'notes': report.notes,
+    }
+
+
+def render_event_report(content):
+    pdf = _PdfWriter()
+    pdf.heading(f"Event Report - {content['title']}", size=18)
+    pdf.rows([
+        ('Edir', content['edir']),
+        ('Type', content['event_type']),
+        ('Date', content['date']),
+        ('Location', content['location']),
+        ('Prepared by', content['prepared_by']),
+    ])
+    _section(pdf, "Attendance", content['attendance'])
+    _section(pdf, "Finances (ETB)", content['financial'])
+    if content['notes']:
+        pdf.spacer()
+        pdf.heading("Notes", size=14)
+        pdf.paragraph(content['notes'])
+    return pdf.tobytes()
+
+
+def financial_report_content(report):
+    return {
+        'title': report.title,
+        'edir': report.edir.name,
+        'report_type': report.get_report_type_display(),
+        'period': f"{report.start_date} to {report.end_date}",
+        'generated_by': report.generated_by.full_name if report.generated_by else '',
+        'generated_at': report.generated_at.strftime('%Y-%m-%d %H:%M'),
+        'data': report.report_data or {},
+        'notes': report.notes,
+    }
+
+
+def render_financial_report(content):
+    data = dict(content['data'])
+    pdf = _PdfWriter()
+    pdf.heading(content['title'], size=18)
+    pdf.rows([
+        ('Edir', content['edir']),
+        ('Type', content['report_type']),
+        ('Period', content['period']),
+        ('Generated by', content['generated_by']),
+        ('Generated at', content['generated_at']),
+    ])
+    data.pop('period', None)
+    months = data.pop('months', None)
+    _section(pdf, "Summary (ETB)", data)
+    if months:
+        pdf.spacer()
+        pdf.heading("By month (ETB)", size=14)
+        # Courier keeps the columns aligned
+        pdf.line(f"{'Month':<8}{'Income':>16}{'Expenses':>16}{'Net':>16}", size=10, mono=True)
+        for month in months:
+            pdf.line(
+                f"{month['month']:<8}{month['income']:>16,.2f}{month['expenses']:>16,.2f}{month['net']:>16,.2f}",
+                size=10, mono=True
+            )
+    if content['notes']:
+        pdf.spacer()
+        pdf.heading("Notes", size=14)
+        pdf.paragraph(content['notes'])
+    return pdf.tobytes()
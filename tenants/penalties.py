@@ -0,0 +1,138 @@
+"""
+Rule-based penalty engine.
+
+For each active PenaltyRule of an edir, one query finds every overdue
+pending payment (late_payment) or recorded absence (absence) across all
+members that has no engine penalty yet, and one grouped query gives each
+member's unpaid total for the cap. The resulting penalties are inserted
+with a single bulk_create; the (edir, source_key) constraint makes re-runs
+harmless, so the engine can be run as often as wanted.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import CharField, Exists, OuterRef, Sum, Value
+from django.db.models.functions import Cast, Concat
+from django.utils import timezone
+
+from .models import Attendance, Edir, Payment, Penalty, PenaltyRule
+
+
+def _unpenalized(queryset, edir, prefix):
+    """Rows of `queryset` with no engine penalty for the key '<prefix>:<pk>' yet"""
+    key = Concat(Value(f"{prefix}:"), Cast(OuterRef('pk'), CharField()))
+    return queryset.filter(~Exists(Penalty.objects.filter(edir=edir, source_key=key)))
+
+
+def _late_payment_candidates(edir, rule, today):
+    payments = Payment.objects.filter(
+        edir=edir,
+        status='pending',
+        payment_date__lt=today - timedelta(days=rule.grace_days),
+    ).exclude(payment_type='penalty')
+    for row in _unpenalized(payments, edir, 'payment').order_by('payment_date', 'pk').values(
+        'pk', 'member_id', 'payment_type', 'amount', 'payment_date'
+    ):
+        yield (
+            f"payment:{row['pk']}",
+            row['member_id'],
+            f"Late {row['payment_type']} payment of {row['amount']} due {row['payment_date']}",
+        )
+
+
+def _absence_candidates(edir, rule, today):
+    absences = Attendance.objects.filter(
+        event__edir=edir,
+        actual_attendance='absent',
+        event__start_date__date__lt=today - timedelta(days=rule.grace_days),
+    )
+    for row in _unpenalized(absences, edir, 'attendance').order_by('event__start_date', 'pk').values(
+        'pk', 'member_id', 'event__title', 'event__start_date'
+    ):
+        yield (
+            f"attendance:{row['pk']}",
+            row['member_id'],
+            f"Absent from {row['event__title']} on {row['event__start_date']:%Y-%m-%d}",
+        )
+
+
+CANDIDATES = {
+    'late_payment': _late_payment_candidates,
+    'absence': _absence_candidates,
+}
+
+
+def _outstanding(edir, penalty_type):
+    """{member_id: unpaid amount} of this penalty type, in one grouped query"""
+    rows = (
+        Penalty.objects.filter(edir=edir, penalty_type=penalty_type, status='pending')
+        .values('member_id')
+        .order_by()
+        .annotate(total=Sum('amount'))
+    )
+    return {row['member_id']: row['total'] for row in rows}
+
+
+def evaluate_edir(edir, today=None, created_by=None):
+    """
+    (penalties, capped): unsaved Penalty objects the edir's active rules
+    call for, and how many were left out because a member hit the cap.
+    """
+    today = today or timezone.now().date()
+    penalties = []
+    capped = 0
+
+    for rule in PenaltyRule.objects.filter(edir=edir, is_active=True, penalty_type__in=CANDIDATES):
+        outstanding = defaultdict(int, _outstanding(edir, rule.penalty_type)) if rule.max_outstanding is not None else None
+        for source_key, member_id, reason in CANDIDATES[rule.penalty_type](edir, rule, today):
+            amount = rule.amount
+            if outstanding is not None:
+                amount = min(amount, rule.max_outstanding - outstanding[member_id])
+                if amount <= 0:
+                    capped += 1
+                    continue
+                outstanding[member_id] += amount
+            penalties.append(Penalty(
+                edir=edir,
+                member_id=member_id,
+                penalty_type=rule.penalty_type,
+                amount=amount,
+                reason=reason,
+                due_date=today + timedelta(days=rule.payment_due_days),
+                rule=rule,
+                source_key=source_key,
+                created_by=created_by,
+            ))
+    return penalties, capped
+
+
+def apply_penalties(edir, dry_run=False, today=None, created_by=None):
+    """Evaluate the edir's rules and insert the resulting penalties unless `dry_run`"""
+    penalties, capped = evaluate_edir(edir, today, created_by)
+    created = 0
+    if penalties and not dry_run:
+        with transaction.atomic():
+            before = Penalty.objects.filter(edir=edir, source_key__isnull=False).count()
+            Penalty.objects.bulk_create(penalties, batch_size=500, ignore_conflicts=True)
+            created = Penalty.objects.filter(edir=edir, source_key__isnull=False).count() - before
+            # bulk_create skips the signals that normally bump this
+            Edir.bump_data_version(edir.pk)
+
+    return {
+        'edir': edir.slug,
+        'dry_run': dry_run,
+        'created': created,
+        'capped': capped,
+        'penalties': [
+            {
+                'member_id': p.member_id,
+                'penalty_type': p.penalty_type,
+                'amount': float(p.amount),
+                'reason': p.reason,
+                'due_date': p.due_date,
+                'source_key': p.source_key,
+            }
+            for p in penalties
+        ],
+    }
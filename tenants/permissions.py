@@ -2,6 +2,14 @@ from rest_framework.permissions import BasePermission
 from django.shortcuts import get_object_or_404
 from .models import Member
 
+class IsSuperUser(BasePermission):
+    """Allow only platform superusers."""
+    message = 'Only platform administrators can access this resource.'
+
+    def has_permission(self, request, view):
+        return bool(request.user and request.user.is_superuser)
+
+
 class IsEdirMember(BasePermission):
     """Allow access only to authenticated members of the Edir."""
     message = 'You must be a member of this Edir to access this resource.'
@@ -0,0 +1,190 @@
+"""
+Platform statistics for superusers.
+
+compute_edir_stats() makes one grouped pass per source table across every
+edir and rewrites the EdirStats table: one row per edir plus a platform
+row (edir=None) holding the totals. The overview endpoint only reads that
+table: the platform row and the top rows of a few indexed columns.
+"""
+from datetime import date
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+
+from .models import ArchivedPayment, Edir, EdirStats, Event, FinancialRollup, Member, Payment, Resource
+
+MONTHS_KEPT = 12
+
+STAT_FIELDS = [
+    'member_count', 'members_by_status', 'collections_total', 'collections_current_month',
+    'monthly_collections', 'event_count', 'active_event_count', 'payments_verified',
+    'payments_verification_failed', 'verification_success_rate', 'active_resources', 'computed_at',
+]
+
+LEADERBOARDS = {
+    'members': 'member_count',
+    'collections': 'collections_total',
+    'collections_this_month': 'collections_current_month',
+    'events': 'event_count',
+    'verification_success_rate': 'verification_success_rate',
+}
+
+
+def _empty_stats():
+    return {
+        'member_count': 0,
+        'members_by_status': {},
+        'collections_total': Decimal('0'),
+        'collections_current_month': Decimal('0'),
+        'monthly_collections': {},
+        'event_count': 0,
+        'active_event_count': 0,
+        'payments_verified': 0,
+        'payments_verification_failed': 0,
+        'active_resources': 0,
+    }
+
+
+def _success_rate(verified, failed):
+    checked = verified + failed
+    return round(verified / checked * 100, 2) if checked else None
+
+
+def collect_stats(today=None):
+    """{edir_id: stats} for every edir, from one grouped query per source"""
+    today = today or timezone.now().date()
+    current_month = today.replace(day=1)
+    year, month = divmod(current_month.year * 12 + current_month.month - MONTHS_KEPT, 12)
+    first_kept = date(year, month + 1, 1)
+    stats = {edir_id: _empty_stats() for edir_id in Edir.objects.values_list('id', flat=True)}
+
+    for row in Member.objects.values('edir_id', 'status').order_by().annotate(count=Count('id')):
+        entry = stats[row['edir_id']]
+        entry['members_by_status'][row['status']] = row['count']
+        entry['member_count'] += row['count']
+
+    # Rollups already cover archived payments
+    rollups = (
+        FinancialRollup.objects.filter(kind='income')
+        .values('edir_id', 'month')
+        .order_by()
+        .annotate(total=Sum('total'), count=Sum('count'))
+    )
+    for row in rollups:
+        entry = stats[row['edir_id']]
+        entry['collections_total'] += row['total']
+        if row['month'] >= first_kept:
+            entry['monthly_collections'][row['month']] = (row['total'], row['count'])
+        if row['month'] == current_month:
+            entry['collections_current_month'] += row['total']
+
+    events = Event.objects.values('edir_id').order_by().annotate(
+        count=Count('id'), active=Count('id', filter=Q(is_active=True))
+    )
+    for row in events:
+        stats[row['edir_id']]['event_count'] = row['count']
+        stats[row['edir_id']]['active_event_count'] = row['active']
+
+    for model in (Payment, ArchivedPayment):
+        verified = model.objects.filter(verified_at__isnull=False).values('edir_id').order_by().annotate(
+            completed=Count('id', filter=Q(status='completed')),
+            failed=Count('id', filter=Q(status='failed')),
+        )
+        for row in verified:
+            stats[row['edir_id']]['payments_verified'] += row['completed']
+            stats[row['edir_id']]['payments_verification_failed'] += row['failed']
+
+    resources = Resource.objects.filter(available=True).values('edir_id').order_by().annotate(count=Count('id'))
+    for row in resources:
+        stats[row['edir_id']]['active_resources'] = row['count']
+
+    return stats
+
+
+def _monthly_list(months):
+    return [
+        {'month': month.strftime('%Y-%m'), 'amount': float(total), 'count': count}
+        for month, (total, count) in sorted(months.items())
+    ]
+
+
+def compute_edir_stats(today=None):
+    """Rewrite EdirStats from the live tables; returns the number of edirs covered"""
+    now = timezone.now()
+    stats = collect_stats(today)
+
+    platform = _empty_stats()
+    rows = []
+    for edir_id, entry in stats.items():
+        for key in ('member_count', 'collections_total', 'collections_current_month', 'event_count',
+                    'active_event_count', 'payments_verified', 'payments_verification_failed', 'active_resources'):
+            platform[key] += entry[key]
+        for status, count in entry['members_by_status'].items():
+            platform['members_by_status'][status] = platform['members_by_status'].get(status, 0) + count
+        for month, (total, count) in entry['monthly_collections'].items():
+            platform_total, platform_count = platform['monthly_collections'].get(month, (Decimal('0'), 0))
+            platform['monthly_collections'][month] = (platform_total + total, platform_count + count)
+
+        rows.append(EdirStats(
+            edir_id=edir_id,
+            **{**entry, 'monthly_collections': _monthly_list(entry['monthly_collections'])},
+            verification_success_rate=_success_rate(entry['payments_verified'], entry['payments_verification_failed']),
+            computed_at=now,
+        ))
+
+    with transaction.atomic():
+        EdirStats.objects.bulk_create(
+            rows, batch_size=500, update_conflicts=True, unique_fields=['edir'], update_fields=STAT_FIELDS
+        )
+        EdirStats.objects.update_or_create(edir=None, defaults={
+            **platform,
+            'monthly_collections': _monthly_list(platform['monthly_collections']),
+            'verification_success_rate': _success_rate(
+                platform['payments_verified'], platform['payments_verification_failed']
+            ),
+            'edir_count': len(stats),
+            'computed_at': now,
+        })
+    return len(stats)
+
+
+def _board_entry(row, field):
+    value = getattr(row, field)
+    return {
+        'edir': row.edir.name,
+        'slug': row.edir.slug,
+        'value': float(value) if isinstance(value, Decimal) else value,
+    }
+
+
+def platform_overview(limit=10):
+    """Platform totals and top-`limit` leaderboards, read from EdirStats only"""
+    platform = EdirStats.objects.filter(edir__isnull=True).first()
+    if platform is None:
+        return None
+
+    per_edir = EdirStats.objects.filter(edir__isnull=False).select_related('edir')
+    leaderboards = {
+        name: [_board_entry(row, field) for row in per_edir.order_by(F(field).desc(nulls_last=True), 'edir_id')[:limit]]
+        for name, field in LEADERBOARDS.items()
+    }
+    return {
+        'computed_at': platform.computed_at,
+        'totals': {
+            'edirs': platform.edir_count,
+            'members': platform.member_count,
+            'members_by_status': platform.members_by_status,
+            'collections_total': float(platform.collections_total),
+            'collections_current_month': float(platform.collections_current_month),
+            'events': platform.event_count,
+            'active_events': platform.active_event_count,
+            'payments_verified': platform.payments_verified,
+            'payments_verification_failed': platform.payments_verification_failed,
+            'verification_success_rate': platform.verification_success_rate,
+            'active_resources': platform.active_resources,
+        },
+        'monthly_collections': platform.monthly_collections,
+        'leaderboards': leaderboards,
+    }
@@ -0,0 +1,580 @@
+"""
+Background reminder dispatch.
+
+enqueue_reminder() marks a reminder as queued and, once the surrounding
+transaction commits, hands its id to a Celery worker (REMINDER_DISPATCH_BACKEND
+= 'celery') or to a small in-process thread pool. dispatch_reminder() claims
+the reminder with a conditional update, so a reminder is sent at most once
+however many times it is queued, and runs its channels concurrently. Each
+channel's per-member outcomes are written in bulk to ReminderDelivery, and
+its running counts to Reminder.channel_progress as it finishes. Members
+already reached on a channel are skipped, so retry_failed() (and a requeue
+after a dead worker) only sends the failed deliveries again. Recipients come
+from the reminder's audience (audiences.py), read in chunks of
+REMINDER_DISPATCH_CHUNK members rather than loaded all at once.
+
+Queued and sending reminders hold a lease (REMINDER_LEASE_SECONDS), which
+a dispatch renews before each batch of REMINDER_SEND_BATCH members it sends
+and logs. The scheduler (dispatch_due(), run by the run_reminder_scheduler command or
+Celery beat) queues reminders as their scheduled time comes and requeues
+those whose lease ran out because their worker died.
+
+With REMINDER_DIGEST_WINDOW set, non-urgent reminders record their first
+deliveries as held rather than sending them. flush_digests(), run by the
+scheduler too, sends each member one message per channel for everything
+held for them once the oldest item has waited out the window.
+"""
+import logging
+import uuid
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Count, Exists, F, OuterRef
+from django.utils import timezone
+
+from . import expo_push, mailer, sms, sms_segments
+from .audiences import audience_members
+from .models import Device, Member, Reminder, ReminderDelivery
+
+logger = logging.getLogger(__name__)
+
+DISPATCHABLE_STATUSES = ('pending', 'queued')
+
+_executor = None
+
+
+def lease_expiry():
+    return timezone.now() + timedelta(seconds=settings.REMINDER_LEASE_SECONDS)
+
+
+def build_sms(reminder, context):
+    """The SMS for one recipient: the message or its compact version, rendered and fitted to the segment budget"""
+    return sms_segments.build(
+        mailer.render(reminder.message, context),
+        mailer.render(reminder.sms_message, context) if reminder.sms_message else '',
+    )
+
+
+def send_sms(reminder, recipients):
+    """Text each recipient with a valid phone number, keeping to the SMS segment budget"""
+    rows = list(recipients.values_list('pk', 'contact__phone_number', 'full_name', 'edir__name'))
+    outcomes, pending = [], []
+    for member_id, phone_number, full_name, edir_name in rows:
+        if not phone_number:
+            outcomes.append((member_id, 'skipped', '', 0, 'No valid phone number'))
+            continue
+        built = build_sms(reminder, {'full_name': full_name, 'edir_name': edir_name})
+        if not built['within_budget'] and settings.SMS_OVER_BUDGET == 'refuse':
+            outcomes.append((member_id, 'skipped', '', 0, _over_budget(built)))
+            continue
+        pending.append((member_id, phone_number, built))
+
+    results = sms.send_messages([(phone_number, built['text']) for _, phone_number, built in pending])
+    segments = sum(built['segments'] for (_, _, built), result in zip(pending, results) if result['status'] == 'sent')
+    if segments:
+        Reminder.objects.filter(pk=reminder.pk).update(sms_segments=F('sms_segments') + segments)
+    return outcomes + [
+        # Sent over budget ('flag'): the reason is kept on the delivery
+        (member_id, result['status'], result['sid'], result['attempts'],
+         result['error'] or ('' if built['within_budget'] else _over_budget(built)))
+        for (member_id, _, built), result in zip(pending, results)
+    ]
+
+
+def _over_budget(built):
+    return f"{built['segments']} SMS segments, over the budget of {settings.SMS_SEGMENT_BUDGET}"
+
+
+def send_email(reminder, recipients):
+    """Send each recipient with an email address their own rendered copy"""
+    rows = list(recipients.values_list('pk', 'contact__email', 'full_name', 'edir__name'))
+    outcomes = [(member_id, 'skipped', '', 0, 'No valid email address') for member_id, email, _, _ in rows if not email]
+    rows = [row for row in rows if row[1]]
+    messages = mailer.build_messages(reminder.subject, reminder.message, [
+        (email, {'full_name': full_name, 'edir_name': edir_name}) for _, email, full_name, edir_name in rows
+    ])
+    result = mailer.send_bulk(messages)
+    logger.info("Emails sent to %s of %s recipients", result['sent'], len(messages))
+    return outcomes + [
+        (row[0], outcome['status'], '', outcome['attempts'], outcome['error'])
+        for row, outcome in zip(rows, result['results'])
+    ]
+
+
+def send_push(reminder, recipients):
+    """Push to every registered device of each recipient; a member counts as reached if any device was"""
+    member_ids = list(recipients.values_list('pk', flat=True))
+    devices = list(Device.objects.filter(member_id__in=member_ids).values_list('member_id', 'token'))
+    messages = [
+        {'to': token, 'title': reminder.subject, 'body': reminder.message, 'sound': 'default'}
+        for _, token in devices
+    ]
+    results = expo_push.send_push(messages, reminder=reminder)
+
+    by_member = {}
+    for (member_id, _), result in zip(devices, results):
+        by_member.setdefault(member_id, []).append(result)
+    outcomes = []
+    for member_id in member_ids:
+        member_results = by_member.get(member_id)
+        if not member_results:
+            outcomes.append((member_id, 'skipped', '', 0, 'No registered device'))
+            continue
+        sent = [result for result in member_results if result['status'] == 'sent']
+        failed = [result for result in member_results if result['status'] == 'failed']
+        if sent:
+            outcomes.append((member_id, 'sent', sent[0]['ticket_id'], 1, ''))
+        elif failed:
+            outcomes.append((member_id, 'failed', '', 1, failed[0]['error']))
+        else:
+            outcomes.append((member_id, 'skipped', '', 1, 'DeviceNotRegistered'))
+    return outcomes
+
+
+# Each sender takes the reminder and a queryset of the members to reach and
+# returns one (member_id, status, provider_id, attempts, error) per member
+SENDERS = {
+    'sms': send_sms,
+    'email': send_email,
+    'push': send_push,
+}
+
+DELIVERY_COUNTS = ('sent', 'failed', 'skipped', 'held')
+
+
+def reminder_channels(reminder):
+    return list(SENDERS) if reminder.channel == 'all' else [reminder.channel]
+
+
+def _targets(reminder, channel):
+    """
+    Recipients still to reach on `channel`: everyone on the first dispatch,
+    only those whose delivery failed on a retry.
+    """
+    settled = ReminderDelivery.objects.filter(reminder=reminder, channel=channel).exclude(status='failed')
+    return audience_members(reminder).exclude(pk__in=settled.values('member_id'))
+
+
+def _record(reminder, channel, outcomes, previous_attempts):
+    ReminderDelivery.objects.bulk_create(
+        [
+            ReminderDelivery(
+                reminder=reminder,
+                member_id=member_id,
+                channel=channel,
+                status=status,
+                provider_id=provider_id,
+                attempts=previous_attempts.get(member_id, 0) + attempts,
+                last_error=error[:500],
+            )
+            for member_id, status, provider_id, attempts, error in outcomes
+        ],
+        batch_size=500,
+        update_conflicts=True,
+        unique_fields=['reminder', 'member', 'channel'],
+        update_fields=['status', 'provider_id', 'attempts', 'last_error', 'updated_at'],
+    )
+
+
+def _chunks(targets):
+    """Ids of the members of `targets`, REMINDER_DISPATCH_CHUNK at a time in pk order, read one chunk per query"""
+    last = 0
+    while True:
+        ids = list(
+            targets.filter(pk__gt=last).order_by('pk').values_list('pk', flat=True)[:settings.REMINDER_DISPATCH_CHUNK]
+        )
+        if not ids:
+            return
+        last = ids[-1]
+        yield ids
+
+
+class _Lease:
+    """
+    A dispatch's claim on its reminder, told apart from later claims by its
+    dispatch_started_at. Once the lease has run out and another dispatch
+    has claimed the reminder, renew() and save() fail and this dispatch
+    stops without touching the reminder again.
+    """
+
+    def __init__(self, reminder):
+        self._claim = Reminder.objects.filter(
+            pk=reminder.pk, status='sending', dispatch_started_at=reminder.dispatch_started_at
+        )
+        self.lost = False
+
+    def renew(self):
+        """Extend the lease by REMINDER_LEASE_SECONDS; False once the claim is gone"""
+        if not self.lost and not self._claim.update(lease_expires_at=lease_expiry()):
+            self.lost = True
+        return not self.lost
+
+    def save(self, reminder, fields):
+        """Save `fields` of the reminder if the claim still holds"""
+        with transaction.atomic():
+            if self.lost or not self._claim.select_for_update().exists():
+                self.lost = True
+                return False
+            reminder.save(update_fields=fields)
+        return True
+
+
+def holds_for_digest(reminder):
+    """Whether the reminder's first deliveries wait for the members' digests instead of going out now"""
+    if not settings.REMINDER_DIGEST_WINDOW or reminder.urgent:
+        return False
+    return not (
+        reminder.related_event_id
+        and reminder.related_event.event_type in settings.REMINDER_URGENT_EVENT_TYPES
+    )
+
+
+def _hold(reminder, recipients):
+    return [(member_id, 'held', '', 0, '') for member_id in recipients.values_list('pk', flat=True)]
+
+
+def _send(channel, reminder, recipients):
+    """Run the channel's sender, turning an error into a failed outcome per member; returns (outcomes, error)"""
+    try:
+        return SENDERS[channel](reminder, recipients), ''
+    except Exception as e:
+        logger.error("%s send failed for reminder %s: %s", channel, reminder.pk, e)
+        return [(member_id, 'failed', '', 1, str(e)) for member_id in recipients.values_list('pk', flat=True)], str(e)
+
+
+def _run_channel(channel, reminder, lease, hold=False):
+    """
+    Send the channel's outstanding deliveries REMINDER_SEND_BATCH members
+    at a time, logging each batch as soon as it is sent and renewing the
+    lease before the next, so a requeued reminder only resends the batch in
+    flight when its worker died. With `hold`, first deliveries are held for
+    the digest instead and only retries go out. Stops once the lease is
+    lost. Runs on its own thread, hence its own database connection.
+    Returns (change in the channel's counts, error).
+    """
+    delta, error = Counter(), ''
+    try:
+        for ids in _chunks(_targets(reminder, channel)):
+            for start in range(0, len(ids), settings.REMINDER_SEND_BATCH):
+                if not lease.renew():
+                    logger.warning("Reminder %s was claimed by another dispatch, stopping %s", reminder.pk, channel)
+                    return delta, error
+                batch = Member.objects.filter(pk__in=ids[start:start + settings.REMINDER_SEND_BATCH])
+                previous_attempts = dict(
+                    ReminderDelivery.objects.filter(reminder=reminder, channel=channel, status='failed', member__in=batch)
+                    .values_list('member_id', 'attempts')
+                )
+                if hold:
+                    outcomes = _hold(reminder, batch.exclude(pk__in=list(previous_attempts)))
+                    sent, send_error = _send(channel, reminder, batch.filter(pk__in=list(previous_attempts))) \
+                        if previous_attempts else ([], '')
+                    outcomes += sent
+                else:
+                    outcomes, send_error = _send(channel, reminder, batch)
+                error = error or send_error
+                _record(reminder, channel, outcomes, previous_attempts)
+
+                delta.update(outcome[1] for outcome in outcomes)
+                # Retried deliveries stop counting as failed before their new outcome is counted
+                delta['failed'] -= len(previous_attempts)
+                error = error or next((outcome[4] for outcome in outcomes if outcome[1] == 'failed'), '')
+        return delta, error
+    except Exception as e:
+        logger.exception("Dispatching %s for reminder %s", channel, reminder.pk)
+        return delta, str(e)
+    finally:
+        close_old_connections()
+
+
+def dispatch_reminder(reminder_id):
+    """
+    Send one queued reminder's outstanding deliveries through its channels.
+    Returns the reminder, or None when it was already claimed by another
+    dispatch or another dispatch took it over after this one's lease ran
+    out.
+    """
+    claimed = Reminder.objects.filter(pk=reminder_id, status__in=DISPATCHABLE_STATUSES).update(
+        status='sending', dispatch_started_at=timezone.now(), lease_expires_at=lease_expiry()
+    )
+    if not claimed:
+        return None
+
+    reminder = Reminder.objects.get(pk=reminder_id)
+    lease = _Lease(reminder)
+    channels = reminder_channels(reminder)
+    hold = holds_for_digest(reminder)
+    progress = reminder.channel_progress
+    for channel in channels:
+        entry = progress.setdefault(channel, {})
+        entry.update({key: entry.get(key, 0) for key in DELIVERY_COUNTS}, status='pending', error='')
+    lease.save(reminder, ['channel_progress'])
+
+    with ThreadPoolExecutor(max_workers=len(channels), thread_name_prefix='reminder-channel') as pool:
+        futures = {pool.submit(_run_channel, channel, reminder, lease, hold): channel for channel in channels}
+        # Only this thread writes the progress, one channel at a time as they finish
+        for future in as_completed(futures):
+            delta, error = future.result()
+            entry = progress[futures[future]]
+            for key in DELIVERY_COUNTS:
+                entry[key] += delta[key]
+            entry['status'] = _channel_status(entry, error)
+            entry['error'] = error
+            lease.save(reminder, ['channel_progress'])
+
+    _set_status(reminder, channels)
+    reminder.lease_expires_at = None
+    if not lease.save(reminder, ['status', 'sent_at', 'lease_expires_at']):
+        logger.warning("Reminder %s was taken over by another dispatch", reminder_id)
+        return None
+    return reminder
+
+
+def _channel_status(entry, error=''):
+    if error or entry['failed']:
+        return 'failed'
+    return 'held' if entry['held'] else 'sent'
+
+
+def _set_status(reminder, channels):
+    statuses = {reminder.channel_progress[channel]['status'] for channel in channels}
+    if statuses == {'sent'}:
+        reminder.status = 'sent'
+        reminder.sent_at = timezone.now()
+    elif 'held' in statuses and 'failed' not in statuses:
+        reminder.status = 'held'
+    else:
+        reminder.status = 'failed'
+
+
+def _run_in_worker(reminder_id):
+    close_old_connections()
+    try:
+        dispatch_reminder(reminder_id)
+    except Exception:
+        logger.exception("Dispatching reminder %s", reminder_id)
+    finally:
+        close_old_connections()
+
+
+def _submit(reminder_id):
+    global _executor
+    if settings.REMINDER_DISPATCH_BACKEND == 'celery':
+        from .tasks import dispatch_reminder_task
+        if dispatch_reminder_task is not None:
+            dispatch_reminder_task.delay(reminder_id)
+            return
+        logger.warning("Celery is not installed, dispatching reminder %s in-process", reminder_id)
+
+    if settings.REMINDER_DISPATCH_WORKERS <= 0:
+        dispatch_reminder(reminder_id)
+        return
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.REMINDER_DISPATCH_WORKERS, thread_name_prefix='reminder-dispatch'
+        )
+    _executor.submit(_run_in_worker, reminder_id)
+
+
+def create_next_occurrence(reminder):
+    """The pending copy of a recurring reminder for its next scheduled time, if there is one"""
+    next_time = reminder.next_scheduled_time(after=timezone.now())
+    if next_time is None:
+        return None
+    recipient_ids = [] if reminder.audience else list(reminder.recipients.values_list('pk', flat=True))
+    occurrence = Reminder.objects.create(
+        edir_id=reminder.edir_id,
+        reminder_type=reminder.reminder_type,
+        subject=reminder.subject,
+        message=reminder.message,
+        sms_message=reminder.sms_message,
+        urgent=reminder.urgent,
+        scheduled_time=next_time,
+        channel=reminder.channel,
+        related_event_id=reminder.related_event_id,
+        related_payment_id=reminder.related_payment_id,
+        created_by_id=reminder.created_by_id,
+        recurrence=reminder.recurrence,
+        recurs_until=reminder.recurs_until,
+        audience=reminder.audience,
+        # Each occurrence of an 'unpaid' reminder is for the month it is sent in
+        audience_period=None,
+        audience_role=reminder.audience_role,
+        audience_task_group_id=reminder.audience_task_group_id,
+    )
+    if recipient_ids:
+        occurrence.recipients.set(recipient_ids)
+    return occurrence
+
+
+def enqueue_reminder(reminder):
+    """
+    Queue a pending reminder for dispatch once the current transaction
+    commits, and create its next occurrence if it repeats. Returns False if
+    the reminder was no longer pending.
+    """
+    with transaction.atomic():
+        # Only one caller moves a reminder out of pending, so it is queued and repeated once
+        claimed = Reminder.objects.filter(pk=reminder.pk, status='pending').update(
+            status='queued', channel_progress={}, lease_expires_at=lease_expiry()
+        )
+        if not claimed:
+            return False
+        reminder.refresh_from_db(fields=['status', 'channel_progress', 'lease_expires_at'])
+        create_next_occurrence(reminder)
+        transaction.on_commit(lambda: _submit(reminder.pk))
+    return True
+
+
+def retry_failed(reminder):
+    """
+    Queue a failed reminder again; only its failed deliveries are sent.
+    Returns False if the reminder had not failed.
+    """
+    with transaction.atomic():
+        claimed = Reminder.objects.filter(pk=reminder.pk, status='failed').update(
+            status='queued', lease_expires_at=lease_expiry()
+        )
+        if not claimed:
+            return False
+        reminder.refresh_from_db(fields=['status', 'lease_expires_at'])
+        transaction.on_commit(lambda: _submit(reminder.pk))
+    return True
+
+
+def requeue_expired(now=None):
+    """
+    Queue again the reminders whose dispatch outlived its lease (the worker
+    died or was restarted). Returns how many were requeued.
+    """
+    now = now or timezone.now()
+    expired = Reminder.objects.filter(status__in=('queued', 'sending'), lease_expires_at__lt=now)
+    requeued = 0
+    for reminder_id in list(expired.values_list('pk', flat=True)):
+        if expired.filter(pk=reminder_id).update(status='queued', lease_expires_at=lease_expiry()):
+            logger.warning("Reminder %s outlived its dispatch lease, queueing it again", reminder_id)
+            transaction.on_commit(lambda reminder_id=reminder_id: _submit(reminder_id))
+            requeued += 1
+    return requeued
+
+
+def dispatch_due(now=None, limit=None):
+    """
+    Queue pending reminders whose scheduled time has come, oldest first,
+    at most `limit` (REMINDER_SCHEDULER_BATCH) of them. Reads the
+    (status, scheduled_time) index, so it costs O(due) whatever the size
+    of the table. Returns how many were queued.
+    """
+    now = now or timezone.now()
+    limit = limit or settings.REMINDER_SCHEDULER_BATCH
+    due = Reminder.objects.filter(status='pending', scheduled_time__lte=now).order_by('scheduled_time')[:limit]
+    return sum(enqueue_reminder(reminder) for reminder in due)
+
+
+def compose_digest(reminders):
+    """
+    One reminder standing for all of `reminders`, for a member's digest.
+    It goes out under the first reminder's id, which push tickets and SMS
+    segments are counted against; a single reminder is sent as it is.
+    """
+    if len(reminders) == 1:
+        return reminders[0]
+    lead = reminders[0]
+    return Reminder(
+        pk=lead.pk,
+        edir_id=lead.edir_id,
+        reminder_type=lead.reminder_type,
+        channel=lead.channel,
+        subject=f'{len(reminders)} reminders from {lead.edir.name}',
+        message='\n\n'.join(f'{reminder.subject}\n{reminder.message}' for reminder in reminders),
+        # The compact SMS lists the subjects only
+        sms_message='\n'.join(f'- {reminder.subject}' for reminder in reminders),
+    )
+
+
+def _claim_digests(now):
+    """Mark the held deliveries due for a digest as being sent; returns the claim id"""
+    window = timedelta(seconds=settings.REMINDER_DIGEST_WINDOW)
+    # Deliveries claimed by a flush that died are held again, and due straight away
+    ReminderDelivery.objects.filter(
+        status='digesting', updated_at__lt=now - timedelta(seconds=settings.REMINDER_LEASE_SECONDS)
+    ).update(status='held', updated_at=now - window)
+
+    waited = ReminderDelivery.objects.filter(
+        status='held', member_id=OuterRef('member_id'), channel=OuterRef('channel'), updated_at__lte=now - window
+    )
+    claim = uuid.uuid4().hex
+    # A conditional update, so schedulers running side by side never claim the same delivery
+    ReminderDelivery.objects.filter(Exists(waited), status='held').update(
+        status='digesting', provider_id=claim, updated_at=now
+    )
+    return claim
+
+
+def _settle(reminder_ids, errors):
+    """Recount the channels of reminders whose held deliveries went out, and close the finished ones"""
+    counts = defaultdict(Counter)
+    rows = (
+        ReminderDelivery.objects.filter(reminder_id__in=reminder_ids)
+        .values_list('reminder_id', 'channel', 'status')
+        .annotate(count=Count('pk'))
+    )
+    for reminder_id, channel, status, count in rows:
+        counts[reminder_id, channel][status] += count
+
+    with transaction.atomic():
+        # Reminders being dispatched again (a retry) are left to that dispatch
+        for reminder in Reminder.objects.select_for_update().filter(pk__in=reminder_ids).exclude(
+            status__in=('queued', 'sending')
+        ):
+            channels = reminder_channels(reminder)
+            for channel in channels:
+                entry = reminder.channel_progress.setdefault(channel, {})
+                entry.update({key: counts[reminder.pk, channel][key] for key in DELIVERY_COUNTS})
+                entry['error'] = (entry.get('error') or errors.get((reminder.pk, channel), '')) if entry['failed'] else ''
+                entry['status'] = _channel_status(entry)
+            _set_status(reminder, channels)
+            reminder.save(update_fields=['channel_progress', 'status', 'sent_at'])
+
+
+def flush_digests(now=None):
+    """
+    Send the held deliveries of every member and channel whose oldest held
+    delivery has waited REMINDER_DIGEST_WINDOW, as one message per member
+    and channel covering all of them. Members held for the same reminders
+    are sent together. Returns how many members got a digest.
+    """
+    if not settings.REMINDER_DIGEST_WINDOW:
+        return 0
+    claim = _claim_digests(now or timezone.now())
+    held = defaultdict(list)
+    for reminder_id, member_id, channel in (
+        ReminderDelivery.objects.filter(status='digesting', provider_id=claim)
+        .order_by('reminder_id').values_list('reminder_id', 'member_id', 'channel')
+    ):
+        held[member_id, channel].append(reminder_id)
+    if not held:
+        return 0
+
+    groups = defaultdict(list)
+    for (member_id, channel), reminder_ids in held.items():
+        groups[channel, tuple(reminder_ids)].append(member_id)
+    reminders = Reminder.objects.select_related('edir').in_bulk({pk for _, ids in groups for pk in ids})
+
+    errors = {}
+    for (channel, reminder_ids), member_ids in groups.items():
+        digest = compose_digest([reminders[pk] for pk in reminder_ids])
+        for start in range(0, len(member_ids), settings.REMINDER_DISPATCH_CHUNK):
+            chunk = Member.objects.filter(pk__in=member_ids[start:start + settings.REMINDER_DISPATCH_CHUNK])
+            outcomes, error = _send(channel, digest, chunk)
+            error = error or next((outcome[4] for outcome in outcomes if outcome[1] == 'failed'), '')
+            for pk in reminder_ids:
+                _record(reminders[pk], channel, outcomes, {})
+                if error:
+                    errors.setdefault((pk, channel), error)
+
+    _settle(list(reminders), errors)
+    logger.info("Sent digests to %s members for %s reminders", len(held), len(reminders))
+    return len(held)
@@ -0,0 +1,155 @@
+"""
+Background PDF rendering for event and financial reports.
+
+A download request hashes the content the PDF would be drawn from. If a
+RenderedReport with that hash is ready it is served straight away, with the
+hash as its ETag, so a client that already has it gets a 304. Otherwise a
+render is queued on a small in-process worker pool and the client is told to
+retry. Reports are only re-rendered when their content actually changes.
+"""
+import hashlib
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, close_old_connections, transaction
+from django.http import HttpResponse, HttpResponseNotModified, JsonResponse
+from django.utils import timezone
+from django.utils.http import parse_etags
+
+from .models import EventReport, FinancialReport, RenderedReport
+from .pdf_reports import (
+    event_report_content,
+    financial_report_content,
+    render_event_report,
+    render_financial_report,
+)
+
+logger = logging.getLogger(__name__)
+
+# Bump when the PDF layout changes so every report is drawn again
+LAYOUT_VERSION = 2
+
+RENDERERS = {
+    'event': (EventReport, event_report_content, render_event_report),
+    'financial': (FinancialReport, financial_report_content, render_financial_report),
+}
+
+_executor = None
+
+
+def content_hash(content):
+    payload = json.dumps(content, sort_keys=True, cls=DjangoJSONEncoder)
+    return hashlib.sha256(f"{LAYOUT_VERSION}:{payload}".encode()).hexdigest()
+
+
+def _load_report(kind, report_id):
+    model = RENDERERS[kind][0]
+    related = ('event__edir', 'prepared_by') if kind == 'event' else ('edir', 'generated_by')
+    return model.objects.select_related(*related).filter(pk=report_id).first()
+
+
+def render_now(rendered_id):
+    """Draw one pending RenderedReport. Runs on a worker thread or from render_pending_reports."""
+    rendered = RenderedReport.objects.filter(pk=rendered_id, status='pending').defer('pdf').first()
+    if rendered is None:
+        return None
+
+    report = _load_report(rendered.kind, rendered.report_id)
+    _, build_content, render = RENDERERS[rendered.kind]
+    content = build_content(report) if report else None
+    if content is None or content_hash(content) != rendered.content_hash:
+        # The report changed or went away after the render was queued
+        rendered.delete()
+        return None
+
+    try:
+        rendered.pdf = render(content)
+    except Exception as e:
+        logger.exception("Rendering %s", rendered)
+        rendered.status = 'failed'
+        rendered.error = str(e)
+        rendered.save(update_fields=['status', 'error'])
+        return rendered
+
+    rendered.status = 'ready'
+    rendered.error = ''
+    rendered.rendered_at = timezone.now()
+    with transaction.atomic():
+        rendered.save(update_fields=['pdf', 'status', 'error', 'rendered_at'])
+        RenderedReport.objects.filter(kind=rendered.kind, report_id=rendered.report_id).exclude(
+            pk=rendered.pk
+        ).delete()
+    return rendered
+
+
+def _run_in_worker(rendered_id):
+    close_old_connections()
+    try:
+        render_now(rendered_id)
+    finally:
+        close_old_connections()
+
+
+def _submit(rendered_id):
+    global _executor
+    if settings.REPORT_RENDER_WORKERS <= 0:
+        render_now(rendered_id)
+        return
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.REPORT_RENDER_WORKERS, thread_name_prefix='report-render'
+        )
+    _executor.submit(_run_in_worker, rendered_id)
+
+
+def request_render(kind, report_id, digest):
+    """The RenderedReport for this content, queueing a render if there is none yet (or it failed)"""
+    rendered = RenderedReport.objects.filter(kind=kind, report_id=report_id, content_hash=digest).first()
+    if rendered is None:
+        try:
+            with transaction.atomic():
+                rendered = RenderedReport.objects.create(kind=kind, report_id=report_id, content_hash=digest)
+        except IntegrityError:
+            # Another request queued the same render first
+            return RenderedReport.objects.get(kind=kind, report_id=report_id, content_hash=digest)
+    elif rendered.status == 'failed':
+        rendered.status = 'pending'
+        rendered.save(update_fields=['status'])
+    else:
+        return rendered
+
+    transaction.on_commit(lambda: _submit(rendered.pk))
+    if settings.REPORT_RENDER_WORKERS <= 0:
+        # Rendered inline if there was no transaction to wait for
+        rendered.refresh_from_db()
+    return rendered
+
+
+def pdf_response(request, kind, report, filename):
+    """
+    The report's PDF with the content hash as its ETag: 304 when the client
+    already has it, 202 while it is being rendered.
+    """
+    digest = content_hash(RENDERERS[kind][1](report))
+    etag = f'"{digest}"'
+    if etag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', '')):
+        response = HttpResponseNotModified()
+        response['ETag'] = etag
+        return response
+
+    rendered = request_render(kind, report.pk, digest)
+    if rendered.status != 'ready':
+        response = JsonResponse({'status': rendered.status, 'detail': 'The PDF is being rendered, retry shortly'},
+                                status=202)
+        response['Retry-After'] = '2'
+        return response
+
+    response = HttpResponse(bytes(rendered.pdf), content_type='application/pdf')
+    response['ETag'] = etag
+    # Let clients keep a copy but revalidate it, which costs a 304
+    response['Cache-Control'] = 'private, no-cache'
+    response['Content-Disposition'] = f'attachment; filename="{filename}.pdf"'
+    return response
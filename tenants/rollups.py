@@ -0,0 +1,155 @@
+"""
+Incremental monthly financial rollups.
+
+Each completed payment adds its amount to the (edir, month, 'income',
+payment_type) row of FinancialRollup, and each expense to the (edir, month,
+'expense', 'event' | 'operational') row. Signals apply the difference between
+a row's previous and new contribution on every save and delete, so reports
+over many years read O(months) rollup rows instead of every transaction.
+QuerySet.update(), bulk_update() and bulk_create() skip those signals, so
+Payment and Expense use RollupQuerySet, which applies the same differences
+for them. Raw SQL still bypasses both: run check_financial_rollups --fix
+after any. Archiving does not touch rollups: archived rows still count.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncMonth
+
+from .models import ArchivedPayment, Expense, FinancialRollup, Payment
+
+
+def _month(day):
+    return day.replace(day=1)
+
+
+def payment_bucket(payment):
+    """(edir_id, month, kind, category, amount) a payment contributes, or None"""
+    if payment.status != 'completed' or not payment.payment_date:
+        return None
+    return (payment.edir_id, _month(payment.payment_date), 'income', payment.payment_type, payment.amount)
+
+
+def expense_bucket(expense):
+    if not expense.spent_date:
+        return None
+    category = 'event' if expense.event_id else 'operational'
+    return (expense.edir_id, _month(expense.spent_date), 'expense', category, expense.amount)
+
+
+BUCKETS = {
+    Payment: payment_bucket,
+    Expense: expense_bucket,
+}
+
+
+def _apply(key, total, count):
+    edir_id, month, kind, category = key
+    rollup, _ = FinancialRollup.objects.get_or_create(
+        edir_id=edir_id, month=month, kind=kind, category=category
+    )
+    FinancialRollup.objects.filter(pk=rollup.pk).update(
+        total=F('total') + total,
+        count=F('count') + count,
+    )
+
+
+def apply_changes(changes):
+    """
+    Move each row's contribution from its old bucket to its new one, for
+    (old_bucket, new_bucket) pairs; one update per rollup row touched.
+    """
+    deltas = defaultdict(lambda: [Decimal('0'), 0])
+    for old_bucket, new_bucket in changes:
+        if old_bucket == new_bucket:
+            continue
+        for bucket, sign in ((old_bucket, -1), (new_bucket, 1)):
+            if bucket:
+                entry = deltas[bucket[:4]]
+                entry[0] += sign * Decimal(str(bucket[4]))
+                entry[1] += sign
+    if not deltas:
+        return
+    with transaction.atomic():
+        for key, (total, count) in sorted(deltas.items()):
+            if total or count:
+                _apply(key, total, count)
+
+
+def apply_change(old_bucket, new_bucket):
+    """Move a row's contribution from its old bucket to its new one"""
+    apply_changes([(old_bucket, new_bucket)])
+
+
+def rows_by_pk(model, pks, chunk_size=2000):
+    """{pk: row} for the given payment or expense ids, fetched a chunk at a time"""
+    rows = {}
+    for start in range(0, len(pks), chunk_size):
+        rows.update((row.pk, row) for row in model._base_manager.filter(pk__in=pks[start:start + chunk_size]))
+    return rows
+
+
+def expected_rollups(edir):
+    """
+    Full recompute from raw rows (live and archived), keyed like the rollup
+    table: {(month, kind, category): (total, count)}.
+    """
+    expected = defaultdict(lambda: [Decimal('0'), 0])
+
+    for model in (Payment, ArchivedPayment):
+        rows = (
+            model.objects.filter(edir=edir, status='completed', payment_date__isnull=False)
+            .annotate(month=TruncMonth('payment_date'))
+            .values('month', 'payment_type')
+            .order_by()
+            .annotate(total=Sum('amount'), count=Count('id'))
+        )
+        for row in rows:
+            entry = expected[(row['month'], 'income', row['payment_type'])]
+            entry[0] += row['total']
+            entry[1] += row['count']
+
+    rows = (
+        Expense.objects.filter(edir=edir)
+        .annotate(month=TruncMonth('spent_date'))
+        .values('month', 'event_id')
+        .order_by()
+        .annotate(total=Sum('amount'), count=Count('id'))
+    )
+    for row in rows:
+        category = 'event' if row['event_id'] else 'operational'
+        entry = expected[(row['month'], 'expense', category)]
+        entry[0] += row['total']
+        entry[1] += row['count']
+
+    return {key: (total, count) for key, (total, count) in expected.items()}
+
+
+def stored_rollups(edir):
+    return {
+        (r.month, r.kind, r.category): (r.total, r.count)
+        for r in FinancialRollup.objects.filter(edir=edir)
+        if r.count or r.total
+    }
+
+
+def rollup_differences(edir):
+    """[(key, stored, expected)] for every bucket where rollups disagree with a recompute"""
+    stored = stored_rollups(edir)
+    expected = expected_rollups(edir)
+    return [
+        (key, stored.get(key), expected.get(key))
+        for key in sorted(set(stored) | set(expected))
+        if stored.get(key) != expected.get(key)
+    ]
+
+
+def rebuild_rollups(edir):
+    with transaction.atomic():
+        FinancialRollup.objects.filter(edir=edir).delete()
+        FinancialRollup.objects.bulk_create([
+            FinancialRollup(edir=edir, month=month, kind=kind, category=category, total=total, count=count)
+            for (month, kind, category), (total, count) in expected_rollups(edir).items()
+        ])
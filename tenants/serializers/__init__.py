@@ -10,7 +10,8 @@ from .member_serializers import (
     RepresentativeSerializer,
     UserLoginSerializer,
     MemberSerializer,
-    MemberDetailSerializer
+    MemberDetailSerializer,
+    DeviceSerializer
 )
 from .event_serializers import (
     EventSerializer,
@@ -31,11 +32,11 @@ from .resource_serializers import (
 from .financial_serializers import (
     PaymentSerializer,
     PenaltySerializer,
-  
+    PenaltyRuleSerializer,
     FinancialReportSerializer
 )
 
-from .reminder_serializers import   ReminderSerializer
+from .reminder_serializers import   ReminderSerializer, ReminderDeliverySerializer
 
 from .others_serializers import( EmergencyRequestSerializer, MemberFeedbackSerializer, MemorialSerializer)
 
@@ -52,6 +53,7 @@ __all__ = [
     'UserLoginSerializer',
     'MemberSerializer',
     'MemberDetailSerializer',
+    'DeviceSerializer',
     
     # Event related
     'EventSerializer',
@@ -72,7 +74,9 @@ __all__ = [
     # Financial related
     'PaymentSerializer',
     'PenaltySerializer',
+    'PenaltyRuleSerializer',
     'ReminderSerializer',
+    'ReminderDeliverySerializer',
     'FinancialReportSerializer',
     
     # Others related
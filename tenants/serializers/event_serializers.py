@@ -50,4 +50,5 @@ class EventReportSerializer(serializers.ModelSerializer):
         fields = ['id', 'event', 'event_title', 'prepared_by', 'prepared_by_name',
                  'attendance_summary', 'financial_summary', 'notes',
                  'created_at', 'updated_at']
-        read_only_fields = ['id', 'created_at', 'updated_at', 'event', 'prepared_by']
\ No newline at end of file
+        read_only_fields = ['id', 'created_at', 'updated_at', 'event', 'prepared_by',
+                            'attendance_summary', 'financial_summary']
\ No newline at end of file
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from ..models import Payment, Penalty, Reminder, FinancialReport
+from ..models import Payment, Penalty, PenaltyRule, Reminder, FinancialReport
 
 class PaymentSerializer(serializers.ModelSerializer):
     member_name = serializers.CharField(source='member.full_name', read_only=True)
@@ -21,7 +21,30 @@ class PenaltySerializer(serializers.ModelSerializer):
     class Meta:
         model = Penalty
         fields = '__all__'
-        read_only_fields = ('created_at', 'updated_at','edir')
+        read_only_fields = ('created_at', 'updated_at','edir', 'rule', 'source_key')
+
+class PenaltyRuleSerializer(serializers.ModelSerializer):
+    penalty_type_display = serializers.CharField(source='get_penalty_type_display', read_only=True)
+
+    class Meta:
+        model = PenaltyRule
+        fields = '__all__'
+        read_only_fields = ('created_at', 'updated_at', 'edir')
+        extra_kwargs = {
+            'max_outstanding': {'min_value': 0},
+        }
+
+    def validate(self, data):
+        # Checked here rather than left to unique_together so updates fail with a 400 too
+        penalty_type = data.get('penalty_type')
+        if penalty_type is not None:
+            edir = self.instance.edir if self.instance else self.context['view'].get_edir()
+            rules = PenaltyRule.objects.filter(edir=edir, penalty_type=penalty_type)
+            if self.instance:
+                rules = rules.exclude(pk=self.instance.pk)
+            if rules.exists():
+                raise serializers.ValidationError({'penalty_type': 'This edir already has a rule of this type.'})
+        return data
 
 class FinancialReportSerializer(serializers.ModelSerializer):
     edir_name = serializers.CharField(source='edir.name', read_only=True)
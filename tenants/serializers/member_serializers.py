@@ -6,7 +6,7 @@ from django.contrib.auth.models import update_last_login
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.utils.translation import gettext_lazy as _
 from django.core.validators import MinValueValidator
-from ..models import Member, Spouse, FamilyMember, Representative
+from ..models import Member, Spouse, FamilyMember, Representative, Device
 from .edir_serializers import EdirSerializer
 User = get_user_model()
 
@@ -310,4 +310,13 @@ class MemberUpdateSerializer(serializers.ModelSerializer):
             for rep_data in representatives_data:
                 Representative.objects.create(member=instance, **rep_data)
         
-        return instance
\ No newline at end of file
+        return instance
+
+
+class DeviceSerializer(serializers.ModelSerializer):
+    token = serializers.CharField(max_length=255)
+
+    class Meta:
+        model = Device
+        fields = ['id', 'token', 'platform', 'last_seen', 'failure_count', 'created_at']
+        read_only_fields = ['last_seen', 'failure_count', 'created_at']
@@ -1,6 +1,6 @@
 # serializers.py
 from rest_framework import serializers
-from ..models import Reminder
+from ..models import Reminder, ReminderDelivery
 
 class ReminderSerializer(serializers.ModelSerializer):
     reminder_type_display = serializers.CharField(source='get_reminder_type_display', read_only=True)
@@ -8,6 +8,7 @@ class ReminderSerializer(serializers.ModelSerializer):
     channel_display = serializers.CharField(source='get_channel_display', read_only=True)
     created_by_name = serializers.CharField(source='created_by.get_full_name', read_only=True)
     edir_name = serializers.CharField(source='edir.name', read_only=True)
+    delivery_summary = serializers.SerializerMethodField()
     
     class Meta:
         model = Reminder
@@ -15,6 +16,63 @@ class ReminderSerializer(serializers.ModelSerializer):
             'id', 'edir', 'edir_name', 'reminder_type', 'reminder_type_display',
             'subject', 'message', 'scheduled_time', 'status', 'status_display',
             'channel', 'channel_display', 'created_at', 'sent_at', 'related_event',
-            'related_payment', 'created_by', 'created_by_name', 'recipients'
+            'related_payment', 'created_by', 'created_by_name', 'recipients',
+            'channel_progress', 'delivery_summary', 'dispatch_started_at', 'recurrence', 'recurs_until',
+            'audience', 'audience_period', 'audience_role', 'audience_task_group',
+            'sms_message', 'sms_segments', 'urgent'
         ]
-        read_only_fields = ['created_at', 'sent_at', 'status','edir']
\ No newline at end of file
+        read_only_fields = ['created_at', 'sent_at', 'status','edir']
+
+    def get_delivery_summary(self, obj):
+        """Delivery totals over all channels, from the counts the dispatcher keeps"""
+        totals = {'sent': 0, 'failed': 0, 'skipped': 0, 'held': 0}
+        for entry in obj.channel_progress.values():
+            for key in totals:
+                totals[key] += entry.get(key, 0)
+        return totals
+
+    def validate(self, data):
+        scheduled_time = data.get('scheduled_time', getattr(self.instance, 'scheduled_time', None))
+        recurs_until = data.get('recurs_until')
+        if recurs_until and scheduled_time and recurs_until < scheduled_time:
+            raise serializers.ValidationError({'recurs_until': 'Must not be before the scheduled time.'})
+
+        def current(field):
+            return data[field] if field in data else getattr(self.instance, field, None)
+
+        audience = current('audience') or ''
+        required = {
+            'event_attendees': 'related_event',
+            'task_group': 'audience_task_group',
+            'role': 'audience_role',
+        }.get(audience)
+        if required and not current(required):
+            raise serializers.ValidationError({required: f'Required for the {audience} audience.'})
+        if audience and data.get('recipients'):
+            raise serializers.ValidationError({'recipients': 'Leave empty when an audience is set.'})
+        if not audience and self.instance is None and not data.get('recipients'):
+            raise serializers.ValidationError({'recipients': 'Select recipients or an audience.'})
+        if data.get('audience_period'):
+            data['audience_period'] = data['audience_period'].replace(day=1)
+
+        # The audience resolvers only look within the reminder's edir, so a reference
+        # to another edir's event or group would quietly reach nobody
+        edir = self.instance.edir if self.instance else self.context['view'].get_edir()
+        for field in ('related_event', 'related_payment', 'audience_task_group'):
+            if data.get(field) is not None and data[field].edir_id != edir.pk:
+                raise serializers.ValidationError({field: 'Must belong to this edir.'})
+        if any(member.edir_id != edir.pk for member in data.get('recipients') or ()):
+            raise serializers.ValidationError({'recipients': 'Recipients must be members of this edir.'})
+        return data
+
+
+class ReminderDeliverySerializer(serializers.ModelSerializer):
+    member_name = serializers.CharField(source='member.full_name', read_only=True)
+
+    class Meta:
+        model = ReminderDelivery
+        fields = [
+            'id', 'member', 'member_name', 'channel', 'status', 'provider_id',
+            'attempts', 'last_error', 'updated_at'
+        ]
+        read_only_fields = fields
@@ -0,0 +1,99 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+
+from .archive import is_archiving
+from .contacts import CONTACT_FIELDS, sync_contact
+from .models import (
+    Contribution, Edir, Event, Expense, Member, Payment, Penalty, Reminder, Resource, ResourceAllocation,
+    ResourceUsage, Task, TaskGroup,
+)
+from .rollups import BUCKETS, apply_change
+
+FINANCIAL_MODELS = (Payment, Expense, Contribution, Penalty)
+
+
+def bump_edir_data_version(sender, instance, **kwargs):
+    """Any financial write makes cached reports for that edir stale"""
+    if is_archiving():
+        return
+    Edir.bump_data_version(instance.edir_id)
+
+
+def bump_edir_resource_version(sender, instance, **kwargs):
+    """Resource, allocation and usage writes make cached resource reports stale"""
+    if is_archiving():
+        return
+    if sender is Resource:
+        Edir.bump_resource_version(pk=instance.edir_id)
+    elif sender is ResourceAllocation:
+        Edir.bump_resource_version(resources__id=instance.resource_id)
+    else:
+        Edir.bump_resource_version(resources__allocations__id=instance.allocation_id)
+
+
+def bump_edir_activity_version(sender, instance, **kwargs):
+    """Member, event, task and reminder writes make cached dashboards stale"""
+    if is_archiving():
+        return
+    if isinstance(instance, Task):
+        Edir.bump_activity_version(taskgroup__id=instance.task_group_id)
+    else:
+        Edir.bump_activity_version(pk=instance.edir_id)
+
+
+def bump_edir_activity_version_on_m2m(sender, instance, action, **kwargs):
+    """Task assignees and reminder recipients are shown on dashboards too"""
+    # `instance` is a Member when the change is made from the reverse side
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        bump_edir_activity_version(type(instance), instance)
+
+
+def update_member_contact(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Keep the contact directory in step with the member's phone, email and push token"""
+    if raw or (update_fields and not set(update_fields) & set(CONTACT_FIELDS)):
+        return
+    sync_contact(instance)
+
+
+def remember_rollup_bucket(sender, instance, raw=False, **kwargs):
+    """Capture what the row contributed before this save, from the database"""
+    if raw:
+        return
+    previous = sender.objects.filter(pk=instance.pk).first() if instance.pk else None
+    instance._rollup_bucket = BUCKETS[sender](previous) if previous else None
+
+
+def update_rollups_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    apply_change(getattr(instance, '_rollup_bucket', None), BUCKETS[sender](instance))
+    instance._rollup_bucket = None
+
+
+def update_rollups_on_delete(sender, instance, **kwargs):
+    # Archived rows still count towards their month
+    if is_archiving():
+        return
+    apply_change(BUCKETS[sender](instance), None)
+
+
+for model in FINANCIAL_MODELS:
+    post_save.connect(bump_edir_data_version, sender=model)
+    post_delete.connect(bump_edir_data_version, sender=model)
+
+for model in (Resource, ResourceAllocation, ResourceUsage):
+    post_save.connect(bump_edir_resource_version, sender=model)
+    post_delete.connect(bump_edir_resource_version, sender=model)
+
+for model in (Member, Event, TaskGroup, Task, Reminder):
+    post_save.connect(bump_edir_activity_version, sender=model)
+    post_delete.connect(bump_edir_activity_version, sender=model)
+
+post_save.connect(update_member_contact, sender=Member)
+
+for through in (Task.assigned_to.through, Reminder.recipients.through):
+    m2m_changed.connect(bump_edir_activity_version_on_m2m, sender=through)
+
+for model in BUCKETS:
+    pre_save.connect(remember_rollup_bucket, sender=model)
+    post_save.connect(update_rollups_on_save, sender=model)
+    post_delete.connect(update_rollups_on_delete, sender=model)
@@ -0,0 +1,95 @@
+"""
+SMS sending through Twilio.
+
+Numbers are expected in E.164 form, as kept in the member contact directory
+(contacts.py). Messages are sent from SMS_CONCURRENCY threads, each taking a token from a process-wide bucket
+refilled at SMS_RATE_PER_SECOND (the account's throughput), and transient
+failures (429, 5xx, connection errors) are retried with back-off. Every
+message's outcome, including its Twilio SID, is returned to the caller.
+"""
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.conf import settings
+from twilio.base.exceptions import TwilioRestException
+from twilio.rest import Client
+
+logger = logging.getLogger(__name__)
+
+
+class _TokenBucket:
+    """Allows `rate` acquisitions per second on average and bursts of up to `capacity`"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tokens = None
+        self._updated = None
+
+    def acquire(self, rate, capacity):
+        if not rate:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if self._tokens is None:
+                    self._tokens, self._updated = capacity, now
+                self._tokens = min(capacity, self._tokens + (now - self._updated) * rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / rate
+            time.sleep(wait)
+
+
+_bucket = _TokenBucket()
+_clients = threading.local()
+
+
+def _client():
+    """A Twilio client per thread, as its HTTP session is not shared safely"""
+    client = getattr(_clients, 'client', None)
+    if client is None:
+        client = Client(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN)
+        if settings.TWILIO_API_URL:
+            client.api.base_url = settings.TWILIO_API_URL
+        _clients.client = client
+    return client
+
+
+def _is_transient(error):
+    if isinstance(error, TwilioRestException):
+        return error.status == 429 or error.status >= 500
+    return isinstance(error, requests.RequestException)
+
+
+def _send_one(to, body):
+    result = {'to': to, 'sid': '', 'status': 'failed', 'error': '', 'attempts': 0}
+    while True:
+        _bucket.acquire(settings.SMS_RATE_PER_SECOND, settings.SMS_BURST)
+        result['attempts'] += 1
+        try:
+            message = _client().messages.create(body=body, from_=settings.TWILIO_PHONE_NUMBER, to=to)
+        except Exception as e:
+            result['error'] = str(e)
+            if not _is_transient(e) or result['attempts'] >= settings.SMS_MAX_ATTEMPTS:
+                logger.warning("SMS to %s failed after %s attempts: %s", to, result['attempts'], e)
+                return result
+            time.sleep(settings.SMS_RETRY_DELAY * 2 ** (result['attempts'] - 1))
+            continue
+        result.update(sid=message.sid, status='sent', error='')
+        return result
+
+
+def send_messages(messages):
+    """
+    Send (E.164 number, body) pairs and return one result dict per message,
+    in order: {'to', 'sid', 'status': 'sent'|'failed', 'error', 'attempts'}.
+    """
+    if not messages:
+        return []
+    with ThreadPoolExecutor(max_workers=settings.SMS_CONCURRENCY, thread_name_prefix='sms') as pool:
+        return list(pool.map(lambda message: _send_one(*message), messages))
@@ -0,0 +1,151 @@
+"""
+SMS encoding and segment counting.
+
+A message that only uses the GSM 03.38 alphabet is sent as GSM-7: 160
+characters in one segment, 153 per segment once it is split. Any other
+character, such as Ethiopic script, switches the whole message to UCS-2: 70
+UTF-16 units in one segment, 67 per segment after that. Each segment is
+billed on its own. build() picks the first text within SMS_SEGMENT_BUDGET
+from the message, its compact version and a GSM-7 transliteration.
+"""
+from functools import lru_cache
+
+from django.conf import settings
+
+GSM7_BASIC = frozenset(
+    "@£$¥èéùìòÇ\nØø\rÅåΔ_ΦΓΛΩΠΨΣΘΞÆæßÉ !\"#¤%&'()*+,-./0123456789:;<=>?"
+    "¡ABCDEFGHIJKLMNOPQRSTUVWXYZÄÖÑÜ§¿abcdefghijklmnopqrstuvwxyzäöñüà"
+)
+# Sent as an escape plus the character, so they take two septets
+GSM7_EXTENSION = frozenset("^{}\\[~]|€\f")
+
+GSM7_SINGLE, GSM7_MULTI = 160, 153
+UCS2_SINGLE, UCS2_MULTI = 70, 67
+
+# Characters phones and editors put in for plain punctuation
+GSM7_REPLACEMENTS = {
+    '\u00a0': ' ', '\u2002': ' ', '\u2003': ' ', '\u2009': ' ', '\t': ' ',
+    '\u2018': "'", '\u2019': "'", '\u201a': "'", '\u201b': "'",
+    '\u201c': '"', '\u201d': '"', '\u201e': '"',
+    '\u2013': '-', '\u2014': '-', '\u2212': '-', '\u2022': '-', '\u2026': '...',
+    # Ethiopic word space, full stop, comma, semicolon, colons, question mark, paragraph separator
+    '\u1361': ' ', '\u1362': '.', '\u1363': ',', '\u1364': ';', '\u1365': ':',
+    '\u1366': ':', '\u1367': '?', '\u1368': ' ',
+}
+# Ethiopic digits one to nine
+GSM7_REPLACEMENTS.update({chr(0x1369 + i): str(i + 1) for i in range(9)})
+
+# First code point of each Ethiopic consonant row and its Latin consonant
+ETHIOPIC_ROWS = {
+    0x1200: 'h', 0x1208: 'l', 0x1210: 'h', 0x1218: 'm', 0x1220: 's', 0x1228: 'r', 0x1230: 's',
+    0x1238: 'sh', 0x1240: 'q', 0x1250: 'q', 0x1260: 'b', 0x1268: 'v', 0x1270: 't', 0x1278: 'ch',
+    0x1280: 'h', 0x1290: 'n', 0x1298: 'ny', 0x12A0: '', 0x12A8: 'k', 0x12B8: 'kh', 0x12C8: 'w',
+    0x12D0: '', 0x12D8: 'z', 0x12E0: 'zh', 0x12E8: 'y', 0x12F0: 'd', 0x12F8: 'dd', 0x1300: 'j',
+    0x1308: 'g', 0x1318: 'gg', 0x1320: 't', 0x1328: 'ch', 0x1330: 'p', 0x1338: 'ts', 0x1340: 'ts',
+    0x1348: 'f', 0x1350: 'p',
+}
+# Rows holding only the labialized forms (qwe, qwi, qwa, ...) of the row before
+ETHIOPIC_LABIALIZED_ROWS = {0x1248: 'qw', 0x1258: 'qw', 0x1288: 'hw', 0x12B0: 'kw', 0x12C0: 'khw', 0x1310: 'gw'}
+# Vowel of each of the eight forms in a row; None is the sixth form, vowelless at the end of a word
+ETHIOPIC_VOWELS = ('e', 'u', 'i', 'a', 'e', None, 'o', 'wa')
+ETHIOPIC_LABIALIZED_VOWELS = ('e', '', 'i', 'a', 'e', None, '', '')
+# Rows carrying a bare vowel (a, u, i, ...)
+ETHIOPIC_VOWEL_VOWELS = ('a', 'u', 'i', 'a', 'e', 'i', 'o', 'wa')
+
+
+def is_gsm7(text):
+    return all(char in GSM7_BASIC or char in GSM7_EXTENSION for char in text)
+
+
+def encoding(text):
+    return 'GSM-7' if is_gsm7(text) else 'UCS-2'
+
+
+def _count(units, single, multi):
+    """Segments for `units` (the size of each character), never splitting a character"""
+    if sum(units) <= single:
+        return 1
+    segments, used = 1, 0
+    for size in units:
+        if used + size > multi:
+            segments, used = segments + 1, 0
+        used += size
+    return segments
+
+
+def segment_count(text):
+    if not text:
+        return 0
+    if is_gsm7(text):
+        return _count([2 if char in GSM7_EXTENSION else 1 for char in text], GSM7_SINGLE, GSM7_MULTI)
+    # Characters outside the Basic Multilingual Plane take a surrogate pair
+    return _count([2 if ord(char) > 0xFFFF else 1 for char in text], UCS2_SINGLE, UCS2_MULTI)
+
+
+def _ethiopic(char, word_ends):
+    code = ord(char)
+    row, form = code - (code - 0x1200) % 8, (code - 0x1200) % 8
+    if row in ETHIOPIC_LABIALIZED_ROWS:
+        consonant, vowel = ETHIOPIC_LABIALIZED_ROWS[row], ETHIOPIC_LABIALIZED_VOWELS[form]
+    elif row in ETHIOPIC_ROWS:
+        consonant = ETHIOPIC_ROWS[row]
+        vowel = (ETHIOPIC_VOWEL_VOWELS if not consonant else ETHIOPIC_VOWELS)[form]
+    else:
+        return None
+    if vowel is None:
+        vowel = '' if word_ends else 'i'
+    return consonant + vowel
+
+
+def transliterate(text):
+    """
+    `text` in the GSM-7 alphabet: Ethiopic syllables spelled in Latin
+    letters, typographic punctuation made plain and anything else left
+    without an equivalent replaced by '?'.
+    """
+    out = []
+    for index, char in enumerate(text):
+        if char in GSM7_BASIC or char in GSM7_EXTENSION:
+            out.append(char)
+        elif char in GSM7_REPLACEMENTS:
+            out.append(GSM7_REPLACEMENTS[char])
+        elif 0x1200 <= ord(char) <= 0x1357:
+            following = text[index + 1] if index + 1 < len(text) else ' '
+            latin = _ethiopic(char, word_ends=not 0x1200 <= ord(following) <= 0x1357)
+            out.append('?' if latin is None else latin)
+        else:
+            out.append('?')
+    return ''.join(out)
+
+
+@lru_cache(maxsize=1024)
+def _build(text, compact, budget):
+    candidates = [('original', text)]
+    if compact:
+        candidates.append(('compact', compact))
+    if not all(is_gsm7(candidate) for _, candidate in candidates):
+        shortest = min((candidate for _, candidate in candidates), key=len)
+        candidates.append(('transliterated', transliterate(shortest)))
+
+    options = [
+        {'text': candidate, 'variant': variant, 'encoding': encoding(candidate), 'segments': segment_count(candidate)}
+        for variant, candidate in candidates
+    ]
+    chosen = next(
+        (option for option in options if option['segments'] <= budget),
+        min(options, key=lambda option: option['segments']),
+    )
+    return dict(chosen, within_budget=chosen['segments'] <= budget)
+
+
+def build(text, compact='', budget=None):
+    """
+    The SMS to send for `text`: the first of the text itself, `compact` and
+    the transliteration of whichever of the two is shorter that fits in
+    `budget` segments (SMS_SEGMENT_BUDGET by default), or the one with the
+    fewest segments if none does. Returns {'text', 'variant':
+    'original'|'compact'|'transliterated', 'encoding', 'segments',
+    'within_budget'}.
+    """
+    # Messages rendered for many members are mostly identical, so the result is cached
+    return dict(_build(text, compact or '', budget or settings.SMS_SEGMENT_BUDGET))
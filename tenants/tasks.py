@@ -0,0 +1,31 @@
+"""
+Celery tasks. Celery is optional: without it the tasks are None and
+reminders and outbox emails are sent on in-process threads instead.
+"""
+try:
+    from celery import shared_task
+except ImportError:
+    shared_task = None
+
+
+if shared_task is not None:
+    @shared_task(acks_late=True, ignore_result=True)
+    def dispatch_reminder_task(reminder_id):
+        from .reminder_dispatch import dispatch_reminder
+        dispatch_reminder(reminder_id)
+
+    @shared_task(ignore_result=True)
+    def dispatch_due_reminders_task():
+        from .reminder_dispatch import dispatch_due, flush_digests, requeue_expired
+        requeue_expired()
+        dispatch_due()
+        flush_digests()
+
+    @shared_task(ignore_result=True)
+    def flush_outbox_task():
+        from .outbox import flush_outbox
+        flush_outbox()
+else:
+    dispatch_reminder_task = None
+    dispatch_due_reminders_task = None
+    flush_outbox_task = None
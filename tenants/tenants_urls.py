@@ -11,13 +11,17 @@ from .views import (
     UserLoginAPIView, 
     MemberRegistrationViewSet,
     MemberViewSet,
-    ResourceViewSet, ResourceAllocationViewSet, ResourceUsageViewSet,PaymentViewSet, PenaltyViewSet, ReminderViewSet, FinancialReportViewSet,
-    EmergencyRequestViewSet ,MemberFeedbackViewSet ,MemorialViewSet
+    DeviceViewSet,
+    ResourceViewSet, ResourceAllocationViewSet, ResourceUsageViewSet,PaymentViewSet, PenaltyViewSet, PenaltyRuleViewSet, ReminderViewSet, FinancialReportViewSet,
+    EmergencyRequestViewSet ,MemberFeedbackViewSet ,MemorialViewSet,
+    resource_utilization_report, resource_maintenance_report, resource_maintenance_upcoming,
+    dashboard,
 
 )
 
 router = DefaultRouter()
 router.register(r'members', MemberViewSet, basename='member')
+router.register(r'devices', DeviceViewSet, basename='device')
 member_register = MemberRegistrationViewSet.as_view({'post': 'create'})
 
 # Event-related URLs
@@ -41,6 +45,7 @@ router.register(r'resource-usage', ResourceUsageViewSet, basename='resourceusage
 #financial URLs
 router.register(r'payments', PaymentViewSet, basename='payment')
 router.register(r'penalties', PenaltyViewSet, basename='penalty')
+router.register(r'penalty-rules', PenaltyRuleViewSet, basename='penalty-rule')
 router.register(r'reminders', ReminderViewSet, basename='reminder')
 router.register(r'financial-reports', FinancialReportViewSet, basename='financialreport')
 
@@ -52,6 +57,7 @@ router.register(r'memorials', MemorialViewSet, basename='memorial')
 
 urlpatterns = [
     path('auth/login/', UserLoginAPIView.as_view(), name='edir-user-login'),
+    path('dashboard/', dashboard, name='dashboard'),
     path('members/create/', member_register, name='member-register'),
 
     path('reminders/send_monthly_reminders/', 
@@ -61,6 +67,9 @@ urlpatterns = [
     path('members/request-password-reset/', MemberViewSet.as_view({'post': 'request_password_reset'}), name='request-password-reset'),
     path('members/reset-password/', MemberViewSet.as_view({'post': 'reset_password'}), name='reset-password'),
     path('tasks/my-assigned/', TaskViewSet.as_view({'get': 'my_assigned_tasks'}), name='my-assigned-tasks'),
+    path('resources/utilization-report/', resource_utilization_report, name='resource-utilization-report'),
+    path('resources/maintenance-report/', resource_maintenance_report, name='resource-maintenance-report'),
+    path('resources/maintenance-upcoming/', resource_maintenance_upcoming, name='resource-maintenance-upcoming'),
     path('tasks/<int:id>/completed/', TaskViewSet.as_view({'post': 'completed'}), name='completed'),
 
 
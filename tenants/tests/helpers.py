@@ -0,0 +1,51 @@
+import asyncio
+import threading
+from contextlib import contextmanager
+
+from aiohttp import web
+from django.utils import timezone
+
+from ..models import Edir, Event, Member, User
+
+
+def make_edir(name='alpha', members=3):
+    """An approved edir whose head is its first member, plus `members - 1` regular members"""
+    head = User.objects.create_user(username=f'head_{name}', password='x', email=f'{name}@example.com')
+    edir = Edir.objects.create(name=name, description='Test edir', approved=True, head=head)
+    people = [Member.objects.create(
+        user=head, edir=edir, full_name='Head', phone_number='0911000000', email=f'{name}@example.com',
+        address='a', city='c', state='s', zip_code='1', status='approved',
+    )]
+    for i in range(members - 1):
+        user = User.objects.create_user(username=f'{name}_m{i}', password='x', email=f'{name}{i}@example.com')
+        people.append(Member.objects.create(
+            user=user, edir=edir, full_name=f'Member {i}', phone_number=f'09110000{i:02d}',
+            email=f'{name}{i}@example.com', address='a', city='c', state='s', zip_code='1', status='approved',
+        ))
+    return edir, people
+
+
+def make_event(edir, member, **fields):
+    fields.setdefault('title', 'Meeting')
+    fields.setdefault('event_type', 'meeting')
+    fields.setdefault('start_date', timezone.now())
+    return Event.objects.create(edir=edir, location='Hall', created_by=member, **fields)
+
+
+@contextmanager
+def serve(app):
+    """Run an aiohttp app on a free local port from a background thread; yields its base URL"""
+    loop = asyncio.new_event_loop()
+    runner = web.AppRunner(app, access_log=None)
+    loop.run_until_complete(runner.setup())
+    loop.run_until_complete(web.TCPSite(runner, '127.0.0.1', 0).start())
+    host, port = runner.addresses[0][:2]
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    try:
+        yield f'http://{host}:{port}'
+    finally:
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.run_until_complete(runner.cleanup())
+        loop.close()
@@ -0,0 +1,51 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase
+from django.utils import timezone
+
+from .. import archive
+from ..models import ArchivedReminder, ArchivedReminderDelivery, Reminder, ReminderDelivery
+from .helpers import make_edir
+
+
+class ReminderArchiveTests(TestCase):
+
+    def setUp(self):
+        self.edir, self.members = make_edir('archive', members=4)
+        sent_at = timezone.now() - timedelta(days=400)
+        self.reminders = []
+        for i in range(3):
+            reminder = Reminder.objects.create(
+                edir=self.edir, reminder_type='other', subject=f'Reminder {i}', message='Hello',
+                channel='all', scheduled_time=sent_at, created_by=self.edir.head, status='sent', sent_at=sent_at,
+            )
+            reminder.recipients.set(self.members)
+            ReminderDelivery.objects.bulk_create([
+                ReminderDelivery(reminder=reminder, member=member, channel=channel, status='sent',
+                                 provider_id=f'SM{reminder.pk}{member.pk}', attempts=1)
+                for member in self.members for channel in ('sms', 'email')
+            ])
+            self.reminders.append(reminder)
+        self.live = list(ReminderDelivery.objects.order_by('pk').values(
+            'pk', 'reminder_id', 'member_id', 'channel', 'status', 'provider_id', 'attempts', 'updated_at'
+        ))
+
+    def test_delivery_logs_move_with_their_reminders(self):
+        # Small batches so the logs are copied across several of them
+        with mock.patch.object(archive, 'DELIVERY_BATCH', 5):
+            moved = archive.archive_before(timezone.localdate() - timedelta(days=30), batch_size=2)
+
+        self.assertEqual(moved['tenants.Reminder'], 3)
+        self.assertFalse(Reminder.objects.exists())
+        self.assertFalse(ReminderDelivery.objects.exists())
+        archived = list(ArchivedReminderDelivery.objects.order_by('pk').values(
+            'pk', 'reminder_id', 'member_id', 'channel', 'status', 'provider_id', 'attempts', 'updated_at'
+        ))
+        self.assertEqual(archived, self.live)
+        self.assertEqual(ArchivedReminder.objects.get(pk=self.reminders[0].pk).deliveries.count(), 8)
+
+    def test_dry_run_moves_nothing(self):
+        archive.archive_before(timezone.localdate() - timedelta(days=30), dry_run=True)
+        self.assertEqual(ReminderDelivery.objects.count(), len(self.live))
+        self.assertFalse(ArchivedReminderDelivery.objects.exists())
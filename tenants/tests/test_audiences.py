@@ -0,0 +1,103 @@
+from datetime import date
+from decimal import Decimal
+
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from ..audiences import audience_members, reaching
+from ..models import Attendance, Payment, Reminder, TaskGroup
+from .helpers import make_edir, make_event
+
+
+class AudienceTests(TestCase):
+
+    def setUp(self):
+        self.edir, self.members = make_edir('audience', members=5)
+        self.head = self.members[0]
+        self.other_edir, self.others = make_edir('other')
+
+    def _reminder(self, **fields):
+        return Reminder.objects.create(
+            edir=self.edir, reminder_type='other', subject='Hello', message='Hello',
+            channel='email', scheduled_time=timezone.now(), created_by=self.head.user, **fields,
+        )
+
+    def _resolve(self, reminder):
+        return sorted(audience_members(reminder).values_list('pk', flat=True))
+
+    def test_unpaid_members_for_the_period(self):
+        for member, payment_date, status in [
+            (self.members[1], date(2026, 5, 3), 'completed'),
+            (self.members[2], date(2026, 5, 20), 'pending'),
+            (self.members[3], date(2026, 4, 30), 'completed'),
+        ]:
+            Payment.objects.create(member=member, edir=self.edir, amount=Decimal('25.00'), payment_type='monthly',
+                                   status=status, payment_date=payment_date)
+        reminder = self._reminder(audience='unpaid', audience_period=date(2026, 5, 1))
+        self.assertEqual(self._resolve(reminder), [m.pk for m in self.members if m is not self.members[1]])
+
+    def test_event_attendees_task_groups_and_roles(self):
+        event = make_event(self.edir, self.head)
+        Attendance.objects.create(event=event, member=self.members[1], status='attending')
+        Attendance.objects.create(event=event, member=self.members[2], status='not_attending')
+        group = TaskGroup.objects.create(name='Kitchen', edir=self.edir, created_by=self.head)
+        group.members.set([self.members[3], self.members[4]])
+        self.members[2].role = 'TREASURER'
+        self.members[2].save()
+
+        attendees = self._reminder(audience='event_attendees', related_event=event)
+        kitchen = self._reminder(audience='task_group', audience_task_group=group)
+        treasurers = self._reminder(audience='role', audience_role='TREASURER')
+        listed = self._reminder()
+        listed.recipients.set([self.members[4]])
+
+        self.assertEqual(self._resolve(attendees), [self.members[1].pk])
+        self.assertEqual(self._resolve(kitchen), [self.members[3].pk, self.members[4].pk])
+        self.assertEqual(self._resolve(treasurers), [self.members[2].pk])
+        self.assertEqual(self._resolve(listed), [self.members[4].pk])
+
+        reached = Reminder.objects.filter(reaching(self.members[4])).distinct()
+        self.assertEqual(set(reached), {kitchen, listed})
+
+
+class ReminderAudienceValidationTests(TestCase):
+
+    def setUp(self):
+        self.edir, self.members = make_edir('audience')
+        self.other_edir, self.others = make_edir('other')
+        self.client = APIClient()
+        self.client.force_authenticate(self.members[0].user)
+        self.url = f'/api/{self.edir.slug}/reminders/'
+
+    def _post(self, **fields):
+        data = {'reminder_type': 'other', 'subject': 'Hello', 'message': 'Hello', 'channel': 'email',
+                'scheduled_time': timezone.now().isoformat(), **fields}
+        return self.client.post(self.url, data, format='json')
+
+    def test_references_to_another_edir_are_rejected(self):
+        event = make_event(self.other_edir, self.others[0])
+        group = TaskGroup.objects.create(name='Kitchen', edir=self.other_edir, created_by=self.others[0])
+
+        for fields, field in [
+            ({'audience': 'event_attendees', 'related_event': event.pk}, 'related_event'),
+            ({'audience': 'task_group', 'audience_task_group': group.pk}, 'audience_task_group'),
+            ({'recipients': [self.members[1].pk, self.others[1].pk]}, 'recipients'),
+        ]:
+            with self.assertLogs('django.request', 'WARNING'):
+                response = self._post(**fields)
+            self.assertEqual(response.status_code, 400)
+            self.assertIn(field, response.data)
+        self.assertFalse(Reminder.objects.exists())
+
+    def test_references_within_the_edir_are_accepted(self):
+        event = make_event(self.edir, self.members[0])
+        response = self._post(audience='event_attendees', related_event=event.pk)
+        self.assertEqual(response.status_code, 201, response.data)
+
+        reminder = Reminder.objects.get()
+        elsewhere = make_event(self.other_edir, self.others[0])
+        with self.assertLogs('django.request', 'WARNING'):
+            response = self.client.patch(f'{self.url}{reminder.pk}/', {'related_event': elsewhere.pk}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('related_event', response.data)
@@ -0,0 +1,81 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from ..models import Member, Payment, Resource, Task, TaskGroup, User
+from .helpers import make_edir, make_event
+
+
+class DashboardTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.edir, self.members = make_edir('dashboard')
+        self.head = self.members[0]
+        self.client = APIClient()
+        self.client.force_authenticate(self.head.user)
+        self.url = f'/api/{self.edir.slug}/dashboard/'
+        self.grow(1)
+
+    def grow(self, count):
+        """Add `count` members, each with payments, an event and an open task assigned to the head"""
+        start = Member.objects.filter(edir=self.edir).count()
+        group = TaskGroup.objects.create(name='Setup', edir=self.edir, created_by=self.head)
+        for i in range(start, start + count):
+            user = User.objects.create_user(username=f'dashboard_{i}', password='x')
+            member = Member.objects.create(
+                user=user, edir=self.edir, full_name=f'Member {i}', phone_number=f'0912{i:06d}',
+                address='a', city='c', state='s', zip_code='1', status='approved',
+            )
+            for status in ('completed', 'pending'):
+                Payment.objects.create(member=member, edir=self.edir, amount=Decimal('25.00'),
+                                       payment_type='monthly', status=status, payment_date=timezone.localdate())
+            make_event(self.edir, member, title=f'Event {i}', start_date=timezone.now() + timedelta(days=i + 1))
+            task = Task.objects.create(task_group=group, title=f'Task {i}', description='-', assigned_by=self.head,
+                                       due_date=timezone.now() + timedelta(days=1))
+            task.assigned_to.add(self.head, member)
+            Resource.objects.create(edir=self.edir, name=f'Chair {i}', category='equipment', quantity=10)
+
+    def _get(self, **headers):
+        return self.client.get(self.url, **headers)
+
+    def test_query_count_does_not_grow_with_the_edir(self):
+        with CaptureQueriesContext(connection) as small:
+            response = self._get()
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertLessEqual(len(small), 20)
+
+        self.grow(30)
+        cache.clear()
+        with self.assertNumQueries(len(small)):
+            response = self._get()
+        self.assertEqual(response.data['counts']['members'], 34)
+        self.assertEqual(response.data['counts']['my_open_tasks'], 31)
+        self.assertEqual(response.data['counts']['pending_payments'], 31)
+        self.assertEqual(len(response.data['upcoming_events']), 5)
+
+    def test_conditional_get(self):
+        response = self._get()
+        etag = response['ETag']
+        self.assertEqual(response['Cache-Control'], 'private, no-cache')
+
+        response = self._get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+        # Rebuilt with the same content, the ETag stays the same
+        cache.clear()
+        self.assertEqual(self._get(HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        Payment.objects.create(member=self.members[1], edir=self.edir, amount=Decimal('10.00'),
+                               payment_type='monthly', status='pending')
+        response = self._get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.data['counts']['pending_payments'], 2)
@@ -0,0 +1,81 @@
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+
+from .. import expo_push
+from ..management.commands.fake_expo import FakeExpo
+from ..models import Device, PushTicket
+from .helpers import make_edir, serve
+
+
+def _message(token):
+    return {'to': token, 'title': 'Meeting', 'body': 'Saturday at 10', 'sound': 'default'}
+
+
+class ExpoPushTests(TestCase):
+    """expo_push against a local stand-in for Expo's API (the fake_expo command)"""
+
+    def setUp(self):
+        self.fake = FakeExpo()
+        url = self.enterContext(serve(self.fake.app()))
+        self.enterContext(override_settings(EXPO_API_URL=url, EXPO_ACCESS_TOKEN=None, DEVICE_MAX_FAILURES=2))
+        self.edir, self.members = make_edir('push')
+
+    def _device(self, token, member=0):
+        return Device.objects.create(member=self.members[member], token=token, platform='android')
+
+    def test_messages_are_sent_in_chunks_of_100_with_tickets_in_order(self):
+        tokens = [f'ExponentPushToken[{i}]' for i in range(250)]
+        tickets = expo_push.send_messages([_message(token) for token in tokens])
+
+        self.assertEqual(sorted(count for _, count in self.fake.requests), [50, 100, 100])
+        self.assertEqual(len(tickets), 250)
+        self.assertEqual([self.fake.tickets[ticket['id']] for ticket in tickets], tokens)
+
+    def test_tickets_are_stored_and_unregistered_devices_pruned(self):
+        delivered = self._device('ExponentPushToken[ok]')
+        dead = self._device('ExponentPushToken[unregistered]', member=1)
+        results = expo_push.send_push([_message(delivered.token), _message(dead.token)])
+
+        self.assertEqual([result['status'] for result in results], ['sent', 'dead'])
+        self.assertEqual(results[1]['error'], 'DeviceNotRegistered')
+        self.assertEqual(list(PushTicket.objects.values_list('ticket_id', 'token')),
+                         [(results[0]['ticket_id'], delivered.token)])
+        self.assertEqual(list(Device.objects.values_list('token', flat=True)), [delivered.token])
+
+    def test_devices_failing_repeatedly_are_pruned(self):
+        device = self._device('ExponentPushToken[ratelimited]')
+        expo_push.send_push([_message(device.token)])
+        self.assertEqual(Device.objects.get(pk=device.pk).failure_count, 1)
+        expo_push.send_push([_message(device.token)])
+        self.assertFalse(Device.objects.filter(pk=device.pk).exists())
+
+    def test_receipts_prune_uninstalled_devices(self):
+        delivered = self._device('ExponentPushToken[ok]')
+        uninstalled = self._device('ExponentPushToken[uninstalled]', member=1)
+        expo_push.send_push([_message(delivered.token), _message(uninstalled.token)])
+        self.assertEqual(PushTicket.objects.count(), 2)
+
+        # Not due yet: receipts are only fetched EXPO_RECEIPT_DELAY after sending
+        self.assertEqual(expo_push.check_receipts()['checked'], 0)
+
+        summary = expo_push.check_receipts(min_age=timedelta(0))
+        self.assertEqual((summary['checked'], summary['ok'], summary['dead_tokens']), (2, 1, 1))
+        self.assertEqual(self.fake.requests[-1], ('/push/getReceipts', 2))
+        self.assertEqual(list(Device.objects.values_list('token', flat=True)), [delivered.token])
+        self.assertFalse(PushTicket.objects.exists())
+
+    def test_receipts_are_fetched_in_chunks(self):
+        PushTicket.objects.bulk_create([
+            PushTicket(ticket_id=f'ticket-{i}', token=f'ExponentPushToken[{i}]') for i in range(2500)
+        ])
+        summary = expo_push.check_receipts(min_age=timedelta(0))
+        self.assertEqual(sorted(count for _, count in self.fake.requests), [500, 1000, 1000])
+        # The stand-in has no receipts for these, so they are kept for the next check
+        self.assertEqual(summary['checked'], 0)
+        self.assertEqual(PushTicket.objects.count(), 2500)
+
+    def test_unreachable_server_fails_every_message(self):
+        with override_settings(EXPO_API_URL='http://127.0.0.1:9'):
+            tickets = expo_push.send_messages([_message('ExponentPushToken[a]'), _message('ExponentPushToken[b]')])
+        self.assertEqual([ticket['details']['error'] for ticket in tickets], ['RequestFailed', 'RequestFailed'])
@@ -0,0 +1,93 @@
+import csv
+import json
+import tracemalloc
+from decimal import Decimal
+
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from ..exports import stream_export
+from ..models import Payment
+from ..views import PaymentViewSet
+from .helpers import make_edir
+
+ROWS = 100_000
+CHUNK = 1000
+FIELDS = {'id': 'id', 'member': 'member__full_name', 'amount': 'amount', 'status': 'status'}
+
+
+class StreamingExportTests(TestCase):
+    """
+    The export is read a chunk at a time and written a row at a time, so the
+    memory it holds depends on the chunk size, not on how many rows there are.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.edir, members = make_edir('exports')
+        cls.head = members[0]
+        Payment.objects.bulk_create(
+            [
+                Payment(member=members[i % len(members)], edir=cls.edir, amount=Decimal('25.00'),
+                        payment_type='monthly', status='completed')
+                for i in range(ROWS)
+            ],
+            batch_size=5000,
+        )
+
+    def _stream(self, export_format='csv', rows=None):
+        queryset = Payment.objects.filter(edir=self.edir)
+        if rows is not None:
+            queryset = queryset.filter(pk__in=Payment.objects.filter(edir=self.edir).order_by('pk').values('pk')[:rows])
+        return iter(stream_export(queryset, FIELDS, 'payments', export_format, chunk_size=CHUNK).streaming_content)
+
+    def _peak(self, **kwargs):
+        """Lines exported and the peak traced memory while building and reading the export"""
+        tracemalloc.start()
+        try:
+            count = sum(1 for _ in self._stream(**kwargs))
+            return count, tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    def test_memory_stays_flat_as_rows_grow(self):
+        small_count, small_peak = self._peak(rows=ROWS // 20)
+        count, peak = self._peak()
+        self.assertEqual(small_count, ROWS // 20 + 1)
+        self.assertEqual(count, ROWS + 1)
+        # Twenty times the rows; a materialised export would need about twenty times the memory
+        self.assertLess(peak, small_peak * 2)
+        self.assertLess(peak, 5 * 1024 * 1024)
+
+    def test_first_rows_arrive_before_the_rest_are_read(self):
+        tracemalloc.start()
+        try:
+            lines = self._stream()
+            header, first = next(lines), next(lines)
+            held = tracemalloc.get_traced_memory()[0]
+        finally:
+            tracemalloc.stop()
+        self.assertEqual(header, b'id,member,amount,status\r\n')
+        self.assertTrue(first.endswith(b',Head,25.00,completed\r\n'), first)
+        # Only the first chunk has been fetched; all the rows would take several megabytes
+        self.assertLess(held, 1024 * 1024)
+
+    def test_ndjson_rows(self):
+        lines = self._stream('ndjson', rows=3)
+        rows = [json.loads(line) for line in lines]
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[0]['member'], 'Head')
+        self.assertEqual(rows[0]['amount'], '25.00')
+
+    @override_settings(EXPORT_CHUNK_SIZE=CHUNK)
+    def test_export_action_streams_every_row(self):
+        client = APIClient()
+        client.force_authenticate(self.head.user)
+        response = client.get(f'/api/{self.edir.slug}/payments/export/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertIn('attachment; filename="payments-', response['Content-Disposition'])
+
+        rows = csv.reader(line.decode() for line in response.streaming_content)
+        self.assertEqual(next(rows), list(PaymentViewSet.export_fields))
+        self.assertEqual(sum(1 for _ in rows), ROWS)
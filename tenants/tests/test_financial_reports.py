@@ -0,0 +1,99 @@
+from datetime import date
+from decimal import Decimal
+
+from django.db.models import Count, Sum
+from django.test import SimpleTestCase, TestCase
+
+from ..financial_reports import compute_report_data, split_period
+from ..models import Expense, FinancialRollup, Payment
+from .helpers import make_edir, make_event
+
+APRIL = date(2026, 4, 1)
+MAY = date(2026, 5, 1)
+JUNE = date(2026, 6, 1)
+
+
+class SplitPeriodTests(SimpleTestCase):
+
+    def test_whole_and_partial_months(self):
+        self.assertEqual(split_period(date(2026, 4, 15), date(2026, 7, 10)), (
+            (MAY, JUNE), [(date(2026, 4, 15), date(2026, 4, 30)), (date(2026, 7, 1), date(2026, 7, 10))],
+        ))
+        self.assertEqual(split_period(APRIL, date(2026, 6, 30)), ((APRIL, JUNE), []))
+        self.assertEqual(split_period(APRIL, date(2026, 5, 20)), ((APRIL, APRIL), [(MAY, date(2026, 5, 20))]))
+        # Shorter than a month, or spanning two partial ones
+        self.assertEqual(split_period(date(2026, 5, 3), date(2026, 5, 9)),
+                         (None, [(date(2026, 5, 3), date(2026, 5, 9))]))
+        self.assertEqual(split_period(date(2026, 4, 20), date(2026, 5, 10)),
+                         (None, [(date(2026, 4, 20), date(2026, 5, 10))]))
+
+
+class ReportDataTests(TestCase):
+
+    def setUp(self):
+        self.edir, self.members = make_edir('reports')
+        self.head = self.members[0]
+        event = make_event(self.edir, self.head)
+        for amount, payment_type, status, payment_date in [
+            ('10.00', 'monthly', 'completed', date(2026, 4, 5)),
+            ('20.00', 'monthly', 'completed', date(2026, 4, 20)),
+            ('30.00', 'penalty', 'completed', date(2026, 5, 1)),
+            ('40.00', 'monthly', 'completed', date(2026, 5, 31)),
+            ('50.00', 'monthly', 'pending', date(2026, 5, 15)),
+            ('60.00', 'donation', 'completed', date(2026, 6, 10)),
+            ('70.00', 'monthly', 'completed', date(2026, 7, 9)),
+            ('80.00', 'monthly', 'completed', date(2026, 7, 25)),
+        ]:
+            Payment.objects.create(member=self.head, edir=self.edir, amount=Decimal(amount),
+                                   payment_type=payment_type, status=status, payment_date=payment_date)
+        for amount, spent_date in [('5.00', date(2026, 4, 2)), ('15.00', date(2026, 4, 28)),
+                                   ('25.00', date(2026, 6, 30)), ('35.00', date(2026, 7, 20))]:
+            Expense.objects.create(edir=self.edir, event=event, description='Tent', amount=Decimal(amount),
+                                   spent_by=self.head, spent_date=spent_date)
+
+    def _raw(self, start, end):
+        """The report totals straight from the rows"""
+        income = Payment.objects.filter(edir=self.edir, status='completed',
+                                        payment_date__range=(start, end)).aggregate(total=Sum('amount'), count=Count('id'))
+        spent = Expense.objects.filter(edir=self.edir, spent_date__range=(start, end)).aggregate(
+            total=Sum('amount'), count=Count('id'))
+        return {
+            'income': float(income['total'] or 0),
+            'expenses': float(spent['total'] or 0),
+            'counts': {'payments': income['count'], 'expenses': spent['count']},
+        }
+
+    def test_rollups_and_raw_rows_add_up_to_the_raw_totals(self):
+        for start, end in [
+            (date(2026, 4, 15), date(2026, 7, 10)),
+            (APRIL, date(2026, 7, 31)),
+            (date(2026, 5, 1), date(2026, 5, 31)),
+            (date(2026, 4, 20), date(2026, 5, 1)),
+            (date(2026, 6, 30), date(2026, 7, 9)),
+        ]:
+            with self.subTest(start=start, end=end):
+                data = compute_report_data(self.edir, start, end)
+                self.assertEqual({key: data[key] for key in ('income', 'expenses', 'counts')}, self._raw(start, end))
+
+        data = compute_report_data(self.edir, date(2026, 4, 15), date(2026, 7, 10))
+        self.assertEqual(data['income_by_type'], {'contribution': 0.0, 'monthly': 130.0, 'penalty': 30.0,
+                                                  'donation': 60.0, 'other': 0.0})
+        self.assertEqual(data['months'], [
+            {'month': '2026-04', 'income': 20.0, 'expenses': 15.0, 'net': 5.0},
+            {'month': '2026-05', 'income': 70.0, 'expenses': 0.0, 'net': 70.0},
+            {'month': '2026-06', 'income': 60.0, 'expenses': 25.0, 'net': 35.0},
+            {'month': '2026-07', 'income': 70.0, 'expenses': 0.0, 'net': 70.0},
+        ])
+
+    def test_whole_months_come_from_the_rollups(self):
+        # Skew every stored total: only the whole months in the period pick it up
+        FinancialRollup.objects.filter(edir=self.edir, kind='income').update(total=Decimal('1000.00'))
+
+        data = compute_report_data(self.edir, date(2026, 4, 15), date(2026, 7, 10))
+        self.assertEqual([(month['month'], month['income']) for month in data['months']], [
+            ('2026-04', 20.0), ('2026-05', 2000.0), ('2026-06', 1000.0), ('2026-07', 70.0),
+        ])
+
+        # Event-scoped reports always read the rows
+        event_data = compute_report_data(self.edir, APRIL, date(2026, 7, 31), event_id=make_event(self.edir, self.head).pk)
+        self.assertEqual(event_data['income'], 0.0)
@@ -0,0 +1,134 @@
+import time
+
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.test import SimpleTestCase, override_settings
+
+from .. import mailer
+
+BACKEND = 'tenants.tests.test_mailer.SinkBackend'
+
+
+class SinkBackend(EmailBackend):
+    """
+    locmem backend that logs each connection it opens, with the messages sent
+    over it, and refuses mail to addresses in `failing` (address -> times to
+    refuse). `handshake` is the seconds an open takes, as an SMTP login would.
+    """
+    connections = []
+    failing = {}
+    handshake = 0.0
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.sent = None
+
+    def open(self):
+        if self.sent is not None:
+            return False
+        time.sleep(self.handshake)
+        self.sent = []
+        self.connections.append(self.sent)
+        return True
+
+    def close(self):
+        self.sent = None
+
+    def send_messages(self, messages):
+        # Like the SMTP backend: a call on a closed connection opens one just for it
+        opened = self.open()
+        try:
+            accepted = []
+            for message in messages:
+                address = message.to[0]
+                if self.failing.get(address):
+                    self.failing[address] -= 1
+                    raise ConnectionError(f'{address}: mailbox unavailable')
+                accepted.append(message)
+            self.sent.extend(message.to[0] for message in accepted)
+            return super().send_messages(accepted)
+        finally:
+            if opened:
+                self.close()
+
+
+@override_settings(EMAIL_BACKEND=BACKEND, MAIL_BATCH_SIZE=10, MAIL_RATE_PER_MINUTE=0, MAIL_RETRY_DELAY=0)
+class SendBulkTests(SimpleTestCase):
+
+    def setUp(self):
+        SinkBackend.connections = []
+        SinkBackend.failing = {}
+        SinkBackend.handshake = 0.0
+        mail.outbox = []
+
+    def _recipients(self, count):
+        return [(f'member{i}@example.com', {'full_name': f'Member {i}', 'edir_name': 'Bole Edir'})
+                for i in range(count)]
+
+    def test_each_recipient_gets_their_own_rendered_message(self):
+        messages = mailer.build_messages(
+            'Meeting for {{ edir_name }}', 'Dear {{ full_name }}, see you Saturday.', self._recipients(3),
+        )
+        result = mailer.send_bulk(messages)
+
+        self.assertEqual(result['sent'], 3)
+        self.assertEqual([message.to for message in mail.outbox], [[f'member{i}@example.com'] for i in range(3)])
+        self.assertEqual([message.body for message in mail.outbox],
+                         [f'Dear Member {i}, see you Saturday.' for i in range(3)])
+        self.assertEqual({message.subject for message in mail.outbox}, {'Meeting for Bole Edir'})
+
+    def test_only_known_placeholders_are_filled(self):
+        context = {'full_name': 'Abebe', 'edir_name': 'Bole Edir', 'user': 'secret'}
+        self.assertEqual(mailer.render('Dear {{full_name}} of {{ edir_name }}', context), 'Dear Abebe of Bole Edir')
+        for text in [
+            '{% debug %}',
+            '{{ user }} {{ full_name.upper }} {{ full_name|lower }}',
+            'Dues are {amount} birr {{ unfinished',
+            '{% if full_name %}x{% endif %}',
+        ]:
+            self.assertEqual(mailer.render(text, context), text)
+        self.assertEqual(mailer.render('Hi {{ full_name }}', {'full_name': None}), 'Hi ')
+
+    def test_connection_is_reopened_every_batch(self):
+        result = mailer.send_bulk(mailer.build_messages('Hi', 'Hello', self._recipients(25)))
+
+        self.assertEqual(result['sent'], 25)
+        self.assertEqual([len(sent) for sent in SinkBackend.connections], [10, 10, 5])
+
+    def test_only_failed_recipients_are_retried(self):
+        SinkBackend.failing = {'member3@example.com': 1, 'member7@example.com': 5}
+        with self.assertLogs('tenants.mailer', 'WARNING') as logs:
+            result = mailer.send_bulk(mailer.build_messages('Hi', 'Hello', self._recipients(12)))
+
+        self.assertEqual(result['attempts'], 3)
+        self.assertEqual(result['sent'], 11)
+        self.assertEqual(result['failed'], ['member7@example.com'])
+        self.assertEqual(len(logs.records), 5)
+        # The second pass goes to the two failures only, the third to the one still failing
+        first_pass = [f'member{i}@example.com' for i in range(12) if i not in (3, 7)]
+        self.assertEqual(SinkBackend.connections, [first_pass[:8], first_pass[8:], ['member3@example.com'], []])
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox),
+                         sorted(f'member{i}@example.com' for i in range(12) if i != 7))
+        self.assertEqual([r['attempts'] for r in result['results']], [1, 1, 1, 2, 1, 1, 1, 3, 1, 1, 1, 1])
+        self.assertEqual(result['results'][7]['status'], 'failed')
+        self.assertIn('mailbox unavailable', result['results'][7]['error'])
+
+    def test_bulk_send_beats_a_connection_per_message(self):
+        # Every connection costs 5ms, as an SMTP handshake and login would
+        SinkBackend.handshake = 0.005
+        messages = mailer.build_messages('Hi', 'Hello', self._recipients(100))
+
+        started = time.perf_counter()
+        for message in messages:
+            mail.send_mail(message.subject, message.body, message.from_email, message.to)
+        per_message = time.perf_counter() - started
+        self.assertEqual(len(SinkBackend.connections), 100)
+
+        SinkBackend.connections = []
+        started = time.perf_counter()
+        result = mailer.send_bulk(messages)
+        bulk = time.perf_counter() - started
+
+        self.assertEqual(result['sent'], 100)
+        self.assertEqual(len(SinkBackend.connections), 10)
+        self.assertLess(bulk, per_message / 3)
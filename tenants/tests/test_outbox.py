@@ -0,0 +1,94 @@
+from datetime import timedelta
+
+from django.core import mail
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .. import outbox
+from ..models import OutboxEmail
+from .helpers import make_edir
+from .test_mailer import BACKEND, SinkBackend
+
+
+@override_settings(
+    EMAIL_BACKEND=BACKEND, EMAIL_OUTBOX_BACKEND='inline', EMAIL_OUTBOX_MAX_ATTEMPTS=2,
+    MAIL_RATE_PER_MINUTE=0, MAIL_RETRY_DELAY=5,
+)
+class OutboxTests(TestCase):
+
+    def setUp(self):
+        SinkBackend.connections = []
+        SinkBackend.failing = {}
+        mail.outbox = []
+
+    def test_email_is_written_in_the_transaction_and_sent_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with transaction.atomic():
+                email = outbox.enqueue_email('Approved', 'Welcome', ['head@example.com'])
+                self.assertEqual(OutboxEmail.objects.get().status, 'pending')
+                self.assertEqual(len(mail.outbox), 0)
+
+        self.assertEqual(len(callbacks), 1)
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), ('sent', 1))
+        self.assertEqual([message.to for message in mail.outbox], [['head@example.com']])
+
+    def test_nothing_is_sent_for_a_rolled_back_change(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            try:
+                with transaction.atomic():
+                    outbox.enqueue_email('Approved', 'Welcome', ['head@example.com'])
+                    raise RuntimeError('approval failed')
+            except RuntimeError:
+                pass
+
+        self.assertEqual(callbacks, [])
+        self.assertFalse(OutboxEmail.objects.exists())
+        self.assertEqual(outbox.flush_outbox(), 0)
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_failed_emails_are_retried_with_back_off_then_given_up(self):
+        SinkBackend.failing = {'bounce@example.com': 5, 'flaky@example.com': 1}
+        for address in ('ok@example.com', 'flaky@example.com', 'bounce@example.com'):
+            OutboxEmail.objects.create(subject='Hi', body='Hello', from_email='edir@example.com', to=[address])
+        now = timezone.now()
+
+        with self.assertLogs('tenants', 'WARNING'):
+            self.assertEqual(outbox.flush_outbox(now), 1)
+        statuses = dict(OutboxEmail.objects.values_list('to__0', 'status'))
+        self.assertEqual(statuses, {'ok@example.com': 'sent', 'flaky@example.com': 'pending',
+                                    'bounce@example.com': 'pending'})
+        retry = OutboxEmail.objects.get(to__0='flaky@example.com')
+        self.assertEqual((retry.attempts, retry.available_at), (1, now + timedelta(seconds=5)))
+
+        # Not due yet
+        self.assertEqual(outbox.flush_outbox(now + timedelta(seconds=1)), 0)
+
+        with self.assertLogs('tenants', 'WARNING') as logs:
+            self.assertEqual(outbox.flush_outbox(now + timedelta(seconds=5)), 1)
+        self.assertTrue(any('Giving up on email' in line for line in logs.output))
+        statuses = dict(OutboxEmail.objects.values_list('to__0', 'status'))
+        self.assertEqual(statuses['flaky@example.com'], 'sent')
+        self.assertEqual(statuses['bounce@example.com'], 'failed')
+        self.assertIn('mailbox unavailable', OutboxEmail.objects.get(status='failed').last_error)
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox), ['flaky@example.com', 'ok@example.com'])
+
+    def test_member_update_emails_only_members_with_an_address(self):
+        edir, members = make_edir('outbox')
+        client = APIClient()
+        client.force_authenticate(members[1].user)
+        url = f'/api/{edir.slug}/members/{members[1].pk}/'
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client.patch(url, {'city': 'Adama'}, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual([message.to for message in mail.outbox], [[members[1].user.email]])
+
+        members[1].user.email = ''
+        members[1].user.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client.patch(url, {'city': 'Hawassa'}, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(OutboxEmail.objects.count(), 1)
@@ -0,0 +1,71 @@
+from datetime import date
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from ..financial_reports import get_payment_summary
+from ..models import Edir, Payment
+from .helpers import make_edir
+
+
+class PaymentSummaryTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.edir, self.members = make_edir('summary')
+        self.head = self.members[0]
+        for amount, payment_type, status, payment_date in [
+            ('100.00', 'monthly', 'completed', date(2026, 5, 10)),
+            ('40.00', 'monthly', 'completed', date(2026, 6, 2)),
+            # Completed without a date: no month, so no rollup row
+            ('25.00', 'donation', 'completed', None),
+            ('60.00', 'monthly', 'pending', None),
+            ('10.00', 'penalty', 'failed', date(2026, 6, 2)),
+        ]:
+            self._pay(amount, payment_type, status, payment_date)
+
+    def _pay(self, amount, payment_type='monthly', status='completed', payment_date=None):
+        return Payment.objects.create(
+            member=self.head, edir=self.edir, amount=Decimal(amount), payment_type=payment_type,
+            status=status, payment_date=payment_date,
+        )
+
+    def _summary(self):
+        client = APIClient()
+        client.force_authenticate(self.head.user)
+        response = client.get(f'/api/{self.edir.slug}/payments/summary/')
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data
+
+    def test_summary_counts_every_completed_payment(self):
+        summary = self._summary()
+        self.assertEqual((summary['total_payments'], summary['total_amount']), (3, 165.0))
+        self.assertEqual((summary['pending_payments'], summary['pending_amount']), (1, 60.0))
+        self.assertEqual((summary['failed_payments'], summary['refunded_payments']), (1, 0))
+        self.assertEqual(summary['by_type'], {
+            'donation': {'count': 1, 'amount': 25.0},
+            'monthly': {'count': 2, 'amount': 140.0},
+        })
+        self.assertEqual(summary['by_month'], [
+            {'month': '2026-05', 'count': 1, 'amount': 100.0},
+            {'month': '2026-06', 'count': 1, 'amount': 40.0},
+        ])
+
+    def test_summary_is_cached_until_a_payment_changes(self):
+        edir = Edir.objects.get(pk=self.edir.pk)
+        first = get_payment_summary(edir)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_payment_summary(edir), first)
+
+        pending = Payment.objects.get(status='pending')
+        pending.status = 'completed'
+        pending.save()
+        summary = self._summary()
+        self.assertEqual((summary['total_payments'], summary['total_amount']), (4, 225.0))
+        self.assertEqual(summary['pending_payments'], 0)
+
+        Payment.objects.filter(edir=self.edir, payment_type='donation').update(status='refunded')
+        summary = self._summary()
+        self.assertEqual((summary['total_payments'], summary['refunded_payments']), (3, 1))
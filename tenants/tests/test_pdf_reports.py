@@ -0,0 +1,70 @@
+import os
+import tempfile
+
+import fitz
+from django.test import SimpleTestCase, override_settings
+
+from ..pdf_reports import _font_chains, _runs, render_event_report, render_financial_report
+
+EVENT = {
+    'title': 'የቀብር ሥነ ሥርዓት',
+    'edir': 'Bole Edir',
+    'event_type': 'Bereavement',
+    'date': '2026-10-01 09:00',
+    'location': 'ቦሌ',
+    'prepared_by': 'አበበ በቀለ',
+    'attendance': {'attending': 12, 'by_status': {'attending': 12, 'absent': 3}},
+    'financial': {'contributions': 1500.0},
+    'notes': 'ስብሰባው በሰላም ተጠናቋል። Thanks to everyone who came.',
+}
+
+
+def _open(data):
+    doc = fitz.open(stream=data, filetype='pdf')
+    text = ''.join(page.get_text() for page in doc)
+    fonts = {font[3] for page in doc for font in page.get_fonts()}
+    return text, fonts
+
+
+class PdfFontTests(SimpleTestCase):
+
+    def test_ethiopic_and_latin_text_is_drawn(self):
+        text, fonts = _open(render_event_report(EVENT))
+        for value in ('የቀብር ሥነ ሥርዓት', 'አበበ በቀለ', 'ስብሰባው በሰላም ተጠናቋል።', 'Thanks to everyone who came.', 'Bole Edir'):
+            self.assertIn(value, text)
+        self.assertTrue(any('Ethiopic' in font for font in fonts), fonts)
+
+    def test_fonts_are_embedded_and_subset(self):
+        data = render_event_report(EVENT)
+        doc = fitz.open(stream=data, filetype='pdf')
+        for xref, *_ in doc[0].get_fonts():
+            self.assertTrue(doc.extract_font(xref)[3], "font is not embedded")
+        # The Ethiopic font alone is over 100 KB before subsetting
+        self.assertLess(len(data), 60_000)
+
+    def test_monthly_table_renders_ethiopic_titles(self):
+        content = {
+            'title': 'ወርሃዊ ሪፖርት', 'edir': 'Bole Edir', 'report_type': 'Monthly', 'period': '2026-09-01 to 2026-09-30',
+            'generated_by': 'ትዕግስት', 'generated_at': '2026-10-01 10:00', 'notes': '',
+            'data': {'total_income': 100.0, 'months': [{'month': '2026-09', 'income': 100.0, 'expenses': 40.0, 'net': 60.0}]},
+        }
+        text, _ = _open(render_financial_report(content))
+        self.assertIn('ወርሃዊ ሪፖርት', text)
+        self.assertIn('ትዕግስት', text)
+        self.assertIn('60.00', text)
+
+    def test_configured_font_is_drawn_first(self):
+        handle, path = tempfile.mkstemp(suffix='.otf')
+        with os.fdopen(handle, 'wb') as font_file:
+            font_file.write(fitz.Font(script=fitz.UCDN_SCRIPT_ETHIOPIC).buffer)
+        self.addCleanup(os.remove, path)
+
+        with override_settings(REPORT_PDF_FONT=path):
+            chains = _font_chains()
+            text, _ = _open(render_event_report(EVENT))
+        self.assertEqual(chains['text'][0].name, 'Noto Serif Ethiopic Regular')
+        self.assertEqual(chains['mono'][0].name, 'Courier')
+        # Latin the configured font has no glyphs for still falls back to Helvetica
+        self.assertEqual([font.name for font, _ in _runs('ሰላም Edir', chains['text'])],
+                         ['Noto Serif Ethiopic Regular', 'Helvetica'])
+        self.assertIn('Thanks to everyone who came.', text)
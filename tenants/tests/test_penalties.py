@@ -0,0 +1,137 @@
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .. import penalties
+from ..models import Attendance, Payment, Penalty, PenaltyRule
+from .helpers import make_edir, make_event
+
+TODAY = date(2026, 10, 19)
+
+
+class PenaltyEngineTests(TestCase):
+
+    def setUp(self):
+        self.edir, self.members = make_edir('penalties')
+        self.head, self.member = self.members[0], self.members[1]
+        self.rule = PenaltyRule.objects.create(
+            edir=self.edir, penalty_type='late_payment', amount=Decimal('50.00'), grace_days=7,
+            max_outstanding=Decimal('120.00'),
+        )
+
+    def _overdue(self, member, count, days_ago=30):
+        for i in range(count):
+            Payment.objects.create(
+                member=member, edir=self.edir, amount=Decimal('100.00'), payment_type='monthly',
+                status='pending', payment_date=TODAY - timedelta(days=days_ago + i),
+            )
+
+    def _amounts(self, member):
+        return sorted(Penalty.objects.filter(member=member).values_list('amount', flat=True))
+
+    def test_penalties_stop_at_the_rule_cap(self):
+        self._overdue(self.member, 4)
+        self._overdue(self.members[2], 1)
+        # Still within the grace period
+        self._overdue(self.members[2], 1, days_ago=3)
+
+        result = penalties.apply_penalties(self.edir, today=TODAY)
+
+        self.assertEqual((result['created'], result['capped']), (4, 1))
+        # 50 + 50, then the 20 left under the 120 cap
+        self.assertEqual(self._amounts(self.member), [Decimal('20.00'), Decimal('50.00'), Decimal('50.00')])
+        self.assertEqual(self._amounts(self.members[2]), [Decimal('50.00')])
+        penalty = Penalty.objects.filter(member=self.members[2]).get()
+        self.assertEqual((penalty.rule, penalty.due_date), (self.rule, TODAY + timedelta(days=14)))
+
+    def test_outstanding_penalties_count_towards_the_cap(self):
+        Penalty.objects.create(
+            member=self.member, edir=self.edir, penalty_type='late_payment', amount=Decimal('100.00'),
+            reason='Set by hand', due_date=TODAY,
+        )
+        self._overdue(self.member, 2)
+        result = penalties.apply_penalties(self.edir, today=TODAY)
+        self.assertEqual((result['created'], result['capped']), (1, 1))
+        self.assertEqual(self._amounts(self.member), [Decimal('20.00'), Decimal('100.00')])
+
+    def test_absences_are_penalized_once(self):
+        PenaltyRule.objects.create(edir=self.edir, penalty_type='absence', amount=Decimal('30.00'))
+        started = timezone.make_aware(datetime.combine(TODAY - timedelta(days=10), time(10)))
+        event = make_event(self.edir, self.head, start_date=started)
+        Attendance.objects.create(event=event, member=self.member, actual_attendance='absent')
+        Attendance.objects.create(event=event, member=self.members[2], actual_attendance='present')
+
+        result = penalties.apply_penalties(self.edir, today=TODAY)
+        self.assertEqual(result['created'], 1)
+        self.assertEqual(Penalty.objects.get().reason, f'Absent from Meeting on {started:%Y-%m-%d}')
+
+    def test_reruns_create_nothing_new(self):
+        self._overdue(self.member, 2)
+        # What a concurrent run would have computed before the first insert
+        stale = penalties.evaluate_edir(self.edir, TODAY)
+        self.assertEqual(penalties.apply_penalties(self.edir, today=TODAY)['created'], 2)
+
+        self.assertEqual(penalties.apply_penalties(self.edir, today=TODAY)['created'], 0)
+        # The (edir, source_key) constraint drops the duplicates that get as far as the insert
+        with mock.patch.object(penalties, 'evaluate_edir', return_value=stale):
+            self.assertEqual(penalties.apply_penalties(self.edir, today=TODAY)['created'], 0)
+        self.assertEqual(Penalty.objects.count(), 2)
+
+    def test_command_dry_run_writes_nothing(self):
+        self._overdue(self.member, 2)
+        self.edir.refresh_from_db()
+        version = self.edir.data_version
+        out = StringIO()
+        call_command('apply_penalties', '--dry-run', stdout=out)
+
+        self.assertFalse(Penalty.objects.exists())
+        self.edir.refresh_from_db()
+        self.assertEqual(self.edir.data_version, version)
+        self.assertIn(f'{self.edir.slug} member={self.member.pk} late_payment 50.00: Late monthly payment',
+                      out.getvalue())
+        self.assertIn('2 penalties would be created', out.getvalue())
+
+        call_command('apply_penalties', stdout=StringIO())
+        self.assertEqual(Penalty.objects.count(), 2)
+
+
+class EvaluateEndpointTests(TestCase):
+
+    def setUp(self):
+        self.edir, self.members = make_edir('evaluate')
+        PenaltyRule.objects.create(edir=self.edir, penalty_type='late_payment', amount=Decimal('50.00'))
+        Payment.objects.create(
+            member=self.members[1], edir=self.edir, amount=Decimal('100.00'), payment_type='monthly',
+            status='pending', payment_date=date(2026, 1, 1),
+        )
+        self.url = f'/api/{self.edir.slug}/penalties/evaluate/'
+
+    def _post(self, user, data=None):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client.post(self.url, data or {}, format='json')
+
+    def test_only_the_head_or_treasurer_can_evaluate(self):
+        _, others = make_edir('elsewhere')
+        with self.assertLogs('django.request', 'WARNING'):
+            self.assertEqual(self._post(self.members[1].user).status_code, 403)
+            self.assertEqual(self._post(others[0].user).status_code, 403)
+        self.assertFalse(Penalty.objects.exists())
+
+        response = self._post(self.members[0].user)
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(response.data['created'], 1)
+        self.assertEqual(Penalty.objects.get().created_by, self.members[0])
+
+    def test_dry_run_returns_the_penalties_without_saving(self):
+        response = self._post(self.members[0].user, {'dry_run': True})
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual((response.data['dry_run'], response.data['created']), (True, 0))
+        self.assertEqual([p['member_id'] for p in response.data['penalties']], [self.members[1].pk])
+        self.assertFalse(Penalty.objects.exists())
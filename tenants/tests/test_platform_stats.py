@@ -0,0 +1,91 @@
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from ..models import EdirStats, Payment, Resource, User
+from ..platform_stats import compute_edir_stats
+from .helpers import make_edir, make_event
+
+
+class EdirStatsTests(TestCase):
+
+    def setUp(self):
+        self.alpha, self.alphas = make_edir('alpha', members=4)
+        self.beta, self.betas = make_edir('beta', members=2)
+        self.today = timezone.localdate()
+        self._pay(self.alpha, self.alphas[1], '100.00', self.today)
+        self._pay(self.alpha, self.alphas[2], '40.00', date(2025, 1, 10))
+        self._pay(self.beta, self.betas[1], '70.00', self.today, status='failed')
+        make_event(self.alpha, self.alphas[0])
+        Resource.objects.create(edir=self.beta, name='Chairs', category='equipment', quantity=10)
+
+    def _pay(self, edir, member, amount, payment_date, status='completed'):
+        return Payment.objects.create(member=member, edir=edir, amount=Decimal(amount), payment_type='monthly',
+                                      status=status, payment_date=payment_date, verified_at=timezone.now())
+
+    def test_refresh_rewrites_one_row_per_edir_and_the_platform_row(self):
+        self.assertEqual(compute_edir_stats(), 2)
+
+        alpha = EdirStats.objects.get(edir=self.alpha)
+        self.assertEqual((alpha.member_count, alpha.collections_total, alpha.collections_current_month),
+                         (4, Decimal('140.00'), Decimal('100.00')))
+        self.assertEqual((alpha.event_count, alpha.payments_verified, alpha.verification_success_rate), (1, 2, 100.0))
+        beta = EdirStats.objects.get(edir=self.beta)
+        self.assertEqual((beta.collections_total, beta.payments_verification_failed, beta.active_resources),
+                         (Decimal('0.00'), 1, 1))
+        self.assertEqual(beta.verification_success_rate, 0.0)
+        platform = EdirStats.objects.get(edir=None)
+        self.assertEqual((platform.edir_count, platform.member_count, platform.collections_total),
+                         (2, 6, Decimal('140.00')))
+        self.assertEqual(platform.members_by_status, {'approved': 6})
+        # 2025-01 is more than twelve months back
+        self.assertEqual(platform.monthly_collections,
+                         [{'month': self.today.strftime('%Y-%m'), 'amount': 100.0, 'count': 1}])
+
+        self._pay(self.beta, self.betas[0], '30.00', self.today)
+        out = StringIO()
+        call_command('compute_edir_stats', stdout=out)
+        self.assertIn('Computed stats for 2 edir(s)', out.getvalue())
+        self.assertEqual(EdirStats.objects.count(), 3)
+        beta.refresh_from_db()
+        self.assertEqual((beta.collections_total, beta.verification_success_rate), (Decimal('30.00'), 50.0))
+        self.assertEqual(EdirStats.objects.get(edir=None).collections_total, Decimal('170.00'))
+
+
+class PlatformEndpointTests(TestCase):
+
+    def setUp(self):
+        self.edir, self.members = make_edir('platform')
+        self.admin = User.objects.create_superuser(username='admin', password='x', email='admin@example.com')
+
+    def _client(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    def test_only_superusers_see_or_refresh_the_stats(self):
+        head = self._client(self.members[0].user)
+        with self.assertLogs('django.request', 'WARNING'):
+            self.assertEqual(head.get('/api/platform/stats/').status_code, 403)
+            self.assertEqual(head.post('/api/platform/stats/refresh/').status_code, 403)
+            self.assertIn(APIClient().get('/api/platform/stats/').status_code, (401, 403))
+        self.assertFalse(EdirStats.objects.exists())
+
+        admin = self._client(self.admin)
+        with self.assertLogs('django.request', 'WARNING'):
+            self.assertEqual(admin.get('/api/platform/stats/').status_code, 404)
+        response = admin.post('/api/platform/stats/refresh/')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual((response.data['edirs'], response.data['totals']['members']), (1, 3))
+
+        response = admin.get('/api/platform/stats/', {'limit': 1})
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data['leaderboards']['members'],
+                         [{'edir': 'platform', 'slug': self.edir.slug, 'value': 3}])
+        with self.assertLogs('django.request', 'WARNING'):
+            self.assertEqual(admin.get('/api/platform/stats/', {'limit': 'all'}).status_code, 400)
@@ -0,0 +1,138 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.core import mail
+from django.test import TransactionTestCase, override_settings
+from django.utils import timezone
+
+from .. import reminder_dispatch
+from ..models import Reminder, ReminderDelivery
+from .helpers import make_edir, make_event
+
+
+@override_settings(
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    MAIL_RATE_PER_MINUTE=0,
+    REMINDER_SEND_BATCH=2,
+    REMINDER_DIGEST_WINDOW=0,
+)
+class DispatchLeaseTests(TransactionTestCase):
+    """Channels run on their own threads, so the rows they read must be committed"""
+
+    def setUp(self):
+        self.edir, self.members = make_edir('dispatch', members=5)
+        self.reminder = Reminder.objects.create(
+            edir=self.edir, reminder_type='other', subject='Meeting', message='Hello {{ full_name }}',
+            channel='email', scheduled_time=timezone.now(), created_by=self.edir.head, status='queued',
+        )
+        self.reminder.recipients.set(self.members)
+        self.batches = []
+
+    def _sender(self, on_batch=None):
+        def send(reminder, recipients):
+            current = Reminder.objects.get(pk=reminder.pk)
+            self.batches.append({
+                'recorded': ReminderDelivery.objects.filter(reminder=reminder).count(),
+                'lease_expires_at': current.lease_expires_at,
+            })
+            if on_batch:
+                on_batch(len(self.batches))
+            return reminder_dispatch.send_email(reminder, recipients)
+        return mock.patch.dict(reminder_dispatch.SENDERS, {'email': send})
+
+    def test_each_batch_is_logged_before_the_next_is_sent(self):
+        started = timezone.now()
+        with self._sender():
+            reminder = reminder_dispatch.dispatch_reminder(self.reminder.pk)
+
+        self.assertEqual(reminder.status, 'sent')
+        self.assertEqual([batch['recorded'] for batch in self.batches], [0, 2, 4])
+        for batch in self.batches:
+            self.assertGreater(batch['lease_expires_at'], started + timedelta(seconds=590))
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertIsNone(Reminder.objects.get(pk=self.reminder.pk).lease_expires_at)
+
+    def test_stops_once_another_dispatch_claims_the_reminder(self):
+        def taken_over(batch):
+            if batch == 2:
+                # The lease ran out, requeue_expired() queued it and another worker claimed it
+                Reminder.objects.filter(pk=self.reminder.pk).update(
+                    status='sending', dispatch_started_at=timezone.now() + timedelta(seconds=1),
+                    lease_expires_at=reminder_dispatch.lease_expiry(),
+                )
+
+        with self._sender(taken_over):
+            self.assertIsNone(reminder_dispatch.dispatch_reminder(self.reminder.pk))
+
+        # The second batch was already out, so it is logged; the third is left to the new dispatch
+        self.assertEqual(len(self.batches), 2)
+        self.assertEqual(ReminderDelivery.objects.filter(reminder=self.reminder, status='sent').count(), 4)
+        reminder = Reminder.objects.get(pk=self.reminder.pk)
+        self.assertEqual(reminder.status, 'sending')
+        self.assertEqual(reminder.channel_progress['email']['status'], 'pending')
+
+        # The new dispatch sends only to the member left
+        Reminder.objects.filter(pk=self.reminder.pk).update(status='queued')
+        mail.outbox = []
+        self.assertEqual(reminder_dispatch.dispatch_reminder(self.reminder.pk).status, 'sent')
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(ReminderDelivery.objects.filter(reminder=self.reminder, status='sent').count(), 5)
+
+
+@override_settings(
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    MAIL_RATE_PER_MINUTE=0,
+    REMINDER_DIGEST_WINDOW=3600,
+)
+class DigestTests(TransactionTestCase):
+
+    def setUp(self):
+        self.edir, self.members = make_edir('digest', members=4)
+
+    def _dispatch(self, subject, members, **fields):
+        reminder = Reminder.objects.create(
+            edir=self.edir, reminder_type='other', subject=subject, message=f'{subject} for {{{{ full_name }}}}',
+            channel='email', scheduled_time=timezone.now(), created_by=self.edir.head, status='queued', **fields,
+        )
+        reminder.recipients.set(members)
+        return reminder_dispatch.dispatch_reminder(reminder.pk)
+
+    def _inbox(self):
+        return {message.to[0]: message for message in mail.outbox}
+
+    def test_held_reminders_go_out_as_one_digest_per_member(self):
+        dues = self._dispatch('Dues', self.members[:3])
+        self.assertEqual(dues.status, 'held')
+        self.assertEqual(dues.channel_progress['email']['held'], 3)
+        self.assertEqual(mail.outbox, [])
+        self.assertEqual(reminder_dispatch.flush_digests(), 0)
+
+        # Dues has waited out the window; Meeting joins it for the members it shares
+        ReminderDelivery.objects.filter(reminder=dues).update(updated_at=timezone.now() - timedelta(hours=2))
+        meeting = self._dispatch('Meeting', self.members[1:])
+        self.assertEqual(reminder_dispatch.flush_digests(), 3)
+
+        inbox = self._inbox()
+        self.assertEqual(len(mail.outbox), 3)
+        head, first = inbox[self.members[0].email], inbox[self.members[1].email]
+        self.assertEqual((head.subject, head.body), ('Dues', 'Dues for Head'))
+        self.assertEqual(first.subject, '2 reminders from digest')
+        self.assertEqual(first.body, 'Dues\nDues for Member 0\n\nMeeting\nMeeting for Member 0')
+        self.assertEqual(Reminder.objects.get(pk=dues.pk).status, 'sent')
+        # The last member's only item is still inside the window
+        self.assertEqual(Reminder.objects.get(pk=meeting.pk).status, 'held')
+        self.assertEqual(ReminderDelivery.objects.get(status='held').member, self.members[3])
+
+        mail.outbox = []
+        self.assertEqual(reminder_dispatch.flush_digests(timezone.now() + timedelta(hours=1, seconds=1)), 1)
+        self.assertEqual([(message.to[0], message.subject) for message in mail.outbox],
+                         [(self.members[3].email, 'Meeting')])
+        meeting = Reminder.objects.get(pk=meeting.pk)
+        self.assertEqual((meeting.status, meeting.channel_progress['email']['sent']), ('sent', 3))
+
+    def test_urgent_reminders_are_never_held(self):
+        funeral = make_event(self.edir, self.members[0], title='Funeral', event_type='bereavement')
+        self.assertEqual(self._dispatch('Funeral', self.members[:2], related_event=funeral).status, 'sent')
+        self.assertEqual(self._dispatch('Road closed', self.members[2:], urgent=True).status, 'sent')
+        self.assertEqual(len(mail.outbox), 4)
+        self.assertFalse(ReminderDelivery.objects.exclude(status='sent').exists())
@@ -0,0 +1,139 @@
+import os
+import sqlite3
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections
+from django.http import HttpResponse
+from django.test import RequestFactory, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from ..db_routers import (
+    PRIMARY_DB, REPLICA_DB, PrimaryReplicaRouter, is_pinned_to_primary, replica_reads, require_shared_cache,
+    reset_write_marker, wrote_to_primary,
+)
+from ..middleware import ReplicaStickinessMiddleware
+from ..models import Edir, Resource
+from .helpers import make_edir, make_event
+
+
+class ReplicaRoutingTests(TransactionTestCase):
+    """
+    The test database is the primary and a second SQLite file is registered
+    as the replica. setUp snapshots the primary into it, so rows written
+    after that only exist on the primary, which shows where each read went.
+    """
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Registered only now, as the test runner would try to create a test database for it
+        handle, cls.replica_path = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(handle)
+        replica = {**connections.settings[PRIMARY_DB], 'NAME': cls.replica_path, 'TEST': {'MIRROR': None}}
+        cls.replica_settings = mock.patch.dict(settings.DATABASES, {REPLICA_DB: replica})
+        cls.replica_settings.start()
+        cls.databases = {PRIMARY_DB, REPLICA_DB}
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections[REPLICA_DB].close()
+        del connections[REPLICA_DB]
+        cls.replica_settings.stop()
+        os.remove(cls.replica_path)
+
+    def setUp(self):
+        cache.clear()
+        self.edir, self.members = make_edir('replica')
+        self.head = self.members[0]
+
+        connections[REPLICA_DB].close()
+        primary = connections[PRIMARY_DB]
+        primary.ensure_connection()
+        target = sqlite3.connect(self.replica_path)
+        try:
+            primary.connection.backup(target)
+        finally:
+            target.close()
+
+    def test_reads_go_to_the_replica_only_inside_replica_reads(self):
+        router = PrimaryReplicaRouter()
+        self.assertEqual(router.db_for_read(Edir), PRIMARY_DB)
+        with replica_reads() as enabled:
+            self.assertTrue(enabled)
+            self.assertEqual(router.db_for_read(Edir), REPLICA_DB)
+            self.assertEqual(router.db_for_write(Edir), PRIMARY_DB)
+        self.assertEqual(router.db_for_read(Edir), PRIMARY_DB)
+
+    def test_replica_serves_the_snapshot(self):
+        Edir.objects.create(name='late', description='Created after the snapshot', approved=True)
+        with replica_reads():
+            self.assertFalse(Edir.objects.filter(name='late').exists())
+            self.assertTrue(Edir.objects.filter(pk=self.edir.pk).exists())
+        self.assertTrue(Edir.objects.filter(name='late').exists())
+
+    def test_writes_are_marked_and_instances_stay_on_their_database(self):
+        reset_write_marker()
+        with replica_reads():
+            edir = Edir.objects.get(pk=self.edir.pk)
+            self.assertEqual(edir._state.db, REPLICA_DB)
+            self.assertFalse(wrote_to_primary())
+            Resource.objects.create(edir=self.edir, name='Tent', category='equipment', quantity=1)
+        self.assertTrue(wrote_to_primary())
+        self.assertEqual(PrimaryReplicaRouter().db_for_read(Edir, instance=edir), REPLICA_DB)
+
+    def test_middleware_pins_only_after_a_write(self):
+        request = RequestFactory().get('/')
+        request.user = self.head.user
+        ReplicaStickinessMiddleware(lambda request: HttpResponse())(request)
+        self.assertFalse(is_pinned_to_primary(self.head.user.pk))
+
+        def writes(request):
+            Resource.objects.create(edir=self.edir, name='Tent', category='equipment', quantity=1)
+            return HttpResponse()
+
+        ReplicaStickinessMiddleware(writes)(request)
+        self.assertTrue(is_pinned_to_primary(self.head.user.pk))
+        with replica_reads(self.head.user) as enabled:
+            self.assertFalse(enabled)
+        with replica_reads(self.members[1].user) as enabled:
+            self.assertTrue(enabled)
+
+    def test_writer_reads_their_own_write_while_others_read_the_replica(self):
+        client = APIClient()
+        client.force_authenticate(self.head.user)
+        url = f'/api/{self.edir.slug}/resources/'
+        response = client.post(url, {'name': 'Tent', 'category': 'equipment', 'quantity': 2}, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+
+        names = lambda response: [row['name'] for row in (response.data)]
+        with CaptureQueriesContext(connections[PRIMARY_DB]) as primary, \
+                CaptureQueriesContext(connections[REPLICA_DB]) as replica:
+            self.assertIn('Tent', names(client.get(url)))
+        self.assertTrue(any('tenants_resource' in query['sql'] for query in primary.captured_queries))
+        self.assertEqual(len(replica.captured_queries), 0)
+
+        client.force_authenticate(self.members[1].user)
+        with CaptureQueriesContext(connections[REPLICA_DB]) as replica:
+            self.assertNotIn('Tent', names(client.get(url)))
+        self.assertTrue(any('tenants_resource' in query['sql'] for query in replica.captured_queries))
+
+    def test_replica_needs_a_cache_shared_between_workers(self):
+        with self.assertRaisesMessage(ImproperlyConfigured, 'CACHE_URL'):
+            require_shared_cache()
+        shared = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+                              'LOCATION': 'redis://127.0.0.1:6379/1'}}
+        with override_settings(CACHES=shared):
+            require_shared_cache()
+
+    def test_event_report_create_reads_the_primary(self):
+        # The event only exists on the primary, as for a report created right after its event
+        event = make_event(self.edir, self.head)
+        client = APIClient()
+        client.force_authenticate(self.head.user)
+        response = client.post(f'/api/{self.edir.slug}/events/{event.pk}/reports/', {'notes': 'Done'}, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
@@ -0,0 +1,90 @@
+import random
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from ..models import Resource, ResourceAllocation
+from ..resource_reports import HOLDING_STATUSES, compute_utilization, get_utilization
+from .helpers import make_edir, make_event
+
+ALLOCATIONS = 10_000
+
+
+class ResourceUtilizationTests(TestCase):
+    """compute_utilization() over 10k allocations: fixed query count and totals matching a row-by-row count"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.edir, members = make_edir('resources')
+        cls.head = members[0]
+        cls.event = make_event(cls.edir, cls.head)
+        cls.resources = [
+            Resource.objects.create(edir=cls.edir, name=f'Chair set {i}', category='furniture', quantity=50, purchase_price=100)
+            for i in range(20)
+        ]
+        rng = random.Random(1)
+        now = timezone.now()
+        allocations = []
+        for _ in range(ALLOCATIONS):
+            start = now - timedelta(days=rng.randint(0, 600))
+            allocations.append(ResourceAllocation(
+                resource=rng.choice(cls.resources), event=cls.event, member=cls.head,
+                quantity=rng.randint(1, 3), start_date=start, end_date=start + timedelta(days=rng.randint(1, 5)),
+                status=rng.choice(['pending', 'approved', 'returned', 'rejected']), actual_cost=Decimal('10.00'),
+            ))
+        ResourceAllocation.objects.bulk_create(allocations, batch_size=1000)
+
+    def setUp(self):
+        cache.clear()
+        self.edir.refresh_from_db()
+
+    def test_totals_match_the_allocations(self):
+        report = compute_utilization(self.edir)
+        allocations = list(ResourceAllocation.objects.filter(resource__edir=self.edir).values('resource_id', 'status', 'quantity'))
+
+        self.assertEqual(sum(row['count'] for row in report['allocation_status']), ALLOCATIONS)
+        for summary in report['resource_summary']:
+            own = [a for a in allocations if a['resource_id'] == summary['id']]
+            self.assertEqual(summary['allocation_count'], len(own))
+            self.assertEqual(summary['allocated_quantity'], sum(a['quantity'] for a in own if a['status'] in HOLDING_STATUSES))
+            self.assertEqual(summary['pending_requests'], sum(1 for a in own if a['status'] == 'pending'))
+            self.assertEqual(summary['rental_income'], 10.0 * sum(1 for a in own if a['status'] == 'approved'))
+
+    def _queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            compute_utilization(self.edir)
+        return len(queries)
+
+    def test_query_count_does_not_grow_with_allocations(self):
+        before = self._queries()
+        extra = Resource.objects.create(edir=self.edir, name='Tent', category='equipment', quantity=5)
+        start = timezone.now()
+        ResourceAllocation.objects.bulk_create([
+            ResourceAllocation(resource=extra, event=self.event, member=self.head, quantity=1,
+                               start_date=start, end_date=start + timedelta(days=1), status='approved')
+            for _ in range(1000)
+        ])
+        self.assertEqual(self._queries(), before)
+
+    def test_window_only_counts_overlapping_allocations(self):
+        today = timezone.localdate()
+        date_from = today - timedelta(days=30)
+        report = compute_utilization(self.edir, date_from, today)
+        expected = ResourceAllocation.objects.filter(
+            resource__edir=self.edir, end_date__date__gte=date_from, start_date__date__lte=today
+        ).count()
+        self.assertEqual(sum(row['count'] for row in report['allocation_status']), expected)
+
+    def test_cached_until_resources_change(self):
+        get_utilization(self.edir)
+        with self.assertNumQueries(0):
+            get_utilization(self.edir)
+
+        Resource.objects.create(edir=self.edir, name='Tent', category='equipment', quantity=2)
+        self.edir.refresh_from_db()
+        self.assertEqual(len(get_utilization(self.edir)['resource_summary']), len(self.resources) + 1)
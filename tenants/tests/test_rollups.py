@@ -0,0 +1,111 @@
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from ..models import Expense, FinancialRollup, Payment
+from ..rollups import rollup_differences, stored_rollups
+from .helpers import make_edir, make_event
+
+MAY = date(2026, 5, 1)
+JUNE = date(2026, 6, 1)
+
+
+class FinancialRollupTests(TestCase):
+
+    def setUp(self):
+        self.edir, self.members = make_edir('rollups')
+        self.head = self.members[0]
+
+    def _payment(self, amount='100.00', status='completed', payment_date=date(2026, 5, 10), **fields):
+        return Payment.objects.create(
+            member=self.head, edir=self.edir, amount=Decimal(amount), payment_type='monthly',
+            status=status, payment_date=payment_date, **fields,
+        )
+
+    def _income(self, month=MAY):
+        return stored_rollups(self.edir).get((month, 'income', 'monthly'))
+
+    def assertConsistent(self):
+        self.assertEqual(rollup_differences(self.edir), [])
+
+    def test_only_completed_payments_count(self):
+        payment = self._payment(status='pending')
+        self.assertIsNone(self._income())
+
+        payment.status = 'completed'
+        payment.save()
+        self.assertEqual(self._income(), (Decimal('100.00'), 1))
+
+        payment.status = 'refunded'
+        payment.save()
+        self.assertIsNone(self._income())
+        self.assertConsistent()
+
+    def test_amount_and_month_changes_move_the_contribution(self):
+        payment = self._payment()
+        self._payment(amount='50.00')
+
+        payment.amount = Decimal('80.00')
+        payment.save()
+        self.assertEqual(self._income(), (Decimal('130.00'), 2))
+
+        payment.payment_date = date(2026, 6, 3)
+        payment.save()
+        self.assertEqual(self._income(), (Decimal('50.00'), 1))
+        self.assertEqual(self._income(JUNE), (Decimal('80.00'), 1))
+        self.assertConsistent()
+
+    def test_delete_removes_the_contribution(self):
+        payment = self._payment()
+        expense = Expense.objects.create(
+            edir=self.edir, event=make_event(self.edir, self.head), description='Tent', amount=Decimal('40.00'),
+            spent_by=self.head, spent_date=date(2026, 5, 12),
+        )
+        self.assertEqual(stored_rollups(self.edir)[(MAY, 'expense', 'event')], (Decimal('40.00'), 1))
+
+        payment.delete()
+        expense.delete()
+        self.assertEqual(stored_rollups(self.edir), {})
+        self.assertConsistent()
+
+    def test_bulk_writes_keep_rollups_current(self):
+        version = self.edir.data_version
+        payments = Payment.objects.bulk_create([
+            Payment(member=member, edir=self.edir, amount=Decimal('25.00'), payment_type='monthly',
+                    status='completed', payment_date=date(2026, 5, 10))
+            for member in self.members
+        ])
+        self.assertEqual(self._income(), (Decimal('75.00'), 3))
+
+        Payment.objects.filter(pk=payments[0].pk).update(status='failed')
+        self.assertEqual(self._income(), (Decimal('50.00'), 2))
+
+        for payment in payments:
+            payment.amount = Decimal('30.00')
+        Payment.objects.bulk_update(payments, ['amount'])
+        self.assertEqual(self._income(), (Decimal('60.00'), 2))
+
+        self.assertConsistent()
+        self.edir.refresh_from_db()
+        self.assertGreater(self.edir.data_version, version)
+
+    def test_check_command_reports_and_fixes_drift(self):
+        self._payment()
+        out = StringIO()
+        call_command('check_financial_rollups', stdout=out)
+        self.assertIn('Rollups are consistent', out.getvalue())
+
+        # As a raw SQL write would leave it
+        FinancialRollup.objects.filter(edir=self.edir).update(total=Decimal('1.00'))
+        out = StringIO()
+        with self.assertRaisesMessage(CommandError, '1 edir(s) have rollups that disagree'):
+            call_command('check_financial_rollups', stdout=out)
+        self.assertIn(f"{self.edir.slug} 2026-05 income/monthly: rollup=(Decimal('1.00'), 1) recomputed=",
+                      out.getvalue())
+
+        call_command('check_financial_rollups', '--fix', stdout=StringIO())
+        self.assertEqual(self._income(), (Decimal('100.00'), 1))
+        self.assertConsistent()
@@ -0,0 +1,74 @@
+import logging
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from .. import sms
+from ..management.commands.fake_twilio import FakeTwilio
+from .helpers import serve
+
+ACCOUNT = 'AC' + '0' * 32
+
+
+@override_settings(
+    TWILIO_ACCOUNT_SID=ACCOUNT, TWILIO_AUTH_TOKEN='secret', TWILIO_PHONE_NUMBER='+15005550006',
+    SMS_RATE_PER_SECOND=0, SMS_CONCURRENCY=4, SMS_MAX_ATTEMPTS=3, SMS_RETRY_DELAY=0.01,
+)
+class SendMessagesTests(SimpleTestCase):
+    """sms.send_messages against a local stand-in for Twilio (the fake_twilio command)"""
+
+    def _serve(self, fake):
+        url = self.enterContext(serve(fake.app()))
+        self.enterContext(override_settings(TWILIO_API_URL=url))
+        # The bucket is process-wide; start each test with a full one
+        self.enterContext(mock.patch.object(sms, '_bucket', sms._TokenBucket()))
+        # The Twilio client logs every request and response at INFO
+        client_log = logging.getLogger('twilio.http_client')
+        self.addCleanup(client_log.setLevel, client_log.level)
+        client_log.setLevel(logging.WARNING)
+        return fake
+
+    def test_requests_go_to_the_configured_api(self):
+        fake = self._serve(FakeTwilio())
+        results = sms.send_messages([(f'+2519110000{i:02d}', 'Meeting on Saturday') for i in range(6)])
+
+        self.assertEqual([result['status'] for result in results], ['sent'] * 6)
+        self.assertTrue(all(result['sid'].startswith('SM') for result in results))
+        self.assertEqual([result['to'] for result in results], [f'+2519110000{i:02d}' for i in range(6)])
+        self.assertEqual(len(fake.requests), 6)
+        self.assertEqual({account for account, *_ in fake.requests}, {ACCOUNT})
+
+    @override_settings(SMS_RATE_PER_SECOND=20, SMS_BURST=5)
+    def test_sending_is_paced_to_the_account_rate(self):
+        fake = self._serve(FakeTwilio())
+        started = time.monotonic()
+        results = sms.send_messages([(f'+2519110000{i:02d}', 'Hello') for i in range(25)])
+        elapsed = time.monotonic() - started
+
+        self.assertEqual(sum(result['status'] == 'sent' for result in results), 25)
+        # Five go at once, the other twenty at 20 a second
+        self.assertGreaterEqual(elapsed, 0.95)
+        received = sorted(at for _, _, at, _ in fake.requests)
+        for index in range(5, 25):
+            self.assertGreaterEqual(received[index] - started, (index - 4) / 20 - 0.02)
+
+    def test_transient_errors_are_retried(self):
+        fake = self._serve(FakeTwilio(failures={
+            '+251911000001': [503, 429],
+            '+251911000002': [503, 503, 503],
+        }))
+        with self.assertLogs('tenants.sms', 'WARNING'):
+            results = sms.send_messages([
+                ('+251911000000', 'Hello'), ('+251911000001', 'Hello'),
+                ('+251911000002', 'Hello'), ('0911000003', 'Hello'),
+            ])
+
+        self.assertEqual([(result['status'], result['attempts']) for result in results],
+                         [('sent', 1), ('sent', 3), ('failed', 3), ('failed', 1)])
+        self.assertTrue(results[1]['sid'])
+        self.assertIn('503', results[2]['error'])
+        # Not a transient error, so it was not retried
+        self.assertIn("Invalid 'To' Phone Number", results[3]['error'])
+        self.assertEqual([status for _, to, _, status in fake.requests if to == '+251911000001'], [503, 429, 201])
+        self.assertEqual(len(fake.requests), 8)
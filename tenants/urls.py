@@ -1,10 +1,12 @@
 from django.urls import path
 from rest_framework.routers import DefaultRouter
-from .views import EdirRequestViewSet, UserLoginAPIView
+from .views import EdirRequestViewSet, UserLoginAPIView, platform_stats, refresh_platform_stats
 
 router = DefaultRouter()
 router.register(r'edir/requests', EdirRequestViewSet, basename='edir-request')
 
 urlpatterns = [
     path('auth/login/', UserLoginAPIView.as_view(), name='edir-user-login'),
+    path('platform/stats/', platform_stats, name='platform-stats'),
+    path('platform/stats/refresh/', refresh_platform_stats, name='platform-stats-refresh'),
 ] + router.urls
\ No newline at end of file
@@ -1,19 +1,26 @@
 from .authentication import UserLoginAPIView, MemberRegistrationViewSet
 from .members import MemberViewSet
+from .devices import DeviceViewSet
 from .events import EventViewSet, AttendanceViewSet
-from .financial import ContributionViewSet, ExpenseViewSet ,PaymentViewSet, PenaltyViewSet,  FinancialReportViewSet
+from .financial import ContributionViewSet, ExpenseViewSet ,PaymentViewSet, PenaltyViewSet, PenaltyRuleViewSet, FinancialReportViewSet
 from .tasks import TaskGroupViewSet, TaskViewSet
 from .reports import EventReportViewSet
 from .edir import EdirRequestViewSet
-from .resources import ResourceViewSet, ResourceAllocationViewSet, ResourceUsageViewSet
+from .resources import (
+    ResourceViewSet, ResourceAllocationViewSet, ResourceUsageViewSet,
+    resource_utilization_report, resource_maintenance_report, resource_maintenance_upcoming,
+)
 from .transaction import verify_cbe 
 from .others import EmergencyRequestViewSet, MemberFeedbackViewSet, MemorialViewSet
 from .reminders import ReminderViewSet
+from .platform import platform_stats, refresh_platform_stats
+from .dashboard import dashboard
 
 __all__ = [
     'UserLoginAPIView',
     'MemberRegistrationViewSet',
     'MemberViewSet',
+    'DeviceViewSet',
     'EventViewSet',
     'AttendanceViewSet',
     'ContributionViewSet',
@@ -25,6 +32,8 @@ __all__ = [
     'ResourceViewSet',
     'ResourceAllocationViewSet',
     'ResourceUsageViewSet',
-    'PaymentViewSet', 'PenaltyViewSet', 'ReminderViewSet', 'FinancialReportViewSet','verify_cbe',
-    'EmergencyRequestViewSet', 'MemberFeedbackViewSet', 'MemorialViewSet'
+    'resource_utilization_report', 'resource_maintenance_report', 'resource_maintenance_upcoming',
+    'PaymentViewSet', 'PenaltyViewSet', 'PenaltyRuleViewSet', 'ReminderViewSet', 'FinancialReportViewSet','verify_cbe',
+    'EmergencyRequestViewSet', 'MemberFeedbackViewSet', 'MemorialViewSet',
+    'platform_stats', 'refresh_platform_stats', 'dashboard'
 ]
\ No newline at end of file
@@ -0,0 +1,34 @@
+from django.http import HttpResponseNotModified
+from django.shortcuts import get_object_or_404
+from django.utils.http import parse_etags
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from ..dashboard import get_dashboard
+from ..models import Edir, Member
+from .mixins import replica_read
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@replica_read
+def dashboard(request, edir_slug):
+    """
+    Everything the apps show after login in one call: role-appropriate
+    counts, the caller's dues status, upcoming events and open tasks.
+    Supports If-None-Match.
+    """
+    edir = get_object_or_404(Edir, slug=edir_slug)
+    member = get_object_or_404(Member, user=request.user, edir=edir)
+
+    data, etag = get_dashboard(edir, member)
+    if etag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', '')):
+        response = HttpResponseNotModified()
+        response['ETag'] = etag
+        return response
+
+    response = Response(data)
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, no-cache'
+    return response
@@ -0,0 +1,52 @@
+from rest_framework import mixins, viewsets, status
+from rest_framework.response import Response
+from rest_framework.decorators import action
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+
+from ..permissions import IsEdirMember
+from ..serializers import DeviceSerializer
+from ..models import Device, Edir, Member
+
+
+class DeviceViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
+    """The push notification devices of the requesting member"""
+    serializer_class = DeviceSerializer
+    permission_classes = [IsEdirMember]
+
+    def get_edir(self):
+        return get_object_or_404(Edir, slug=self.kwargs.get('edir_slug'))
+
+    def get_member(self):
+        return get_object_or_404(Member, user=self.request.user, edir__slug=self.kwargs.get('edir_slug'))
+
+    def get_queryset(self):
+        return Device.objects.filter(member__user=self.request.user, member__edir__slug=self.kwargs.get('edir_slug'))
+
+    @action(detail=False, methods=['post'])
+    def register(self, request, edir_slug=None):
+        """Register the app's push token, taking it over if another member had it"""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        device, created = Device.objects.update_or_create(
+            token=serializer.validated_data['token'],
+            defaults={
+                'member': self.get_member(),
+                'platform': serializer.validated_data.get('platform', 'unknown'),
+                'last_seen': timezone.now(),
+                'failure_count': 0,
+            },
+        )
+        return Response(
+            self.get_serializer(device).data,
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK
+        )
+
+    @action(detail=False, methods=['post'])
+    def unregister(self, request, edir_slug=None):
+        """Stop pushing to a token, e.g. on logout"""
+        token = request.data.get('token')
+        if not token:
+            return Response({"token": ["This field is required."]}, status=status.HTTP_400_BAD_REQUEST)
+        self.get_queryset().filter(token=token).delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
@@ -1,6 +1,7 @@
 from rest_framework import viewsets, status
 from rest_framework.response import Response
 from ..models import EdirRequest,Edir,Member
+from .. import outbox
 from ..serializers import EdirRequestSerializer, EdirRequestApprovalSerializer
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
@@ -9,9 +10,7 @@ from rest_framework.permissions import IsAdminUser
 from django.db import transaction
 
 from django.contrib.auth import get_user_model
-from django.core.mail import send_mail
 from django.urls import reverse
-from django.conf import settings
 
 User = get_user_model()
 
@@ -137,13 +136,8 @@ class EdirRequestViewSet(viewsets.ModelViewSet):
                         f"Your edir: {edir_slug}\n"
                         f"Access your Edir here: http://localhost:5173/{edir_slug}/"
                     )
-                    send_mail(
-                        subject,
-                        message,
-                        getattr(settings, 'DEFAULT_FROM_EMAIL', None),
-                        [edir_request.email],
-                        fail_silently=True,
-                    )
+                    # Sent once the transaction commits, so nothing is mailed for a rolled back approval
+                    outbox.enqueue_email(subject, message, [edir_request.email])
 
                     return Response(
                         {
@@ -8,17 +8,31 @@ from django.utils import timezone
 from rest_framework import viewsets, permissions
 from ..permissions import IsEdirHead,IsEdirMember, IsTreasurerOrHead
 from datetime import datetime
-from ..serializers import ContributionSerializer, ExpenseSerializer, PaymentSerializer, PenaltySerializer, ReminderSerializer, FinancialReportSerializer
-from ..models import Contribution, Expense, Member, Event, Payment, Penalty, Reminder, FinancialReport,Edir
+from ..serializers import ContributionSerializer, ExpenseSerializer, PaymentSerializer, PenaltySerializer, PenaltyRuleSerializer, ReminderSerializer, FinancialReportSerializer
+from ..models import Contribution, Expense, Member, Event, Payment, Penalty, PenaltyRule, Reminder, FinancialReport,Edir
 from tenants import serializers
-from django.db.models import Sum
 from .transaction import verify_cbe 
+from .mixins import ExportMixin, ReplicaReadMixin
+from ..financial_reports import default_period, get_payment_summary, get_report_data
+from ..report_rendering import pdf_response
+from ..penalties import apply_penalties
+from django.utils.dateparse import parse_date
 import logging
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 
+def _parse_optional_date(value):
+    """YYYY-MM-DD string to date; None when empty, ValueError when malformed"""
+    if not value:
+        return None
+    parsed = parse_date(str(value))
+    if parsed is None:
+        raise ValueError(f"Invalid date: {value}")
+    return parsed
+
+
 class CbeVerificationError(Exception):
     """Base exception for CBE verification issues."""
     pass
@@ -29,9 +43,22 @@ class CbeServiceRetrievalError(CbeVerificationError):
         super().__init__(message)
         self.underlying_error = underlying_error
 
-class ContributionViewSet(viewsets.ModelViewSet):
+class ContributionViewSet(ReplicaReadMixin, ExportMixin, viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
     serializer_class = ContributionSerializer
+    replica_actions = ('list', 'export')
+    export_filename = 'contributions'
+    export_fields = {
+        'id': 'id',
+        'event': 'event__title',
+        'member': 'member__full_name',
+        'amount': 'amount',
+        'payment_method': 'payment_method',
+        'payment_date': 'payment_date',
+        'confirmed_by': 'confirmed_by__full_name',
+        'confirmed_at': 'confirmed_at',
+        'note': 'note',
+    }
 
     def get_queryset(self):
         user = self.request.user
@@ -88,9 +115,21 @@ class ContributionViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(contribution)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
-class ExpenseViewSet(viewsets.ModelViewSet):
+class ExpenseViewSet(ReplicaReadMixin, ExportMixin, viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
     serializer_class = ExpenseSerializer
+    replica_actions = ('list', 'export')
+    export_filename = 'expenses'
+    export_fields = {
+        'id': 'id',
+        'event': 'event__title',
+        'description': 'description',
+        'amount': 'amount',
+        'spent_by': 'spent_by__full_name',
+        'spent_date': 'spent_date',
+        'approved_by': 'approved_by__full_name',
+        'approved_at': 'approved_at',
+    }
 
     def get_queryset(self):
         user = self.request.user
@@ -149,11 +188,29 @@ class ExpenseViewSet(viewsets.ModelViewSet):
     
     
 
-class PaymentViewSet(viewsets.ModelViewSet):
+class PaymentViewSet(ReplicaReadMixin, ExportMixin, viewsets.ModelViewSet):
     queryset = Payment.objects.all()
     serializer_class = PaymentSerializer
     permission_classes = [IsEdirMember]
-
+    replica_actions = ('list', 'summary', 'export')
+    export_filename = 'payments'
+    export_fields = {
+        'id': 'id',
+        'member': 'member__full_name',
+        'payment_type': 'payment_type',
+        'amount': 'amount',
+        'payment_date': 'payment_date',
+        'status': 'status',
+        'transaction_reference': 'transaction_reference',
+        'event': 'event__title',
+        'verified_by': 'verified_by__full_name',
+        'verified_at': 'verified_at',
+        'created_at': 'created_at',
+    }
+
+
+    def get_edir(self):
+        return get_object_or_404(Edir, slug=self.kwargs['edir_slug'])
 
     def get_permissions(self):
         if self.action in ['create', 'bulk_create']:
@@ -247,18 +304,9 @@ class PaymentViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['get'], permission_classes=[IsTreasurerOrHead])
     def summary(self, request, edir_slug=None):
+        # Loaded once per request; its data_version keys the cached summary
         edir = get_object_or_404(Edir, slug=edir_slug)
-        payments = self.get_queryset().filter(edir=edir)
-        
-        total_payments = payments.filter(status='completed').count()
-        total_amount = sum(p.amount for p in payments.filter(status='completed'))
-        pending_payments = payments.filter(status='pending').count()
-        
-        return Response({
-            'total_payments': total_payments,
-            'total_amount': total_amount,
-            'pending_payments': pending_payments,
-        })
+        return Response(get_payment_summary(edir))
 
     @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated])
     def verify(self, request, edir_slug=None, pk=None): 
@@ -445,11 +493,14 @@ class PaymentViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
                 
-class PenaltyViewSet(viewsets.ModelViewSet):
+class PenaltyViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     queryset = Penalty.objects.all()
     serializer_class = PenaltySerializer
     permission_classes = [IsTreasurerOrHead]  
 
+    def get_edir(self):
+        return get_object_or_404(Edir, slug=self.kwargs['edir_slug'])
+
     def get_queryset(self):
         edir_slug = self.kwargs.get('edir_slug')
         edir = get_object_or_404(Edir, slug=edir_slug)
@@ -468,12 +519,47 @@ class PenaltyViewSet(viewsets.ModelViewSet):
         penalty.save()
         return Response({'status': 'penalty waived'})
 
+    @action(detail=False, methods=['post'], permission_classes=[IsTreasurerOrHead])
+    def evaluate(self, request, edir_slug=None):
+        """
+        Run the edir's penalty rules over overdue payments and recorded
+        absences. With {"dry_run": true} nothing is saved and the penalties
+        that would be created are returned.
+        """
+        edir = get_object_or_404(Edir, slug=edir_slug)
+        member = Member.objects.filter(user=request.user, edir=edir).first()
+        if member is None:
+            # Penalties always record the member who created them
+            return Response(
+                {'error': 'Only members of this edir can evaluate penalties'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        dry_run = str(request.data.get('dry_run', '')).lower() in ('1', 'true', 'yes')
+        result = apply_penalties(edir, dry_run=dry_run, created_by=member)
+        return Response(result, status=status.HTTP_200_OK if dry_run else status.HTTP_201_CREATED)
+
+
+class PenaltyRuleViewSet(viewsets.ModelViewSet):
+    serializer_class = PenaltyRuleSerializer
+    permission_classes = [IsTreasurerOrHead]
+
+    def get_edir(self):
+        return get_object_or_404(Edir, slug=self.kwargs['edir_slug'])
+
+    def get_queryset(self):
+        return PenaltyRule.objects.filter(edir=self.get_edir())
+
+    def perform_create(self, serializer):
+        serializer.save(edir=self.get_edir())
+
 
 
-class FinancialReportViewSet(viewsets.ModelViewSet):
+class FinancialReportViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     queryset = FinancialReport.objects.all()
     serializer_class = FinancialReportSerializer
     permission_classes = [IsTreasurerOrHead]  # Only treasurers or heads can manage reports
+    # generate and generate_monthly save the report, so they read from the primary
+    replica_actions = ('list',)
 
     def get_queryset(self):
         edir_slug = self.kwargs.get('edir_slug')
@@ -486,53 +572,83 @@ class FinancialReportViewSet(viewsets.ModelViewSet):
         member = get_object_or_404(Member, user=self.request.user, edir=edir)
         serializer.save(edir=edir, generated_by=member)
 
+    @action(detail=True, methods=['get'])
+    def pdf(self, request, edir_slug=None, pk=None):
+        """The report as a PDF, rendered in the background (202 until ready) and served with an ETag"""
+        report = self.get_object()
+        return pdf_response(request, 'financial', report, f"financial-report-{report.pk}")
+
+    def _create_report(self, edir, member, report_type, start_date, end_date, title, event_id=None):
+        report = FinancialReport.objects.create(
+            edir=edir,
+            report_type=report_type,
+            title=title,
+            start_date=start_date,
+            end_date=end_date,
+            report_data=get_report_data(edir, start_date, end_date, event_id),
+            generated_by=member
+        )
+        serializer = self.get_serializer(report)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
     @action(detail=False, methods=['post'], permission_classes=[IsTreasurerOrHead])
     def generate_monthly(self, request, edir_slug=None):
         edir = get_object_or_404(Edir, slug=edir_slug)
         member = get_object_or_404(Member, user=self.request.user, edir=edir)
         
         today = timezone.now().date()
-        start_date = today.replace(day=1)
-        
-        # Calculate financial data
-        payments = Payment.objects.filter(
-            edir=edir,
-            payment_date__gte=start_date,
-            payment_date__lte=today,
-            status='completed'
-        )
-        
-        expenses = Expense.objects.filter(
-            edir=edir,
-            spent_date__gte=start_date,
-            spent_date__lte=today
+        start_date, end_date = default_period('monthly', today)
+        return self._create_report(
+            edir, member, 'monthly', start_date, end_date,
+            title=f"Monthly Report - {today.strftime('%B %Y')}"
         )
-        
-        total_income = payments.aggregate(total=Sum('amount'))['total'] or 0
-        total_expenses = expenses.aggregate(total=Sum('amount'))['total'] or 0
-        
-        report_data = {
-            'income': float(total_income),
-            'expenses': float(total_expenses),
-            'net': float(total_income - total_expenses),
-            'details': {
-                'contributions': float(payments.filter(payment_type='contribution').aggregate(total=Sum('amount'))['total'] or 0),
-                'penalties': float(payments.filter(payment_type='penalty').aggregate(total=Sum('amount'))['total'] or 0),
-                'event_expenses': float(expenses.filter(event__isnull=False).aggregate(total=Sum('amount'))['total'] or 0),
-                'operational_expenses': float(expenses.filter(event__isnull=True).aggregate(total=Sum('amount'))['total'] or 0)
-            }
-        }
-        
-        report = FinancialReport.objects.create(
-            edir=edir,
-            report_type='monthly',
-            title=f"Monthly Report - {today.strftime('%B %Y')}",
-            start_date=start_date,
-            end_date=today,
-            report_data=report_data,
-            generated_by=member
+
+    @action(detail=False, methods=['post'], permission_classes=[IsTreasurerOrHead])
+    def generate(self, request, edir_slug=None):
+        """
+        Generate a report of any type for any period. Takes report_type and
+        optional start_date/end_date (YYYY-MM-DD); 'event' reports also need
+        event_id, 'custom' reports need both dates.
+        """
+        edir = get_object_or_404(Edir, slug=edir_slug)
+        member = get_object_or_404(Member, user=self.request.user, edir=edir)
+
+        report_type = request.data.get('report_type', 'monthly')
+        if report_type not in dict(FinancialReport.REPORT_TYPE_CHOICES):
+            return Response({'error': f"Unknown report_type '{report_type}'"}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            start_date = _parse_optional_date(request.data.get('start_date'))
+            end_date = _parse_optional_date(request.data.get('end_date'))
+        except ValueError:
+            return Response({'error': 'Dates must be valid YYYY-MM-DD values'}, status=status.HTTP_400_BAD_REQUEST)
+
+        today = timezone.now().date()
+        event = None
+        if report_type == 'event':
+            event_id = str(request.data.get('event_id', ''))
+            if not event_id.isdigit():
+                return Response({'error': 'Event reports need a numeric event_id'}, status=status.HTTP_400_BAD_REQUEST)
+            event = get_object_or_404(Event, id=int(event_id), edir=edir)
+            start_date = start_date or event.start_date.date()
+            end_date = end_date or (event.end_date.date() if event.end_date else today)
+        elif report_type == 'custom' and not (start_date and end_date):
+            return Response({'error': 'Custom reports need start_date and end_date'}, status=status.HTTP_400_BAD_REQUEST)
+
+        default_start, default_end = default_period(report_type, today)
+        start_date = start_date or default_start
+        end_date = end_date or default_end
+        if start_date > end_date:
+            return Response({'error': 'start_date must not be after end_date'}, status=status.HTTP_400_BAD_REQUEST)
+
+        title = request.data.get('title') or {
+            'monthly': f"Monthly Report - {start_date.strftime('%B %Y')}",
+            'annual': f"Annual Report - {start_date.year}",
+            'event': f"Event Report - {event.title}" if event else '',
+            'custom': f"Financial Report {start_date} to {end_date}",
+        }[report_type]
+
+        return self._create_report(
+            edir, member, report_type, start_date, end_date, title,
+            event_id=event.id if event else None
         )
-        
-        # Use the serializer to return the response
-        serializer = self.get_serializer(report)
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
\ No newline at end of file
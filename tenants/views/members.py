@@ -2,20 +2,42 @@ from rest_framework import viewsets, mixins, status
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from drf_yasg.utils import swagger_auto_schema
+from django.db import transaction
 
 from ..permissions import IsEdirHead
 from ..serializers import MemberSerializer, MemberDetailSerializer
 from ..models import Member
-from django.core.mail import send_mail
+from .. import outbox
+from .mixins import ExportMixin, ReplicaReadMixin
 
 
-class MemberViewSet(mixins.RetrieveModelMixin,
+class MemberViewSet(ReplicaReadMixin,
+                   ExportMixin,
+                   mixins.RetrieveModelMixin,
                    mixins.UpdateModelMixin,
                    mixins.DestroyModelMixin,
                    mixins.ListModelMixin,
                    viewsets.GenericViewSet):
     permission_classes = [IsAuthenticated]
     queryset = Member.objects.all()
+    replica_actions = ('list', 'export')
+    export_filename = 'members'
+    export_fields = {
+        'id': 'id',
+        'full_name': 'full_name',
+        'role': 'role',
+        'status': 'status',
+        'email': 'email',
+        'phone_number': 'phone_number',
+        'home_or_alternate_phone': 'home_or_alternate_phone',
+        'registration_type': 'registration_type',
+        'address': 'address',
+        'city': 'city',
+        'state': 'state',
+        'zip_code': 'zip_code',
+        'is_active': 'is_active',
+        'created_at': 'created_at',
+    }
     
     def get_serializer_class(self):
         if self.action == 'retrieve':
@@ -55,17 +77,18 @@ class MemberViewSet(mixins.RetrieveModelMixin,
         responses={200: MemberSerializer}
     )
     def update(self, request, *args, **kwargs):
-        response = super().update(request, *args, **kwargs)
-        member = self.get_object()
-        print(request.data)
-        trimmed_data = str(request.data)[1:-1]
-        send_mail(
-            subject='Member Updated',
-            message=f'Hello {member.user.get_full_name()} has been updated. {trimmed_data}',
-            from_email='no-reply@example.com',
-            recipient_list=[member.user.email],
-            fail_silently=True,
-        )
+        with transaction.atomic():
+            response = super().update(request, *args, **kwargs)
+            member = self.get_object()
+            trimmed_data = str(request.data)[1:-1]
+            # Members without an email address are not notified, as before the outbox
+            if member.user.email:
+                outbox.enqueue_email(
+                    'Member Updated',
+                    f'Hello {member.user.get_full_name()} has been updated. {trimmed_data}',
+                    [member.user.email],
+                    from_email='no-reply@example.com',
+                )
         return response
 
     
@@ -0,0 +1,62 @@
+from functools import wraps
+
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from ..db_routers import replica_reads
+from ..exports import EXPORT_FORMATS, ExportRenderer, stream_export
+
+
+class ReplicaReadMixin:
+    """
+    Serve the listed actions from the read replica. Writes made inside them
+    still go to the primary through the router.
+    """
+    replica_actions = ('list',)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if self.action in self.replica_actions:
+            self._replica_block = replica_reads(request.user)
+            self._replica_block.__enter__()
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        block = getattr(self, '_replica_block', None)
+        if block is not None:
+            self._replica_block = None
+            block.__exit__(None, None, None)
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+def replica_read(view_func):
+    """Function-view counterpart of ReplicaReadMixin, applied under @api_view"""
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        with replica_reads(request.user):
+            return view_func(request, *args, **kwargs)
+    return wrapper
+
+
+class ExportMixin:
+    """
+    Adds a GET `export` action streaming the list view's rows as CSV or
+    NDJSON (?export_format=ndjson). It goes through get_queryset() and
+    filter_queryset(), so it honours the same filters and visibility rules
+    as `list`. Subclasses set `export_fields` (column -> values_list lookup)
+    and `export_filename`.
+    """
+    export_fields = {}
+    export_filename = 'export'
+
+    @action(detail=False, methods=['get'], renderer_classes=[JSONRenderer, ExportRenderer])
+    def export(self, request, *args, **kwargs):
+        export_format = request.query_params.get('export_format', 'csv')
+        if export_format not in EXPORT_FORMATS:
+            return Response(
+                {'detail': f"export_format must be one of: {', '.join(EXPORT_FORMATS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        queryset = self.filter_queryset(self.get_queryset())
+        return stream_export(queryset, self.export_fields, self.export_filename, export_format)
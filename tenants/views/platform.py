@@ -0,0 +1,34 @@
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+
+from ..permissions import IsSuperUser
+from ..platform_stats import compute_edir_stats, platform_overview
+
+
+@api_view(['GET'])
+@permission_classes([IsSuperUser])
+def platform_stats(request):
+    """Platform totals and per-edir leaderboards from the last stats run (?limit=N, default 10)"""
+    try:
+        limit = int(request.query_params.get('limit', 10))
+    except ValueError:
+        limit = 0
+    if not 0 < limit <= 100:
+        return Response({'error': 'limit must be a whole number between 1 and 100'}, status=status.HTTP_400_BAD_REQUEST)
+
+    overview = platform_overview(limit)
+    if overview is None:
+        return Response(
+            {'error': 'Stats have not been computed yet; POST to refresh or run compute_edir_stats'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    return Response(overview)
+
+
+@api_view(['POST'])
+@permission_classes([IsSuperUser])
+def refresh_platform_stats(request):
+    """Recompute the stats now instead of waiting for the nightly job"""
+    count = compute_edir_stats()
+    return Response({'edirs': count, **platform_overview()})
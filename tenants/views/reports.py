@@ -1,5 +1,5 @@
 from django.shortcuts import get_object_or_404
-from rest_framework import viewsets
+from rest_framework import status, viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
@@ -7,16 +7,20 @@ from rest_framework.permissions import IsAuthenticated
 from ..permissions import IsEventCoordinatorOrHead
 from ..serializers import EventReportSerializer
 from ..models import EventReport, Event, Member
+from ..event_reports import build_event_summary, is_event_closed, regenerate_report
+from ..report_rendering import pdf_response
+from .mixins import ReplicaReadMixin
 
-class EventReportViewSet(viewsets.ModelViewSet):
+class EventReportViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated, IsEventCoordinatorOrHead]
     serializer_class = EventReportSerializer
+    replica_actions = ('list',)
 
     def get_queryset(self):
         user = self.request.user
         event_id = self.kwargs.get('event_id')
 
-        queryset = EventReport.objects.all()
+        queryset = EventReport.objects.select_related('event', 'event__edir', 'prepared_by')
         if event_id:
             queryset = queryset.filter(event_id=event_id)
         
@@ -30,21 +34,7 @@ class EventReportViewSet(viewsets.ModelViewSet):
         event = get_object_or_404(Event, id=event_id)
         member = get_object_or_404(Member, user=self.request.user, edir=event.edir)
         
-        attendance_summary = {
-            'total_members': event.edir.members.count(),
-            'attending': event.attendances.filter(status='attending').count(),
-            'not_attending': event.attendances.filter(status='not_attending').count(),
-            'maybe': event.attendances.filter(status='maybe').count(),
-            'no_response': event.edir.members.count() - event.attendances.count()
-        }
-        
-        financial_summary = {
-            'total_contributions': sum(c.amount for c in event.contributions.all()),
-            'total_expenses': sum(e.amount for e in event.expenses.all()),
-            'balance': sum(c.amount for c in event.contributions.all()) - sum(e.amount for e in event.expenses.all()),
-            'contribution_count': event.contributions.count(),
-            'expense_count': event.expenses.count()
-        }
+        attendance_summary, financial_summary = build_event_summary(event)
         
         serializer.save(
             event=event,
@@ -53,6 +43,20 @@ class EventReportViewSet(viewsets.ModelViewSet):
             financial_summary=financial_summary
         )
 
+    @action(detail=True, methods=['post'])
+    def regenerate(self, request, event_id=None, pk=None, **kwargs):
+        """Recompute a closed event's report from the current attendance and finances"""
+        report = self.get_object()
+        if not is_event_closed(report.event):
+            return Response(
+                {'error': 'Reports can only be regenerated once the event has ended'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        regenerate_report(report)
+        return Response(self.get_serializer(report).data)
+
     @action(detail=True, methods=['get'])
-    def generate_pdf(self, request, event_id=None, pk=None):
-        return Response({'message': 'PDF generation endpoint'})
\ No newline at end of file
+    def generate_pdf(self, request, event_id=None, pk=None, **kwargs):
+        """The report as a PDF, rendered in the background (202 until ready) and served with an ETag"""
+        report = self.get_object()
+        return pdf_response(request, 'event', report, f"event-report-{report.pk}")
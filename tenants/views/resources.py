@@ -1,11 +1,11 @@
+from datetime import timedelta
 from django.utils import timezone
 from rest_framework import viewsets, status, mixins
 from rest_framework.response import Response
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from django.shortcuts import get_object_or_404
-from django.db.models import Sum, Count, Q, F, Case, When, Value, IntegerField,Avg
-from django.db.models.functions import Coalesce
+from django.db.models import Sum, Count, Q, F, Case, When, Value, IntegerField
 from rest_framework.decorators import api_view, permission_classes
 from ..models import Edir, Resource, ResourceAllocation, ResourceUsage
 from ..serializers import (
@@ -19,10 +19,14 @@ from ..permissions import (
     IsPropertyManagerOrHead
    
 )
+from .mixins import ReplicaReadMixin, replica_read
+from ..resource_reports import get_utilization
+from django.utils.dateparse import parse_date
 
-class ResourceViewSet(viewsets.ModelViewSet):
+class ResourceViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     serializer_class = ResourceSerializer
     permission_classes = [IsAuthenticated, IsEdirMember]
+    replica_actions = ('list', 'summary')
 
     def get_edir(self):
         return get_object_or_404(Edir, slug=self.kwargs['edir_slug'])
@@ -57,6 +61,26 @@ class ResourceViewSet(viewsets.ModelViewSet):
         resource.save()
         return Response({'available': resource.available})
 
+    @action(detail=True, methods=['post'], permission_classes=[IsPropertyManagerOrHead])
+    def log_maintenance(self, request, edir_slug=None, pk=None):
+        resource = self.get_object()
+        performed_on = request.data.get('performed_on')
+        if performed_on:
+            performed_on = parse_date(str(performed_on))
+            if performed_on is None:
+                return Response({'detail': "'performed_on' must be a YYYY-MM-DD date"},
+                                status=status.HTTP_400_BAD_REQUEST)
+        condition = request.data.get('condition')
+        if condition and condition not in dict(Resource.CONDITION_CHOICES):
+            return Response({'detail': 'Invalid condition'}, status=status.HTTP_400_BAD_REQUEST)
+
+        resource.log_maintenance(performed_on, condition)
+        return Response({
+            'last_maintenance_date': resource.last_maintenance_date,
+            'next_maintenance_due': resource.next_maintenance_due,
+            'condition': resource.condition
+        })
+
     @action(detail=False, methods=['get'])
     def categories(self, request, edir_slug=None):
         edir = self.get_edir()
@@ -83,7 +107,7 @@ class ResourceViewSet(viewsets.ModelViewSet):
         return Response(summary)
 
 
-class ResourceAllocationViewSet(viewsets.ModelViewSet):
+class ResourceAllocationViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     serializer_class = ResourceAllocationSerializer
     permission_classes = [IsAuthenticated, IsEdirMember]
 
@@ -230,113 +254,110 @@ class ResourceUsageViewSet(viewsets.ModelViewSet):
         return Response({'status': 'checked_out'})
 
 
+def _query_date(request, name):
+    value = request.query_params.get(name)
+    if not value:
+        return None
+    parsed = parse_date(value)
+    if parsed is None:
+        raise ValueError(f"'{name}' must be a YYYY-MM-DD date")
+    return parsed
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated, IsEdirMember])
+@replica_read
 def resource_utilization_report(request, edir_slug):
+    """
+    Utilization, allocation status and rental finances per resource.
+    Optional `from` / `to` (YYYY-MM-DD) limit it to allocations overlapping
+    that window.
+    """
     edir = get_object_or_404(Edir, slug=edir_slug)
-    
-    # Resource utilization summary with more detailed metrics
-    resources = Resource.objects.filter(edir=edir).annotate(
-        allocation_count=Count('allocations'),
-        allocated_quantity=Coalesce(Sum('allocations__quantity'), 0),
-        pending_allocations=Count(
-            'allocations',
-            filter=Q(allocations__status='pending')
-        ),
-        active_allocations=Count(
-            'allocations',
-            filter=Q(allocations__status='approved')
-        ),
-        total_rental_income=Sum(
-            'allocations__actual_cost',
-            filter=Q(allocations__status='approved')
-        )
-    )
-    
-    # Allocation status breakdown with time periods
-    status_counts = ResourceAllocation.objects.filter(
-        resource__edir=edir
-    ).values('status').annotate(
-        count=Count('id'),
-        total_quantity=Sum('quantity'),
-        avg_duration=Avg(F('end_date') - F('start_date'))
-    )
-    
-    # Financial summary
-    financial_summary = {
-        'total_purchase_value': Resource.objects.filter(edir=edir).aggregate(
-            total=Sum('purchase_price')
-        )['total'] or 0,
-        'total_rental_income': ResourceAllocation.objects.filter(
-            resource__edir=edir,
-            status='approved'
-        ).aggregate(
-            total=Sum('actual_cost')
-        )['total'] or 0,
-        'total_damage_charges': ResourceUsage.objects.filter(
-            allocation__resource__edir=edir
-        ).aggregate(
-            total=Sum('damage_charges')
-        )['total'] or 0
+
+    try:
+        date_from = _query_date(request, 'from')
+        date_to = _query_date(request, 'to')
+    except ValueError as e:
+        return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    if date_from and date_to and date_from > date_to:
+        return Response({'detail': "'from' must not be after 'to'"}, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response(get_utilization(edir, date_from, date_to))
+
+
+def _maintenance_entry(resource, today):
+    return {
+        'id': resource.id,
+        'name': resource.name,
+        'last_maintenance': resource.last_maintenance_date,
+        'next_maintenance_due': resource.next_maintenance_due,
+        'days_overdue': (today - resource.next_maintenance_due).days,
+        'condition': resource.condition
     }
-    
-    return Response({
-        'edir': edir.name,
-        'resource_summary': [
-            {
-                'id': r.id,
-                'name': r.name,
-                'category': r.category,
-                'total_quantity': r.quantity,
-                'allocated_quantity': r.allocated_quantity,
-                'utilization_rate': round((r.allocated_quantity / r.quantity * 100), 2) if r.quantity > 0 else 0,
-                'pending_requests': r.pending_allocations,
-                'active_allocations': r.active_allocations,
-                'rental_income': r.total_rental_income or 0
-            } 
-            for r in resources
-        ],
-        'allocation_status': list(status_counts),
-        'financial_summary': financial_summary,
-        'last_updated': timezone.now()
-    })
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated, IsEdirHead])
+@replica_read
 def resource_maintenance_report(request, edir_slug):
     edir = get_object_or_404(Edir, slug=edir_slug)
+    today = timezone.now().date()
     
-    # Resources needing maintenance
+    # Resources needing maintenance: a range scan on (edir, next_maintenance_due)
     maintenance_needed = Resource.objects.filter(
         edir=edir,
-        last_maintenance_date__lt=timezone.now() - timezone.timedelta(
-            days=F('maintenance_frequency')
-        )
-    ).annotate(
-        days_overdue=timezone.now() - F('last_maintenance_date')
-    )
+        next_maintenance_due__lt=today
+    ).order_by('next_maintenance_due')
     
     # Damaged resources
     damaged_resources = ResourceUsage.objects.filter(
         allocation__resource__edir=edir,
         post_use_condition__in=['poor', 'damaged']
-    ).select_related('allocation__resource').values(
+    ).values(
         'allocation__resource__name',
         'post_use_condition',
         'condition_notes'
     ).distinct()
     
     return Response({
-        'maintenance_needed': [
+        'maintenance_needed': [_maintenance_entry(r, today) for r in maintenance_needed],
+        'damaged_resources': list(damaged_resources)
+    })
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsEdirMember])
+@replica_read
+def resource_maintenance_upcoming(request, edir_slug):
+    """Resources due for maintenance within the next `days` days (default 30)"""
+    edir = get_object_or_404(Edir, slug=edir_slug)
+    try:
+        horizon = int(request.query_params.get('days', 30))
+    except ValueError:
+        horizon = -1
+    if not 0 < horizon <= 366:
+        return Response({'detail': "'days' must be a whole number between 1 and 366"},
+                        status=status.HTTP_400_BAD_REQUEST)
+
+    today = timezone.now().date()
+    upcoming = Resource.objects.filter(
+        edir=edir,
+        next_maintenance_due__gte=today,
+        next_maintenance_due__lte=today + timedelta(days=horizon)
+    ).order_by('next_maintenance_due')
+
+    return Response({
+        'horizon_days': horizon,
+        'upcoming': [
             {
                 'id': r.id,
                 'name': r.name,
                 'last_maintenance': r.last_maintenance_date,
-                'days_overdue': r.days_overdue.days,
+                'next_maintenance_due': r.next_maintenance_due,
+                'days_until_due': (r.next_maintenance_due - today).days,
                 'condition': r.condition
             }
-            for r in maintenance_needed
-        ],
-        'damaged_resources': list(damaged_resources)
-    })
\ No newline at end of file
+            for r in upcoming
+        ]
+    })